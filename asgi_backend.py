@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+ASGI variant of the gift selection backend for high-concurrency vote windows
+Serves the hot routes with async handlers and a bounded write queue, sharing validation and
+storage with backend.py. Every other route is passed through to the Flask app.
+
+Run with:
+    uvicorn asgi_backend:app --host 0.0.0.0 --port 5000
+    gunicorn --workers 3 -k uvicorn.workers.UvicornWorker asgi_backend:app
+"""
+
+import asyncio
+import io
+import json
+import sys
+import threading
+import time
+from datetime import datetime
+from email.utils import formatdate
+from urllib.parse import parse_qs
+
+import backend
+from backend import (
+    RESPONSE_BYTES, RESPONSE_SIZE, STREAM_HEARTBEAT, aggregate_payload, aggregate_snapshot, build_selection,
+    committer, idempotency, idempotency_error, parse_aggregate_fields, record_request, selection_saved,
+    server_sent_event, store, validate_selection
+)
+from idempotency import REPLAYED_HEADER, fingerprint
+
+# Selections waiting for the writer; when full, new votes get 503 + Retry-After
+WRITE_QUEUE_SIZE = 10000
+# Most selections the writer commits in one store call
+WRITE_BATCH_SIZE = 500
+# Seconds between attempts to claim an Idempotency-Key another request is processing
+IDEMPOTENCY_POLL = 0.005
+
+CORS_HEADERS = [(b'access-control-allow-origin', b'*'),
+                (b'access-control-expose-headers', f'ETag, {REPLAYED_HEADER}'.encode())]
+
+
+class SelectionWriter:
+    """Single writer task draining a bounded queue into batched store writes"""
+
+    def __init__(self, maxsize=WRITE_QUEUE_SIZE, batch_size=WRITE_BATCH_SIZE):
+        self.queue = asyncio.Queue(maxsize)
+        self.batch_size = batch_size
+        self.task = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, selection):
+        """Queue a selection and wait until it is stored, returns (action, previous)"""
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((selection, future))  # raises asyncio.QueueFull under overload
+        return await future
+
+    async def _run(self):
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            try:
+                # Blocking file I/O and fsync run off the event loop, through the shared group commit
+                results = await asyncio.to_thread(committer.submit_many, [selection for selection, _ in batch], True)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)  # only this selection failed
+                else:
+                    future.set_result(result)
+
+
+class ChangeNotifier:
+    """One thread waits on the store on behalf of every async stream subscriber"""
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.condition = asyncio.Condition()
+        self.version = store.version()[0]
+        threading.Thread(target=self._watch, name='asgi-change-notifier', daemon=True).start()
+
+    def _watch(self):
+        while True:
+            if store.wait_for_change(self.version, STREAM_HEARTBEAT):
+                self.version = store.version()[0]
+                asyncio.run_coroutine_threadsafe(self._notify(), self.loop)
+
+    async def _notify(self):
+        async with self.condition:
+            self.condition.notify_all()
+
+    async def wait(self, version, timeout):
+        """Wait until the store moves past version, returns False on timeout"""
+        try:
+            async with self.condition:
+                await asyncio.wait_for(self.condition.wait_for(lambda: self.version > version), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+_writer = None
+_notifier = None
+
+
+def get_writer():
+    global _writer
+    if _writer is None:
+        _writer = SelectionWriter()
+    return _writer
+
+
+def get_notifier():
+    global _notifier
+    if _notifier is None:
+        _notifier = ChangeNotifier()
+    return _notifier
+
+
+# ----------------------------------------------------------------------
+# Request / response helpers
+# ----------------------------------------------------------------------
+
+async def read_body(receive):
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+
+def request_header(scope, name):
+    for key, value in scope['headers']:
+        if key == name:
+            return value.decode('latin-1')
+    return None
+
+
+def query_args(scope):
+    return {key: values[0] for key, values in parse_qs(scope['query_string'].decode('latin-1')).items()}
+
+
+async def send_json(send, payload, status=200, headers=()):
+    body = json.dumps(payload).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+                   + CORS_HEADERS + list(headers)
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+# ----------------------------------------------------------------------
+# Async routes
+# ----------------------------------------------------------------------
+
+def prepare_selection(body):
+    """Parse, validate and build a selection, returns (selection, None) or (None, (error body, status))
+
+    Blocking: validation may stat and reload the catalog CSV, so it runs in a worker thread.
+    """
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return None, ({'error': 'Invalid JSON body'}, 400)
+
+    error = validate_selection(data)
+    if error:
+        return None, ({'error': error}, 400)
+    return build_selection(data, datetime.now()), None
+
+
+async def save_selection(body):
+    """Validate and queue a selection, returns (response body, status)"""
+    selection_data, error = await asyncio.to_thread(prepare_selection, body)
+    if error:
+        return error
+    try:
+        action, previous = await get_writer().submit(selection_data)
+    except asyncio.QueueFull:
+        return {'error': 'Server busy, please retry'}, 503
+    except Exception as e:
+        print(f"❌ Error saving selection: {e}")
+        return {'error': 'Internal server error'}, 500
+
+    return selection_saved(selection_data, action, previous), 200
+
+
+def release_claim(attempt):
+    """Done callback of a claim attempt whose request went away: free the key it claimed"""
+    if not attempt.cancelled() and attempt.exception() is None and attempt.result() is not None:
+        attempt.result().release()
+
+
+async def claim_key(key, request_fingerprint):
+    """Claim an Idempotency-Key, its lock and stored response read in a worker thread
+
+    A duplicate of the key still being processed is waited for by polling: a blocked thread per
+    waiting duplicate could take every to_thread worker, including the ones the first request needs.
+    """
+    while True:
+        attempt = asyncio.ensure_future(asyncio.to_thread(idempotency.claim, key, request_fingerprint, False))
+        try:
+            claim = await asyncio.shield(attempt)
+        except asyncio.CancelledError:
+            attempt.add_done_callback(release_claim)
+            raise
+        if claim is not None:
+            return claim
+        await asyncio.sleep(IDEMPOTENCY_POLL)
+
+
+async def select_gift(scope, receive, send):
+    """Receive gift selection from frontend; a retry with the same Idempotency-Key gets the first response"""
+    body = await read_body(receive)
+    key = request_header(scope, b'idempotency-key')
+    if key is None:
+        payload, status = await save_selection(body)
+        return await send_json(send, payload, status, [(b'retry-after', b'1')] if status == 503 else ())
+
+    error = idempotency_error(key)
+    if error:
+        return await send_json(send, *error)
+    claim = await claim_key(key, fingerprint(body))
+    try:
+        error = idempotency_error(key, claim)
+        if error:
+            return await send_json(send, *error)
+        if claim.replay:
+            return await send_json(send, claim.entry['body'], claim.entry['status'],
+                                   [(REPLAYED_HEADER.lower().encode(), b'true')])
+
+        payload, status = await save_selection(body)
+        if status < 500:  # server errors, including a full queue, are retried for real
+            await asyncio.to_thread(claim.save, status, payload)
+    finally:
+        claim.release()
+    await send_json(send, payload, status, [(b'retry-after', b'1')] if status == 503 else ())
+
+
+async def get_aggregate(scope, receive, send):
+    """Get aggregated statistics, answering If-None-Match from the store version alone"""
+    version, modified_at = await asyncio.to_thread(store.version)
+    etag = f'"v{version}"'
+    validators = [(b'etag', etag.encode()), (b'cache-control', b'no-cache')]
+    if modified_at:
+        validators.append((b'last-modified', formatdate(int(modified_at), usegmt=True).encode()))
+
+    if_none_match = request_header(scope, b'if-none-match')
+    if if_none_match and etag in [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]:
+        await send({'type': 'http.response.start', 'status': 304, 'headers': CORS_HEADERS + validators})
+        return await send({'type': 'http.response.body', 'body': b''})
+
+    fields, error = parse_aggregate_fields(query_args(scope).get('fields'))
+    if error:
+        return await send_json(send, {'error': error}, 400)
+    try:
+        payload = await asyncio.to_thread(aggregate_payload, fields)
+    except Exception:
+        return await send_json(send, {'error': 'Internal server error'}, 500)
+    await send_json(send, payload, headers=validators)
+
+
+async def stream_aggregate(scope, receive, send):
+    """Push aggregate deltas as Server-Sent Events without holding a thread per dashboard"""
+    last_event_id = request_header(scope, b'last-event-id') or query_args(scope).get('since')
+    version = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+    notifier = get_notifier()
+
+    async def send_event(message):
+        await send({'type': 'http.response.body', 'body': message.encode('utf-8'), 'more_body': True})
+
+    async def events():
+        nonlocal version
+        if version is None:
+            version, snapshot = await asyncio.to_thread(aggregate_snapshot)
+            await send_event(server_sent_event('snapshot', snapshot, version))
+        while True:
+            changes = await asyncio.to_thread(store.changes_since, version)
+            if changes is None:
+                version, snapshot = await asyncio.to_thread(aggregate_snapshot)
+                await send_event(server_sent_event('snapshot', snapshot, version))
+                continue
+            for change in changes:
+                await send_event(server_sent_event(change['type'], change, change['version']))
+                version = change['version']
+            if not changes and not await notifier.wait(version, STREAM_HEARTBEAT):
+                await send_event(": keep-alive\n\n")
+
+    async def disconnected():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [(b'content-type', b'text/event-stream; charset=utf-8'), (b'cache-control', b'no-cache'),
+                    (b'x-accel-buffering', b'no')] + CORS_HEADERS
+    })
+    tasks = [asyncio.ensure_future(events()), asyncio.ensure_future(disconnected())]
+    _, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    for task in pending:
+        task.cancel()
+
+
+async def health_check(scope, receive, send):
+    """Health check endpoint"""
+    await send_json(send, {
+        'status': 'healthy',
+        'timestamp': datetime.now().isoformat(),
+        'groupCommit': committer.stats()
+    })
+
+
+# ----------------------------------------------------------------------
+# Fallback to the Flask app for every other route
+# ----------------------------------------------------------------------
+
+def wsgi_environ(scope, body):
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for key, value in scope['headers']:
+        name = key.decode('latin-1').upper().replace('-', '_')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value.decode('latin-1')
+        elif name != 'CONTENT_LENGTH':
+            header = f"HTTP_{name}"
+            value = value.decode('latin-1')
+            environ[header] = f"{environ[header]},{value}" if header in environ else value
+    return environ
+
+
+async def call_flask(scope, receive, send):
+    """Run a Flask route in a worker thread and relay its (possibly streamed) response"""
+    environ = wsgi_environ(scope, await read_body(receive))
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+
+    iterable = await asyncio.to_thread(backend.app, environ, start_response)
+    try:
+        iterator = iter(iterable)
+        chunk = await asyncio.to_thread(next, iterator, None)
+        await send({'type': 'http.response.start', 'status': response['status'], 'headers': response['headers']})
+        while chunk is not None:
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            chunk = await asyncio.to_thread(next, iterator, None)
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        if hasattr(iterable, 'close'):
+            await asyncio.to_thread(iterable.close)
+
+
+def measured_send(scope, send):
+    """Wrap send to record an async route's response in the backend's request metrics"""
+    started = time.perf_counter()
+    route, method = scope['path'], scope['method']
+    streamed = False
+
+    async def send_and_record(message):
+        nonlocal streamed
+        if message['type'] == 'http.response.start':
+            record_request(route, method, message['status'], time.perf_counter() - started)
+        elif message['type'] == 'http.response.body':
+            size = len(message.get('body', b''))
+            if message.get('more_body') or streamed:
+                streamed = True
+                RESPONSE_BYTES.inc(route, amount=size)
+            else:
+                RESPONSE_BYTES.inc(route, amount=size)
+                RESPONSE_SIZE.observe(size, route)
+        await send(message)
+    return send_and_record
+
+
+ROUTES = {
+    ('POST', '/api/select-gift'): select_gift,
+    ('GET', '/api/aggregate'): get_aggregate,
+    ('GET', '/api/aggregate/stream'): stream_aggregate,
+    ('GET', '/api/health'): health_check,
+}
+
+
+async def app(scope, receive, send):
+    """ASGI entry point"""
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                get_writer()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await asyncio.to_thread(store.sync)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    if scope['type'] != 'http':
+        return
+
+    handler = ROUTES.get((scope['method'], scope['path']))
+    if handler is None:
+        # Flask routes are recorded by the Flask app itself
+        return await call_flask(scope, receive, send)
+    await handler(scope, receive, measured_send(scope, send))
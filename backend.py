@@ -4,156 +4,507 @@ Backend service for gift selection tracking
 Receives selections from frontend and stores them for aggregation
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
 import json
 import os
-from datetime import datetime
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from gift_catalog import GiftCatalog
+from idempotency import IDEMPOTENCY_HEADER, REPLAYED_HEADER, IdempotencyCache, fingerprint, valid_key
+from selection_store import LogSelectionStore
+from group_commit import GroupCommitter
+from metrics import SIZE_BUCKETS, Metrics
+from profiling import RequestProfiler
 
 app = Flask(__name__)
-CORS(app)  # Enable CORS for frontend requests
+CORS(app, expose_headers=['ETag', REPLAYED_HEADER])  # Enable CORS for frontend requests
 
-# File to store all selections
+# Append-only log holding all selections, indexed in memory by employeeId
+SELECTIONS_LOG = "gift_selections_backend.log"
+# Legacy JSON file, imported into the log on first start
 SELECTIONS_FILE = "gift_selections_backend.json"
 
-def load_selections():
-    """Load existing selections from file"""
-    if os.path.exists(SELECTIONS_FILE):
-        try:
-            with open(SELECTIONS_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            return []
-    return []
+# Request and storage metrics, summed over all workers through snapshots in METRICS_DIR
+METRICS_DIR = os.environ.get('METRICS_DIR', 'backend-metrics')
+metrics = Metrics(METRICS_DIR)
+REQUESTS = metrics.counter('gift_http_requests_total', 'HTTP requests by route, method and status',
+                           ('route', 'method', 'status'))
+REQUEST_ERRORS = metrics.counter('gift_http_request_errors_total', 'Requests answered with a 5xx status',
+                                 ('route', 'method'))
+REQUEST_SECONDS = metrics.histogram('gift_http_request_duration_seconds',
+                                    'Seconds until the response starts (streams: before the first chunk)',
+                                    ('route', 'method'))
+RESPONSE_BYTES = metrics.counter('gift_http_response_bytes_total', 'Response body bytes serialized', ('route',))
+RESPONSE_SIZE = metrics.histogram('gift_http_response_size_bytes', 'Size of response bodies that are not streamed',
+                                  ('route',), buckets=SIZE_BUCKETS)
+STORE_SECONDS = metrics.histogram('gift_store_operation_duration_seconds', 'Seconds spent in selection store calls',
+                                  ('operation',))
+STORE_ERRORS = metrics.counter('gift_store_operation_errors_total', 'Selection store calls that raised',
+                               ('operation',))
 
-def save_selections(selections):
-    """Save selections to file"""
-    with open(SELECTIONS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(selections, f, ensure_ascii=False, indent=2)
+# Store calls timed into STORE_SECONDS (upsert_many is the group commit's durable write)
+STORE_OPERATIONS = ['upsert', 'upsert_many', 'get', 'find', 'all', 'page', 'aggregate', 'gift_totals', 'version', 'count',
+                    'changes_since', 'reset', 'import_json', 'sync', 'compact']
 
-@app.route('/api/select-gift', methods=['POST'])
-def select_gift():
-    """Receive gift selection from frontend"""
+load_started = time.perf_counter()
+store = LogSelectionStore(SELECTIONS_LOG)
+STORE_SECONDS.observe(time.perf_counter() - load_started, 'load')
+metrics.instrument(store, STORE_OPERATIONS, STORE_SECONDS, STORE_ERRORS)
+store.import_json(SELECTIONS_FILE)
+
+# Group commit: selections arriving within the window share one durable write.
+# Batch window and latency budget are in milliseconds
+GROUP_COMMIT_WINDOW_MS = float(os.environ.get('GROUP_COMMIT_WINDOW_MS', 5))
+GROUP_COMMIT_MAX_BATCH = int(os.environ.get('GROUP_COMMIT_MAX_BATCH', 256))
+GROUP_COMMIT_LATENCY_BUDGET_MS = float(os.environ.get('GROUP_COMMIT_LATENCY_BUDGET_MS', 50))
+
+committer = GroupCommitter(
+    store,
+    window=GROUP_COMMIT_WINDOW_MS / 1000,
+    max_batch=GROUP_COMMIT_MAX_BATCH,
+    latency_budget=GROUP_COMMIT_LATENCY_BUDGET_MS / 1000
+)
+
+# Responses of select-gift requests by Idempotency-Key, shared by the workers through IDEMPOTENCY_DIR;
+# a retry within the TTL gets the first response back. Keys beyond the limit are evicted, oldest use first
+IDEMPOTENCY_DIR = os.environ.get('IDEMPOTENCY_DIR', 'backend-idempotency')
+IDEMPOTENCY_TTL = int(os.environ.get('IDEMPOTENCY_TTL', 24 * 3600))
+IDEMPOTENCY_MAX_KEYS = int(os.environ.get('IDEMPOTENCY_MAX_KEYS', 10000))
+idempotency = IdempotencyCache(IDEMPOTENCY_DIR, ttl=IDEMPOTENCY_TTL, max_keys=IDEMPOTENCY_MAX_KEYS)
+
+# Pagination limits for /api/selections
+MAX_PAGE_SIZE = 1000
+STREAM_PAGE_SIZE = 500
+
+# Seconds between keep-alive comments on idle /api/aggregate/stream connections
+STREAM_HEARTBEAT = 15
+
+# Top-level keys /api/aggregate can return, selectable with ?fields=
+AGGREGATE_FIELDS = ['totalSelections', 'uniqueEmployees', 'giftCounts', 'employeeSelections', 'selections']
+
+# Fields every selection must carry
+REQUIRED_FIELDS = ['giftId', 'employeeId']
+# Gift details taken from the catalog; only required from the client when there is no catalog
+GIFT_FIELDS = ['giftName', 'giftPrice']
+
+# Gift catalog, indexed by giftId and reloaded when the CSV changes
+CATALOG_CSV = os.environ.get('CATALOG_CSV', 'gifts-catalog.csv')
+CATALOG_MAX_AGE = 300  # seconds browsers may reuse /api/catalog before revalidating
+catalog = GiftCatalog(CATALOG_CSV)
+
+def record_request(route, method, status, seconds, size=None):
+    """Count a response; size is None for streamed bodies, whose bytes are counted as they are sent"""
+    REQUESTS.inc(route, method, str(status))
+    if status >= 500:
+        REQUEST_ERRORS.inc(route, method)
+    REQUEST_SECONDS.observe(seconds, route, method)
+    if size is not None:
+        RESPONSE_BYTES.inc(route, amount=size)
+        RESPONSE_SIZE.observe(size, route)
+
+def count_streamed_bytes(route, body, chunks):
+    """Yield the encoded chunks of a streamed body, counting their bytes; closes the body when done"""
+    try:
+        for chunk in chunks:
+            RESPONSE_BYTES.inc(route, amount=len(chunk))
+            yield chunk
+    finally:
+        if hasattr(body, 'close'):
+            body.close()
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_response(response):
+    """Record every response of the Flask routes in the request metrics"""
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    seconds = time.perf_counter() - g.get('request_started', time.perf_counter())
+    if response.is_streamed:
+        response.response = count_streamed_bytes(route, response.response, response.iter_encoded())
+        record_request(route, request.method, response.status_code, seconds)
+    else:
+        record_request(route, request.method, response.status_code, seconds, response.calculate_content_length())
+    return response
+
+# Opt-in request profiling (PROFILE_SAMPLE_RATE / PROFILE_TOKEN, see profiling.py); when it is
+# off no hook is installed
+profiler = RequestProfiler.from_environ()
+if profiler:
+    profiler.install(app)
+
+def validate_selection(data):
+    """Return an error message for an invalid selection payload, or None"""
+    if not isinstance(data, dict):
+        return 'Selection must be a JSON object'
+    for field in REQUIRED_FIELDS if catalog.loaded else REQUIRED_FIELDS + GIFT_FIELDS:
+        if field not in data:
+            return f'Missing required field: {field}'
+    for field in REQUIRED_FIELDS:
+        if isinstance(data[field], bool) or not isinstance(data[field], (str, int)):
+            return f'{field} must be a string or an integer'
+    if catalog.loaded and catalog.get(data['giftId']) is None:
+        return f"Unknown giftId: {data['giftId']}"
+    return None
+
+def build_selection(data, received_at, suffix=''):
+    """Stored record of a validated payload: its known fields in SELECTION_KEYS order (so the table keeps
+    it in compact columns), the gift's catalog details, the server timestamp and a selection ID"""
+    gift = catalog.get(data['giftId'])
+    if gift:
+        selection = {'giftId': gift['id'], 'giftName': gift['name'], 'giftPrice': gift['price']}
+    else:
+        selection = {'giftId': data['giftId'], 'giftName': data['giftName'], 'giftPrice': data['giftPrice']}
+    selection['employeeId'] = data['employeeId']
+    if 'selectionTime' in data:
+        selection['selectionTime'] = data['selectionTime']
+    selection['receivedAt'] = received_at.isoformat()
+    selection['id'] = f"selection_{received_at.strftime('%Y%m%d_%H%M%S_%f')}{suffix}"
+    return selection
+
+def selection_saved(selection_data, action, previous):
+    """Log a stored selection and build the select-gift response body"""
+    employee_id = selection_data['employeeId']
+    if action == 'updated':
+        old_gift = previous.get('giftName', 'Unknown')
+        print(f"✅ Updated selection for {employee_id}: {old_gift} → {selection_data['giftName']}")
+    else:
+        print(f"✅ New selection received: {employee_id} → {selection_data['giftName']}")
+    
+    return {
+        'success': True,
+        'message': f'Gift selection {action} successfully',
+        'selectionId': selection_data['id'],
+        'action': action
+    }
+
+def idempotency_error(key, claim=None):
+    """Error (body, status) for an unusable Idempotency-Key, or None"""
+    if not valid_key(key):
+        return {'error': f'{IDEMPOTENCY_HEADER} must be 1-255 printable ASCII characters'}, 400
+    if claim is not None and claim.conflict:
+        return {'error': f'{IDEMPOTENCY_HEADER} was already used for a different selection'}, 422
+    return None
+
+def save_selection():
+    """Validate and store the request's selection, returns (response body, status)"""
     try:
         data = request.get_json()
         
         # Validate required fields
-        required_fields = ['giftId', 'giftName', 'giftPrice', 'employeeId']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'Missing required field: {field}'}), 400
+        error = validate_selection(data)
+        if error:
+            return {'error': error}, 400
         
-        # Load existing selections
-        selections = load_selections()
+        # Add timestamp and ID
+        selection_data = build_selection(data, datetime.now())
         
-        # Check if employee already has a selection
-        employee_id = data['employeeId']
-        existing_selection_index = None
+        # Append to the log with the current batch, replacing any existing selection of this
+        # employee; returns once the batch is on disk
+        action, previous = committer.submit(selection_data)
         
-        for i, selection in enumerate(selections):
-            if selection.get('employeeId') == employee_id:
-                existing_selection_index = i
-                break
+        return selection_saved(selection_data, action, previous), 200
         
-        # Add timestamp and ID
-        selection_data = {
-            **data,
-            'receivedAt': datetime.now().isoformat(),
-            'id': f"selection_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
-        }
-        
-        if existing_selection_index is not None:
-            # Update existing selection
-            old_gift = selections[existing_selection_index].get('giftName', 'Unknown')
-            selections[existing_selection_index] = selection_data
-            print(f"✅ Updated selection for {employee_id}: {old_gift} → {selection_data['giftName']}")
-            action = 'updated'
-        else:
-            # Add new selection
+    except Exception as e:
+        print(f"❌ Error saving selection: {e}")
+        return {'error': 'Internal server error'}, 500
+
+@app.route('/api/select-gift', methods=['POST'])
+def select_gift():
+    """Receive gift selection from frontend; a retry with the same Idempotency-Key gets the first response"""
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if key is None:
+        body, status = save_selection()
+        return jsonify(body), status
+    
+    error = idempotency_error(key)
+    if error:
+        return jsonify(error[0]), error[1]
+    # Duplicates of a key wait here until the first one has stored its response
+    with idempotency.claim(key, fingerprint(request.get_data())) as claim:
+        error = idempotency_error(key, claim)
+        if error:
+            return jsonify(error[0]), error[1]
+        if claim.replay:
+            return jsonify(claim.entry['body']), claim.entry['status'], {REPLAYED_HEADER: 'true'}
+        
+        body, status = save_selection()
+        if status < 500:  # server errors are retried for real
+            claim.save(status, body)
+        return jsonify(body), status
+
+def parse_bulk_rows():
+    """Parse a bulk upload body given as a JSON array or as NDJSON (one selection per line)"""
+    body = request.get_data(as_text=True)
+    if request.mimetype in ('application/x-ndjson', 'application/ndjson'):
+        return [json.loads(line) for line in body.splitlines() if line.strip()]
+    rows = json.loads(body)
+    if not isinstance(rows, list):
+        raise ValueError('Expected a JSON array of selections')
+    return rows
+
+@app.route('/api/select-gifts/bulk', methods=['POST'])
+def select_gifts_bulk():
+    """Import many selections at once (HR sync / corrections) in a single storage write"""
+    try:
+        try:
+            rows = parse_bulk_rows()
+        except ValueError as e:
+            return jsonify({'error': f'Invalid bulk body: {e}'}), 400
+        
+        received_at = datetime.now()
+        results = []
+        selections = []
+        for row, data in enumerate(rows):
+            error = validate_selection(data)
+            if error:
+                results.append({'row': row, 'success': False, 'error': error})
+                continue
+            selection_data = build_selection(data, received_at, f"_{row}")
             selections.append(selection_data)
-            print(f"✅ New selection received: {employee_id} → {selection_data['giftName']}")
-            action = 'created'
+            results.append({'row': row, 'success': True, 'employeeId': data['employeeId'],
+                            'selectionId': selection_data['id']})
+        
+        # All valid rows are appended and fsync-ed together
+        actions = iter(store.upsert_many(selections))
+        for result in results:
+            if result['success']:
+                result['action'] = next(actions)[0]
         
-        # Save back to file
-        save_selections(selections)
+        created = sum(1 for result in results if result.get('action') == 'created')
+        updated = sum(1 for result in results if result.get('action') == 'updated')
+        failed = len(results) - created - updated
+        print(f"✅ Bulk import: {created} created, {updated} updated, {failed} rejected")
         
         return jsonify({
-            'success': True,
-            'message': f'Gift selection {action} successfully',
-            'selectionId': selection_data['id'],
-            'action': action
+            'success': failed == 0,
+            'created': created,
+            'updated': updated,
+            'failed': failed,
+            'results': results
         })
         
     except Exception as e:
-        print(f"❌ Error saving selection: {e}")
+        print(f"❌ Error importing selections: {e}")
         return jsonify({'error': 'Internal server error'}), 500
 
+def conditional_get(view):
+    """Tag responses with the store version and answer 304 before any data is loaded"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        version, modified_at = store.version()
+        etag = f"v{version}"
+        last_modified = datetime.fromtimestamp(int(modified_at), timezone.utc) if modified_at else None
+        
+        if request.if_none_match:
+            not_modified = request.if_none_match.contains(etag)
+        else:
+            # Last-Modified has whole seconds: a vote later in the same second must not get a 304
+            not_modified = bool(modified_at and request.if_modified_since and
+                                modified_at < request.if_modified_since.timestamp())
+        
+        if not_modified:
+            response = Response(status=304)
+        else:
+            response = app.make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        
+        response.set_etag(etag)
+        if last_modified:
+            response.last_modified = last_modified
+        # Allow caching, but always revalidate with the ETag
+        response.cache_control.no_cache = True
+        return response
+    return wrapper
+
+def iter_selections(after=None, limit=None):
+    """Yield selections page by page so a full dump never sits in memory at once"""
+    remaining = limit
+    while remaining is None or remaining > 0:
+        page_size = STREAM_PAGE_SIZE if remaining is None else min(remaining, STREAM_PAGE_SIZE)
+        selections, after = store.page(after, page_size)
+        yield from selections
+        if remaining is not None:
+            remaining -= len(selections)
+        if after is None:
+            return
+
+def stream_selections(stream_format, after=None, limit=None):
+    """Serialize selections incrementally as NDJSON or as the regular JSON envelope"""
+    if stream_format == 'ndjson':
+        for selection in iter_selections(after, limit):
+            yield json.dumps(selection, ensure_ascii=False) + '\n'
+        return
+    
+    yield '{"success": true, "selections": ['
+    total = 0
+    for selection in iter_selections(after, limit):
+        yield (',' if total else '') + json.dumps(selection, ensure_ascii=False)
+        total += 1
+    yield f'], "total": {total}}}'
+
 @app.route('/api/selections', methods=['GET'])
+@conditional_get
 def get_selections():
-    """Get all selections (for admin/aggregation)"""
+    """Get selections (for admin/aggregation), optionally paginated with limit/after or streamed"""
     try:
-        selections = load_selections()
+        after = request.args.get('after')
+        limit = request.args.get('limit')
+        stream_format = request.args.get('stream')
+        
+        if limit is not None:
+            if not limit.isdigit() or int(limit) < 1:
+                return jsonify({'error': 'limit must be a positive integer'}), 400
+            limit = int(limit)
+        if stream_format not in (None, 'json', 'ndjson'):
+            return jsonify({'error': 'stream must be json or ndjson'}), 400
+        
+        # Validate the cursor before any response is started
+        store.page(after, 0)
+        
+        if stream_format:
+            mimetype = 'application/x-ndjson' if stream_format == 'ndjson' else 'application/json'
+            return Response(stream_selections(stream_format, after, limit), mimetype=mimetype)
+        
+        if limit is None and after is None:
+            selections = store.all()
+            return jsonify({
+                'success': True,
+                'selections': selections,
+                'total': len(selections)
+            })
+        
+        selections, next_cursor = store.page(after, min(limit or MAX_PAGE_SIZE, MAX_PAGE_SIZE))
         return jsonify({
             'success': True,
             'selections': selections,
-            'total': len(selections)
+            'total': store.count(),
+            'nextCursor': next_cursor
         })
+    except KeyError:
+        return jsonify({'error': f'Unknown cursor: {after}'}), 400
+    except Exception as e:
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/api/selections/<path:employee_id>', methods=['GET'])
+@conditional_get
+def get_employee_selection(employee_id):
+    """Get one employee's selection from the store's employeeId index (selection page confirmation)"""
+    try:
+        selection = store.find(employee_id)
+        if selection is None:
+            return jsonify({'error': 'No selection for this employee'}), 404
+        return jsonify({'success': True, 'selection': selection})
     except Exception as e:
+        print(f"❌ Error reading selection of {employee_id}: {e}")
         return jsonify({'error': 'Internal server error'}), 500
 
+def parse_aggregate_fields(value):
+    """Parse ?fields= into (fields, error)"""
+    fields = value.split(',') if value else AGGREGATE_FIELDS
+    unknown_fields = [field for field in fields if field not in AGGREGATE_FIELDS]
+    if unknown_fields:
+        return None, f'Unknown fields: {", ".join(unknown_fields)}'
+    return fields, None
+
+def aggregate_payload(fields):
+    """Build the /api/aggregate body, computing only the requested fields"""
+    aggregate = store.aggregate([field for field in fields if field != 'selections'])
+    response = {'success': True}
+    for field in fields:
+        response[field] = store.all() if field == 'selections' else aggregate[field]
+    return response
+
 @app.route('/api/aggregate', methods=['GET'])
+@conditional_get
 def get_aggregate():
-    """Get aggregated statistics"""
+    """Get aggregated statistics, optionally only the top-level keys listed in ?fields="""
     try:
-        selections = load_selections()
-        
-        # Count selections per gift
-        gift_counts = {}
-        employee_gifts = {}
-        
-        for selection in selections:
-            gift_id = selection['giftId']
-            gift_name = selection['giftName']
-            employee_id = selection['employeeId']
-            
-            # Count gifts
-            if gift_id not in gift_counts:
-                gift_counts[gift_id] = {
-                    'giftName': gift_name,
-                    'giftPrice': selection['giftPrice'],
-                    'count': 0,
-                    'employees': []
-                }
-            gift_counts[gift_id]['count'] += 1
-            gift_counts[gift_id]['employees'].append(employee_id)
-            
-            # Track employee selections
-            employee_gifts[employee_id] = {
-                'giftId': gift_id,
-                'giftName': gift_name,
-                'giftPrice': selection['giftPrice'],
-                'selectedAt': selection.get('selectionTime', selection.get('receivedAt'))
-            }
+        fields, error = parse_aggregate_fields(request.args.get('fields'))
+        if error:
+            return jsonify({'error': error}), 400
         
-        return jsonify({
-            'success': True,
-            'totalSelections': len(selections),
-            'uniqueEmployees': len(employee_gifts),
-            'giftCounts': gift_counts,
-            'employeeSelections': employee_gifts,
-            'selections': selections
-        })
+        return jsonify(aggregate_payload(fields))
         
     except Exception as e:
         return jsonify({'error': 'Internal server error'}), 500
 
+def server_sent_event(event, data, event_id=None):
+    """Format one Server-Sent Events message"""
+    message = f"event: {event}\n"
+    if event_id is not None:
+        message += f"id: {event_id}\n"
+    return message + f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def aggregate_snapshot():
+    """Counts-only aggregate sent when a stream starts or falls behind"""
+    version, _ = store.version()
+    aggregate = store.aggregate(['totalSelections', 'uniqueEmployees'])
+    return version, {
+        'version': version,
+        'totalSelections': aggregate['totalSelections'],
+        'uniqueEmployees': aggregate['uniqueEmployees'],
+        'giftCounts': store.gift_totals()
+    }
+
+def aggregate_events(version):
+    """Yield aggregate deltas as they are written by any worker"""
+    if version is None:
+        version, snapshot = aggregate_snapshot()
+        yield server_sent_event('snapshot', snapshot, version)
+    
+    while True:
+        changes = store.changes_since(version)
+        if changes is None:
+            # Missed deltas (history trimmed or log compacted meanwhile): start over from a snapshot
+            version, snapshot = aggregate_snapshot()
+            yield server_sent_event('snapshot', snapshot, version)
+            continue
+        
+        for change in changes:
+            yield server_sent_event(change['type'], change, change['version'])
+            version = change['version']
+        
+        if not changes and not store.wait_for_change(version, STREAM_HEARTBEAT):
+            yield ": keep-alive\n\n"
+
+@app.route('/api/aggregate/stream', methods=['GET'])
+def stream_aggregate():
+    """Push aggregate deltas to the admin dashboard as Server-Sent Events"""
+    last_event_id = request.headers.get('Last-Event-ID', request.args.get('since'))
+    version = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+    
+    return Response(aggregate_events(version), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # let nginx pass events through immediately
+    })
+
+@app.route('/api/catalog', methods=['GET'])
+def get_catalog():
+    """Gift catalog as parsed from the CSV, cacheable and revalidated by ETag"""
+    snapshot = catalog.current()
+    if snapshot is None:
+        return jsonify({'error': 'Catalog not available'}), 503
+    
+    response = Response(snapshot.body, mimetype='application/json')
+    response.set_etag(snapshot.etag)
+    response.last_modified = snapshot.last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = CATALOG_MAX_AGE
+    return response.make_conditional(request)
+
 @app.route('/api/reset-selections', methods=['POST'])
 def reset_selections():
     """Reset all employee selections"""
     try:
-        # Clear the selections file
-        if os.path.exists(SELECTIONS_FILE):
-            os.remove(SELECTIONS_FILE)
+        # Clear the selections log, and the responses that would replay selections now gone
+        store.reset()
+        idempotency.clear()
         
         print("🗑️ All employee selections have been reset")
         
@@ -169,7 +520,24 @@ def reset_selections():
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({'status': 'healthy', 'timestamp': datetime.now().isoformat()})
+    return jsonify({
+        'status': 'healthy',
+        'timestamp': datetime.now().isoformat(),
+        'groupCommit': committer.stats()
+    })
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Request, error, payload size and storage timing metrics of all workers (Prometheus text format)"""
+    version, _ = store.version()
+    metrics.flush()  # so this worker counts among the reporting ones on its first scrape
+    body = metrics.render([
+        ('gift_store_selections', 'Selections currently stored', store.count()),
+        ('gift_store_version', 'Version of the selection log', version),
+        ('gift_catalog_gifts', 'Gifts in the loaded catalog', len(catalog.snapshot.gifts) if catalog.snapshot else 0),
+        ('gift_metrics_workers', 'Worker processes that reported metrics', metrics.workers()),
+    ])
+    return Response(body, mimetype='text/plain; version=0.0.4')
 
 if __name__ == '__main__':
     print("🎁 Gift Selection Backend Service")
@@ -177,10 +545,15 @@ if __name__ == '__main__':
     print("Starting server on http://localhost:5000")
     print("Available endpoints:")
     print("  POST /api/select-gift - Save gift selection")
-    print("  GET  /api/selections  - Get all selections")
-    print("  GET  /api/aggregate   - Get aggregated statistics")
+    print("  POST /api/select-gifts/bulk - Import many selections (JSON array or NDJSON)")
+    print("  GET  /api/selections  - Get selections (?limit=&after=&stream=json|ndjson)")
+    print("  GET  /api/selections/<employeeId> - Get one employee's selection")
+    print("  GET  /api/aggregate   - Get aggregated statistics (?fields=)")
+    print("  GET  /api/aggregate/stream - Live aggregate deltas (Server-Sent Events)")
+    print("  GET  /api/catalog     - Gift catalog (cacheable, ETag)")
     print("  GET  /api/reset-selections - Reset all employee selections")
     print("  GET  /api/health      - Health check")
+    print("  GET  /api/metrics     - Prometheus metrics")
     print()
     
     app.run(host='0.0.0.0', port=5000, debug=True) 
\ No newline at end of file
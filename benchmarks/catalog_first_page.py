@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+First-page weight of the catalog, single page vs paginated
+Builds the catalog for several sizes and reports what a phone downloads before the grid is
+usable: index.html bytes (raw and gzip) and how many card images it references eagerly.
+  single     - the whole catalog in index.html
+  paginated  - index.html holds the first --page-size cards, the rest load on scroll
+
+Usage:
+    python3 benchmarks/catalog_first_page.py
+    python3 benchmarks/catalog_first_page.py --sizes 100 10000 --page-size 24 --json
+"""
+
+import argparse
+import contextlib
+import gzip
+import io
+import json
+import os
+import sys
+import tempfile
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import generate_gift_website as site  # noqa: E402
+from synthetic_catalog import write_catalog  # noqa: E402
+
+
+def first_page(generator):
+    """index.html as generate_website would write it"""
+    out = site.PageBuffer()
+    if not generator.page_size:
+        generator.write_catalog_page(out)
+        return "".join(out)
+    pages = list(generator.catalog_pages())
+    generator.write_catalog_first_page(out, pages[0], len(pages))
+    return "".join(out)
+
+
+def weigh(html):
+    data = html.encode('utf-8')
+    return {
+        'kib': round(len(data) / 1024, 1),
+        'gzip_kib': round(len(gzip.compress(data)) / 1024, 1),
+        'eager_images': html.count('class="catalog-item-image">'),
+        'lazy_images': html.count('loading="lazy"'),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure catalog first-page bytes, single page vs paginated')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5, 100, 1000, 10000])
+    parser.add_argument('--page-size', type=int, default=24, help='Gifts per page in paginated mode')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes:
+            csv_file = write_catalog(os.path.join(workdir, f'catalog-{size}.csv'), size)
+            with contextlib.redirect_stdout(io.StringIO()):
+                generator = site.GiftWebsiteGenerator(csv_file)
+            row = {'gifts': size, 'page_size': args.page_size}
+            generator.page_size = None
+            row['single'] = weigh(first_page(generator))
+            generator.page_size = args.page_size
+            row['paginated'] = weigh(first_page(generator))
+            results.append(row)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'gifts':>7} | {'single KiB':>10} {'gzip':>8} {'images':>7} | {'paged KiB':>10} {'gzip':>8} {'images':>7}")
+    for row in results:
+        single, paged = row['single'], row['paginated']
+        print(f"{row['gifts']:>7} | {single['kib']:>10} {single['gzip_kib']:>8} {single['eager_images']:>7} | "
+              f"{paged['kib']:>10} {paged['gzip_kib']:>8} {paged['eager_images'] + paged['lazy_images']:>7}")
+    print(f"(paginated: first {args.page_size} cards, images loading=\"lazy\")")
+
+
+if __name__ == '__main__':
+    main()
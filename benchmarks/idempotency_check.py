@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Checks for the select-gift Idempotency-Key cache
+  eviction   - the cache stays bounded, keeps recently used keys and expires entries after the TTL
+  replay     - a retry gets the first response back (Idempotent-Replayed: true) without a second write,
+               the same key with another body is refused with 422 and an invalid key with 400
+  duplicates - several processes x threads send every selection with the same key at once; each
+               key must be stored exactly once and every duplicate must get the first response back
+
+Usage:
+    python3 benchmarks/idempotency_check.py                      # in-process workers sharing one log
+    python3 benchmarks/idempotency_check.py --url http://localhost:5000   # against gunicorn
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from idempotency import IdempotencyCache  # noqa: E402
+
+
+def check_eviction(max_keys, keys):
+    """Save `keys` responses into a cache of max_keys, asserting it stays bounded and evicts the right keys"""
+    cache = IdempotencyCache(tempfile.mkdtemp(prefix='gift-idempotency-'), ttl=3600, max_keys=max_keys)
+    bound = max_keys + cache.sweep_every
+    kept = 'key-0'
+    for n in range(keys):
+        with cache.claim(f'key-{n}', 'request') as claim:
+            if claim.entry is None:
+                claim.save(200, {'n': n})
+        if n % (max_keys // 2) == 0:
+            time.sleep(0.01)  # mtime resolution: keep 'key-0' the most recently used
+            with cache.claim(kept, 'request'):
+                pass
+        assert cache.count() <= bound, f"{cache.count()} entries after {n + 1} saves, bound {bound}"
+    assert cache.count() >= max_keys, f"only {cache.count()} of the last {max_keys} keys kept"
+    with cache.claim(kept, 'request') as claim:
+        assert claim.replay, "recently used key was evicted"
+    with cache.claim('key-1', 'request') as claim:
+        assert not claim.replay, "least recently used key survived"
+    with cache.claim(kept, 'other request') as claim:
+        assert claim.conflict, "a key reused for another request was not a conflict"
+
+    cache.ttl = 0.2
+    with cache.claim('expiring', 'request') as claim:
+        claim.save(200, {})
+    time.sleep(0.3)
+    with cache.claim('expiring', 'request') as claim:
+        assert claim.entry is None, "entry outlived its TTL"
+    cache.sweep()
+    assert not cache.count(), f"{cache.count()} entries left after every TTL passed"
+    print(f"🧹 eviction: {keys} saves into max {max_keys} keys, at most {bound} stored between sweeps")
+
+
+def selection_payload(n):
+    return {
+        'giftId': str(n % 5 + 1),
+        'giftName': 'מתנה',
+        'giftPrice': '₪100.00',
+        'employeeId': f'emp_{n:06d}',
+        'selectionTime': '2024-01-01T00:00:00.000Z'
+    }
+
+
+def post_http(url, key, body):
+    request = urllib.request.Request(f"{url}/api/select-gift", data=body, method='POST',
+                                     headers={'Content-Type': 'application/json', 'Idempotency-Key': key})
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.status, json.load(response), response.headers.get('Idempotent-Replayed')
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e), e.headers.get('Idempotent-Replayed')
+
+
+def select_gift_poster(url, workdir):
+    """post(key, body) -> (status, body, Idempotent-Replayed) against url, or the Flask app run in workdir"""
+    if url:
+        return lambda key, body: post_http(url, key, body)
+    os.chdir(workdir)
+    with contextlib.redirect_stdout(io.StringIO()):
+        import backend
+    client = backend.app.test_client()
+
+    def post(key, body):
+        response = client.post('/api/select-gift', data=body, content_type='application/json',
+                               headers={'Idempotency-Key': key})
+        return response.status_code, response.get_json(), response.headers.get('Idempotent-Replayed')
+    return post
+
+
+def run_worker(keys, threads, workdir, url):
+    """Worker process: send the selection of every (key, n), all concurrently"""
+    post = select_gift_poster(url, workdir)
+    requests = [(key, json.dumps(selection_payload(n)).encode('utf-8')) for key, n in keys]
+    with contextlib.redirect_stdout(io.StringIO()):
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            return list(pool.map(lambda request: (request[0],) + post(*request), requests))
+
+
+def store_version(url, workdir):
+    """Version of the selection log: one more for every selection written"""
+    if url:
+        with urllib.request.urlopen(f"{url}/api/aggregate?fields=totalSelections", timeout=60) as response:
+            return int(response.headers['ETag'].strip('"W/v'))
+    from selection_store import LogSelectionStore
+    store = LogSelectionStore(os.path.join(workdir, 'gift_selections_backend.log'))
+    try:
+        return store.version()[0]
+    finally:
+        store.close()
+
+
+def reset_selections(url):
+    urllib.request.urlopen(urllib.request.Request(f"{url}/api/reset-selections", method='POST'), timeout=60)
+
+
+def check_replay(url):
+    """Send one selection, its retry, the same key with another body and an invalid key, asserting each answer"""
+    workdir = tempfile.mkdtemp(prefix='gift-idempotency-')
+    if url:
+        reset_selections(url)
+    version = store_version(url, workdir)
+    post = select_gift_poster(url, workdir)
+    key = str(uuid.uuid4())
+    body = json.dumps(selection_payload(0)).encode('utf-8')
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        status, first, replayed = post(key, body)
+        assert status == 200 and replayed is None, f"first request: {status} {first} (replayed: {replayed})"
+        status, retry, replayed = post(key, body)
+        assert status == 200 and replayed == 'true', f"retry: {status} {retry} (replayed: {replayed})"
+        assert retry == first, f"retry answered {retry}, first response was {first}"
+        status, conflict, _ = post(key, json.dumps(selection_payload(1)).encode('utf-8'))
+        assert status == 422, f"same key with another body: expected 422, got {status} {conflict}"
+        status, invalid, _ = post('k' * 256, body)
+        assert status == 400, f"invalid key: expected 400, got {status} {invalid}"
+    writes = store_version(url, workdir) - version
+    assert writes == 1, f"{writes} selections written for one key, expected 1"
+    print("🔂 replay: retry replayed without a write, reused key refused with 422, invalid key with 400")
+
+
+def check_duplicates(processes, copies, threads, selections, url):
+    """Send each selection `copies` times per process at once, returns a list of failures"""
+    workdir = tempfile.mkdtemp(prefix='gift-idempotency-')
+    if url:
+        reset_selections(url)
+    version = store_version(url, workdir)
+    keys = [(str(uuid.uuid4()), n) for n in range(selections)]
+    keys = [key for key in keys for _ in range(copies)]  # copies of a key sent side by side
+
+    started = time.perf_counter()
+    ctx = multiprocessing.get_context('spawn')
+    with ctx.Pool(processes) as pool:
+        results = [result for worker in pool.starmap(run_worker, [(keys, threads, workdir, url)] * processes)
+                   for result in worker]
+    elapsed = time.perf_counter() - started
+
+    failures = []
+    by_key = {}
+    for key, status, body, replayed in results:
+        by_key.setdefault(key, []).append((status, body, replayed))
+    for key, responses in by_key.items():
+        first = [body for status, body, replayed in responses if not replayed]
+        if len(first) != 1:
+            failures.append(f"{key}: processed {len(first)} times")
+        if any(status != 200 or body != responses[0][1] for status, body, _ in responses):
+            failures.append(f"{key}: responses differ")
+
+    writes = store_version(url, workdir) - version
+    if writes != selections:
+        failures.append(f"{writes} selections written, expected {selections}")
+
+    print(f"🔁 duplicates: {len(results)} requests ({selections} keys x {processes * copies}) in {elapsed:.2f}s, "
+          f"{len(results) - selections} replayed expected")
+    return failures[:10]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--processes', type=int, default=4, help='worker processes sending duplicates')
+    parser.add_argument('--copies', type=int, default=2, help='times each process sends every key')
+    parser.add_argument('--threads', type=int, default=8, help='concurrent requests per process')
+    parser.add_argument('--selections', type=int, default=500, help='distinct selections (keys)')
+    parser.add_argument('--max-keys', type=int, default=200, help='cache size for the eviction check')
+    parser.add_argument('--url', help='backend base URL; omit to run the Flask app inside each process')
+    args = parser.parse_args()
+
+    try:
+        check_eviction(args.max_keys, args.max_keys * 5)
+        check_replay(args.url)
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    failures = check_duplicates(args.processes, args.copies, args.threads, args.selections, args.url)
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        sys.exit(1)
+    print("✅ Every key stored once, retries and duplicates replayed, conflicts refused, cache bounded")
+
+
+if __name__ == '__main__':
+    main()
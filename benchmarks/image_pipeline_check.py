@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Checks for the local image pipeline, run offline against generated fixture photos
+Builds a small catalog with --image-cache --image-source twice and asserts that:
+  variants  - every variant fits its VARIANTS box, keeps the photo's aspect ratio and is never
+              upscaled, and the pages' width/height attributes match the published files
+  cache     - the second build fetches nothing (the fixture directory is gone by then) and writes
+              the same pages
+  fallback  - a photo missing from the source keeps its vendor URL on the gift page
+
+Usage:
+    python3 benchmarks/image_pipeline_check.py
+"""
+
+import csv
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from image_pipeline import IMAGES_DIR, INDEX_FILE, VARIANTS, Image  # noqa: E402
+from synthetic_catalog import COLUMNS, template_rows  # noqa: E402
+
+PHOTO_URL = "https://vendor.example/uploads/{}"
+
+# File name -> (size, mode): large and small, landscape and portrait, with and without alpha
+FIXTURES = {
+    'landscape.jpg': ((3200, 1800), 'RGB'),
+    'portrait.png': ((900, 2400), 'RGBA'),
+    'small.gif': ((120, 90), 'P'),
+    'panorama.webp': ((2000, 300), 'RGB'),
+}
+MISSING_PHOTO = 'missing.jpg'
+# Photos of gifts 1, 2 and 3
+GIFT_PHOTOS = [['landscape.jpg', 'portrait.png'], ['small.gif', MISSING_PHOTO], ['panorama.webp']]
+
+IMG_TAG = re.compile(r'<img\b[^>]*>')
+ATTRIBUTE = re.compile(r'([\w-]+)="([^"]*)"')
+
+
+def write_fixtures(directory):
+    os.makedirs(directory)
+    for n, (name, (size, mode)) in enumerate(FIXTURES.items()):
+        image = Image.new('RGB', size, (40 * n, 120, 200 - 40 * n))
+        image.paste((250, 200, 20), (size[0] // 4, size[1] // 4, size[0] // 2, size[1] // 2))
+        image.convert(mode).save(os.path.join(directory, name))
+
+
+def write_catalog(path):
+    rows = template_rows()[:len(GIFT_PHOTOS)]
+    for row, photos in zip(rows, GIFT_PHOTOS):
+        for n in range(4):
+            row[f'photo{n + 1}'] = PHOTO_URL.format(photos[n]) if n < len(photos) else ''
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def build(csv_file, output_dir, cache_dir, source_dir):
+    """Run the generator, returns (fetched, failed) from its images report"""
+    output = subprocess.run(
+        [sys.executable, os.path.join(PROJECT_ROOT, 'generate_gift_website.py'), '--csv', csv_file,
+         '--output-dir', output_dir, '--image-cache', cache_dir, '--image-source', source_dir],
+        capture_output=True, text=True, check=True).stdout
+    report = re.search(r'Images: (\d+) fetched, (\d+) failed', output)
+    assert report, f"no images report in the build output:\n{output}"
+    return int(report.group(1)), int(report.group(2))
+
+
+def read_pages(output_dir):
+    pages = {}
+    for name in sorted(os.listdir(output_dir)):
+        if name.endswith('.html'):
+            with open(os.path.join(output_dir, name), encoding='utf-8') as f:
+                pages[name] = f.read()
+    return pages
+
+
+def check_variants(cache_dir, output_dir, pages):
+    """Assert variant sizes against their fixture and the pages' width/height against the files"""
+    with open(os.path.join(cache_dir, INDEX_FILE), encoding='utf-8') as f:
+        index = json.load(f)
+    assert set(index) == {PHOTO_URL.format(name) for name in FIXTURES}, f"cached photos: {sorted(index)}"
+    for name, ((width, height), _) in FIXTURES.items():
+        for variant, (box_width, box_height) in VARIANTS.items():
+            entry = index[PHOTO_URL.format(name)][variant]
+            size = (entry['width'], entry['height'])
+            assert size[0] <= box_width and size[1] <= box_height, f"{name} {variant} is {size}, box {VARIANTS[variant]}"
+            assert size[0] <= width and size[1] <= height, f"{name} {variant} upscaled to {size}"
+            if width > box_width or height > box_height:
+                assert size[0] == box_width or size[1] == box_height, f"{name} {variant} is {size}, not fitted to its box"
+            assert abs(size[0] * height - size[1] * width) <= max(width, height), \
+                f"{name} {variant} is {size}, aspect ratio of {width}x{height} lost"
+
+    local_images = 0
+    for page, html in pages.items():
+        for tag in IMG_TAG.findall(html):
+            attributes = dict(ATTRIBUTE.findall(tag))
+            if not attributes.get('src', '').startswith(f'/{IMAGES_DIR}/'):
+                continue
+            local_images += 1
+            assert 'width' in attributes and 'height' in attributes, f"{page}: {attributes['src']} without width/height"
+            with Image.open(os.path.join(output_dir, attributes['src'].lstrip('/'))) as variant:
+                declared = (int(attributes['width']), int(attributes['height']))
+                assert variant.size == declared, f"{page}: {attributes['src']} is {variant.size}, declared {declared}"
+    assert local_images, "no page links a local variant"
+    print(f"📐 variants: {len(FIXTURES)} photos x {len(VARIANTS)} variants within their boxes, "
+          f"{local_images} <img> width/height attributes match the files")
+
+
+def check_fallback(pages):
+    """Assert the missing photo keeps its vendor URL on its gift page"""
+    missing = PHOTO_URL.format(MISSING_PHOTO)
+    assert f'src="{missing}"' in pages['gift_2.html'], f"gift_2.html does not fall back to {missing}"
+    assert f'/{IMAGES_DIR}/' in pages['gift_2.html'], "gift_2.html lost the local variant of its other photo"
+    print(f"🔗 fallback: {MISSING_PHOTO} keeps its vendor URL")
+
+
+def main():
+    if Image is None:
+        print("❌ The image pipeline needs Pillow (pip install Pillow)")
+        sys.exit(1)
+    workdir = tempfile.mkdtemp(prefix='gift-images-')
+    try:
+        source_dir = os.path.join(workdir, 'photos')
+        cache_dir = os.path.join(workdir, 'cache')
+        csv_file = os.path.join(workdir, 'catalog.csv')
+        write_fixtures(source_dir)
+        write_catalog(csv_file)
+
+        fetched, failed = build(csv_file, os.path.join(workdir, 'first'), cache_dir, source_dir)
+        assert (fetched, failed) == (len(FIXTURES), 1), f"first build: {fetched} fetched, {failed} failed"
+        pages = read_pages(os.path.join(workdir, 'first'))
+        check_variants(cache_dir, os.path.join(workdir, 'first'), pages)
+        check_fallback(pages)
+
+        # Without the source directory, any refetch would fail and change the pages
+        shutil.rmtree(source_dir)
+        os.makedirs(source_dir)
+        fetched, _ = build(csv_file, os.path.join(workdir, 'second'), cache_dir, source_dir)
+        assert fetched == 0, f"second build fetched {fetched} photos again"
+        assert read_pages(os.path.join(workdir, 'second')) == pages, "second build wrote different pages"
+        print("♻️  cache: second build fetched nothing and wrote the same pages")
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    print("✅ Variants sized, attributes match, cache reused, missing photos fall back")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Load test comparing the Flask backend with its ASGI variant during a vote window
+Opens many concurrent keep-alive clients that POST /api/select-gift and reports p50/p99 latency
+and throughput per target.
+
+Usage:
+    python3 benchmarks/load_test.py                        # spawn gunicorn (sync) and uvicorn locally
+    python3 benchmarks/load_test.py --clients 500 --requests 20000
+    python3 benchmarks/load_test.py --target flask=http://localhost:5000 --target asgi=http://localhost:5001
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from urllib.parse import urlsplit
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GIFT_IDS = ['1', '2', '3', '4', '5']
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def spawn_servers(workers, workdir):
+    """Start the current Flask app under sync gunicorn workers and the ASGI app under uvicorn"""
+    env = dict(os.environ, PYTHONPATH=PROJECT_ROOT)
+    flask_port, asgi_port = free_port(), free_port()
+    commands = {
+        'flask': [sys.executable, '-m', 'gunicorn', '--workers', str(workers), '--bind', f'127.0.0.1:{flask_port}',
+                  '--log-level', 'warning', 'backend:app'],
+        'asgi': [sys.executable, '-m', 'uvicorn', 'asgi_backend:app', '--workers', str(workers),
+                 '--port', str(asgi_port), '--log-level', 'warning', '--no-access-log'],
+    }
+    servers, targets = [], {}
+    for name, port in (('flask', flask_port), ('asgi', asgi_port)):
+        cwd = os.path.join(workdir, name)
+        os.makedirs(cwd)
+        servers.append(subprocess.Popen(commands[name], cwd=cwd, env=env, stdout=subprocess.DEVNULL))
+        targets[name] = f'http://127.0.0.1:{port}'
+    for url in targets.values():
+        wait_until_healthy(url)
+    return servers, targets
+
+
+def wait_until_healthy(url, timeout=30):
+    deadline = time.time() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(f'{url}/api/health', timeout=1):
+                return
+        except OSError:
+            if time.time() > deadline:
+                raise RuntimeError(f'{url} did not become healthy')
+            time.sleep(0.2)
+
+
+def selection_request(host, run, n):
+    body = json.dumps({
+        'giftId': GIFT_IDS[n % len(GIFT_IDS)],
+        'giftName': f'מתנה {n % len(GIFT_IDS)}',
+        'giftPrice': '₪100.00',
+        'employeeId': f'load_{run}_{n:07d}',
+        'selectionTime': '2024-01-01T00:00:00.000Z'
+    }).encode('utf-8')
+    head = (f'POST /api/select-gift HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n'
+            f'Content-Length: {len(body)}\r\n\r\n')
+    return head.encode('latin-1') + body
+
+
+async def read_response(reader):
+    """Read one HTTP/1.1 response, returns (status, keep_alive)"""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('connection closed')
+    status = int(status_line.split()[1])
+    length, keep_alive = None, not status_line.startswith(b'HTTP/1.0')
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        name, value = name.strip().lower(), value.strip().lower()
+        if name == 'content-length':
+            length = int(value)
+        elif name == 'connection':
+            keep_alive = value == 'keep-alive' or (keep_alive and value != 'close')
+    if length is None:
+        await reader.read()
+        keep_alive = False
+    else:
+        await reader.readexactly(length)
+    return status, keep_alive
+
+
+async def run_target(url, clients, total, run):
+    """Send total selections from concurrent clients, returns latencies and error count"""
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    next_request = iter(range(total))
+    latencies, errors = [], 0
+
+    async def client():
+        nonlocal errors
+        reader = writer = None
+        for n in next_request:
+            started = time.perf_counter()
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.open_connection(host, port)
+                writer.write(selection_request(parts.netloc, run, n))
+                status, keep_alive = await read_response(reader)
+            except (OSError, ConnectionError, asyncio.IncompleteReadError):
+                errors += 1
+                writer = None
+                continue
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                errors += 1
+            if not keep_alive:
+                writer.close()
+                writer = None
+        if writer is not None:
+            writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare p50/p99 latency of the Flask and ASGI backends')
+    parser.add_argument('--target', action='append', default=[], metavar='NAME=URL',
+                        help='Backend to load (repeatable); spawns gunicorn and uvicorn locally when omitted')
+    parser.add_argument('--clients', type=int, default=200, help='Concurrent connections per target')
+    parser.add_argument('--requests', type=int, default=5000, help='Selections posted per target')
+    parser.add_argument('--workers', type=int, default=3, help='Worker processes for spawned servers')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    servers = []
+    with tempfile.TemporaryDirectory() as workdir:
+        if args.target:
+            targets = dict(target.split('=', 1) for target in args.target)
+        else:
+            servers, targets = spawn_servers(args.workers, workdir)
+
+        results = {}
+        try:
+            for name, url in targets.items():
+                latencies, errors, elapsed = asyncio.run(run_target(url, args.clients, args.requests, int(time.time())))
+                results[name] = {
+                    'url': url,
+                    'requests': args.requests,
+                    'errors': errors,
+                    'seconds': round(elapsed, 3),
+                    'throughput': round(len(latencies) / elapsed, 1),
+                    'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+                    'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+                }
+        finally:
+            for server in servers:
+                server.terminate()
+                server.wait()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"🚦 {args.requests} selections from {args.clients} concurrent clients per target")
+    for name, result in results.items():
+        print(f"  {name:<8} p50 {result['p50_ms']:>8.2f} ms   p99 {result['p99_ms']:>8.2f} ms   "
+              f"{result['throughput']:>8.1f} req/s   errors {result['errors']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Page weight of the generated site, inline CSS/JS vs shared assets
+Builds the same catalog twice (inline, and --shared-assets --precompress) and reports the bytes a
+browser transfers for the catalog plus a number of gift pages: raw, gzip and brotli, on a first
+visit and on a repeat visit where the content-hashed assets are already cached.
+
+Usage:
+    python3 benchmarks/page_weight.py
+    python3 benchmarks/page_weight.py --gifts 1000 --visits 20 --json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import generate_gift_website as site  # noqa: E402
+from synthetic_catalog import write_catalog  # noqa: E402
+
+
+def transfer(output_dir, filename, encoding):
+    """Bytes sent for one file: the precompressed sibling when there is one, else the file"""
+    path = os.path.join(output_dir, filename)
+    if encoding and os.path.exists(f"{path}.{encoding}"):
+        path = f"{path}.{encoding}"
+    return os.path.getsize(path)
+
+
+def visit_bytes(output_dir, pages, assets, encoding):
+    first = sum(transfer(output_dir, page, encoding) for page in pages + assets)
+    repeat = sum(transfer(output_dir, page, encoding) for page in pages)
+    return first, repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure page weight with inline vs shared CSS/JS')
+    parser.add_argument('--gifts', type=int, default=100, help='Catalog size')
+    parser.add_argument('--visits', type=int, default=10, help='Gift pages opened after the catalog')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    pages = ['index.html'] + [f'gift_{n}.html' for n in range(1, min(args.visits, args.gifts) + 1)]
+    results = {'gifts': args.gifts, 'pages_visited': len(pages)}
+    with tempfile.TemporaryDirectory() as workdir:
+        csv_file = write_catalog(os.path.join(workdir, 'catalog.csv'), args.gifts)
+        for name, shared in (('inline', False), ('shared', True)):
+            output_dir = os.path.join(workdir, name)
+            with contextlib.redirect_stdout(io.StringIO()):
+                generator = site.GiftWebsiteGenerator(csv_file, shared_assets=shared)
+                generator.generate_website(output_dir, precompress=True)
+            assets = [url.lstrip('/') for url in site.SHARED_ASSETS.values()] if shared else []
+            row = {'gift_page_bytes': os.path.getsize(os.path.join(output_dir, 'gift_1.html'))}
+            for encoding in ('', 'gz', 'br'):
+                if encoding == 'br' and site.brotli is None:
+                    continue
+                first, repeat = visit_bytes(output_dir, pages, assets, encoding)
+                label = encoding or 'raw'
+                row[f'first_visit_{label}'] = first
+                row[f'repeat_visit_{label}'] = repeat
+            results[name] = row
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"📄 index.html + {len(pages) - 1} gift pages from a {args.gifts}-gift catalog")
+    print(f"{'':>8} | {'gift page':>10} | {'first raw':>10} {'first gz':>9} {'first br':>9} | "
+          f"{'repeat raw':>10} {'repeat gz':>9} {'repeat br':>9}")
+    for name in ('inline', 'shared'):
+        row = results[name]
+        print(f"{name:>8} | {row['gift_page_bytes']:>10} | {row['first_visit_raw']:>10} "
+              f"{row['first_visit_gz']:>9} {row.get('first_visit_br', '-'):>9} | {row['repeat_visit_raw']:>10} "
+              f"{row['repeat_visit_gz']:>9} {row.get('repeat_visit_br', '-'):>9}")
+
+
+if __name__ == '__main__':
+    main()
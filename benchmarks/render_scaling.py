@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark for catalog page rendering as the catalog grows
+Renders index.html for 10 to 50k gifts three ways and reports time and peak memory:
+  legacy  - the previous `html += f"..."` concatenation (kept here for comparison)
+  string  - generate_catalog_page(): card chunks collected in a list and joined once
+  stream  - write_catalog_page() straight to the output file
+
+Usage:
+    python3 benchmarks/render_scaling.py
+    python3 benchmarks/render_scaling.py --sizes 1000 10000 50000 --json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import generate_gift_website as site  # noqa: E402
+from synthetic_catalog import write_catalog  # noqa: E402
+
+
+def legacy_catalog_page(generator):
+    """The catalog page as it was assembled before: one growing string"""
+    html = site.CATALOG_PAGE_HEAD
+    for gift in generator.gifts:
+        preview_image = gift['photos'][0] if gift['photos'] else site.DEFAULT_PREVIEW_IMAGE
+        description = gift['description'][:150] + "..." if len(gift['description']) > 150 else gift['description']
+        html += f"""
+        <div class="catalog-item" onclick="window.location.href='/gift_{gift['id']}.html'">
+            <div class="catalog-item-header">
+                <h2 class="catalog-item-title">{gift['name']}</h2>
+                <p class="catalog-item-subtitle">{gift['subtitle']}</p>
+            </div>
+            <div class="catalog-item-content">
+                <img src="{preview_image}" alt="{gift['name']}" class="catalog-item-image">
+                <p class="catalog-item-description">{description}</p>
+                <div class="catalog-item-footer">
+                    <div class="catalog-item-price">{gift['price']}</div>
+                    <div class="catalog-item-availability {site.availability_class(gift)}">{gift['availability']}</div>
+                </div>
+                <a href="/gift_{gift['id']}.html" class="view-details-btn">צפה בפרטים מלאים</a>
+            </div>
+        </div>"""
+    html += site.CATALOG_PAGE_TAIL
+    return html
+
+
+def measure(render):
+    """(seconds, peak traced bytes) of one render; timed without tracemalloc overhead"""
+    started = time.perf_counter()
+    render()
+    seconds = time.perf_counter() - started
+    tracemalloc.start()
+    render()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure catalog page render time and memory by catalog size')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 10000, 50000])
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        output = os.path.join(workdir, 'index.html')
+        for size in args.sizes:
+            csv_file = write_catalog(os.path.join(workdir, f'catalog-{size}.csv'), size)
+            with contextlib.redirect_stdout(io.StringIO()):
+                generator = site.GiftWebsiteGenerator(csv_file)
+
+            def stream():
+                with open(output, 'w', encoding='utf-8') as f:
+                    generator.write_catalog_page(f)
+
+            assert legacy_catalog_page(generator) == generator.generate_catalog_page()
+            row = {'gifts': size}
+            for name, render in (('legacy', lambda: legacy_catalog_page(generator)),
+                                 ('string', generator.generate_catalog_page),
+                                 ('stream', stream)):
+                seconds, peak = measure(render)
+                row[f'{name}_ms'] = round(seconds * 1000, 2)
+                row[f'{name}_peak_kib'] = round(peak / 1024, 1)
+            row['page_kib'] = round(os.path.getsize(output) / 1024, 1)
+            results.append(row)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'gifts':>7} {'page KiB':>9} | {'legacy ms':>10} {'peak KiB':>9} | {'string ms':>10} {'peak KiB':>9} | "
+          f"{'stream ms':>10} {'peak KiB':>9}")
+    for row in results:
+        print(f"{row['gifts']:>7} {row['page_kib']:>9} | {row['legacy_ms']:>10} {row['legacy_peak_kib']:>9} | "
+              f"{row['string_ms']:>10} {row['string_peak_kib']:>9} | {row['stream_ms']:>10} {row['stream_peak_kib']:>9}")
+
+
+if __name__ == '__main__':
+    main()
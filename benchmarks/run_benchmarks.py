@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the generator and backend hot paths
+Runs every benchmark on synthetic data and reports milliseconds per operation (min, median, mean):
+  generator   - load_gifts, generate_catalog_page, generate_gift_page and full/incremental
+                generate_website for each catalog size (--sizes)
+  backend     - select_gift, get_selections, get_selection (one employee) and get_aggregate through
+                Flask's test client, with --selections selections already in the store (a fresh
+                process per store size)
+  concurrency - employees voting at once from --threads threads, with throughput, p50/p99 latency
+                and a check that no selection was lost
+
+Results are a JSON document of records keyed by benchmark name and parameters, tagged with the
+commit they were measured at, so runs on two commits can be compared:
+    python3 benchmarks/run_benchmarks.py --output before.json
+    python3 benchmarks/run_benchmarks.py --output after.json --compare before.json
+
+Usage:
+    python3 benchmarks/run_benchmarks.py
+    python3 benchmarks/run_benchmarks.py --quick --json
+    python3 benchmarks/run_benchmarks.py --suite generator --sizes 10 1000 50000 --repeat 5
+    python3 benchmarks/run_benchmarks.py --suite backend --selections 1000 100000
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_catalog import write_catalog  # noqa: E402
+from store_memory import generate_selections, write_log  # noqa: E402
+
+SUITES = ['generator', 'backend', 'concurrency']
+DEFAULT_SIZES = [10, 100, 1000, 10000, 50000]
+DEFAULT_SELECTIONS = [1000, 10000, 100000]
+DEFAULT_THREADS = [1, 8, 32]
+# --quick: enough to smoke-test the harness and catch large regressions
+QUICK_SIZES = [10, 1000]
+QUICK_SELECTIONS = [1000]
+QUICK_THREADS = [1, 8]
+
+# Gift pages rendered per generate_gift_page run (the result is per page)
+GIFT_PAGE_SAMPLE = 500
+# Admin dashboard's /api/aggregate query
+ADMIN_AGGREGATE_FIELDS = 'totalSelections,uniqueEmployees,giftCounts,employeeSelections'
+
+
+def timed(run, repeat, ops=1, setup=None):
+    """Time run() repeat times (after setup(), untimed), returns milliseconds per operation"""
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - started) * 1000 / ops)
+    return {
+        'unit': 'ms',
+        'ops': ops,
+        'runs': repeat,
+        'min': round(min(samples), 4),
+        'median': round(statistics.median(samples), 4),
+        'mean': round(statistics.mean(samples), 4),
+    }
+
+
+def record(name, params, result, **extra):
+    return {'name': name, 'params': params, **result, **extra}
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+# ----------------------------------------------------------------------
+# Generator
+# ----------------------------------------------------------------------
+
+def generator_benchmarks(sizes, repeat, workdir):
+    import generate_gift_website as site
+
+    results = []
+    for size in sizes:
+        csv_file = write_catalog(os.path.join(workdir, f'catalog-{size}.csv'), size)
+        output_dir = os.path.join(workdir, f'site-{size}')
+        params = {'gifts': size}
+        with contextlib.redirect_stdout(io.StringIO()):
+            generator = site.GiftWebsiteGenerator(csv_file)
+            sample = generator.gifts[:GIFT_PAGE_SAMPLE]
+            clean = lambda: shutil.rmtree(output_dir, ignore_errors=True)
+            rows = [
+                ('load_gifts', timed(generator.load_gifts, repeat), {}),
+                ('generate_catalog_page', timed(generator.generate_catalog_page, repeat),
+                 {'bytes': len(generator.generate_catalog_page().encode('utf-8'))}),
+                ('generate_gift_page', timed(lambda: [generator.generate_gift_page(gift) for gift in sample],
+                                             repeat, ops=len(sample)), {}),
+                ('generate_website', timed(lambda: generator.generate_website(output_dir), repeat, setup=clean), {}),
+                ('generate_website.incremental_unchanged',
+                 timed(lambda: generator.generate_website(output_dir, incremental=True), repeat), {}),
+            ]
+        for name, result, extra in rows:
+            results.append(record(f'generator.{name}', params, result, **extra))
+        shutil.rmtree(output_dir, ignore_errors=True)
+        print(f"  generator: {size} gifts done", file=sys.stderr)
+    return results
+
+
+# ----------------------------------------------------------------------
+# Backend (each store size in its own process: backend opens its log on import)
+# ----------------------------------------------------------------------
+
+def selection_payload(employee, gift_id='1'):
+    return {
+        'giftId': gift_id,
+        'giftName': 'מתנה לבדיקה',
+        'giftPrice': '₪100.00',
+        'employeeId': employee,
+        'selectionTime': '2024-12-15T10:00:00.000Z'
+    }
+
+
+def load_backend(workdir, selections):
+    """Import backend inside workdir with a log of `selections` selections, returns (module, ms to load)"""
+    os.chdir(workdir)
+    write_log('gift_selections_backend.log', generate_selections(selections, update_ratio=0))
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        import backend
+    return backend, (time.perf_counter() - started) * 1000
+
+
+def backend_worker(workdir, selections, repeat, requests):
+    backend, load_ms = load_backend(workdir, selections)
+    client = backend.app.test_client()
+    params = {'selections': selections}
+    results = [record('backend.startup', params, {'unit': 'ms', 'ops': 1, 'runs': 1,
+                                                  'min': round(load_ms, 4), 'median': round(load_ms, 4),
+                                                  'mean': round(load_ms, 4)})]
+
+    def get(url):
+        response = client.get(url)
+        assert response.status_code == 200, (url, response.status_code)
+        return response
+
+    def post_selections(prefix):
+        for n in range(requests):
+            # Half new employees, half updates of existing ones
+            employee = f'{prefix}{n:06d}' if n % 2 else f'EMP{n * 7 % selections:06d}'
+            response = client.post('/api/select-gift', json=selection_payload(employee, str(n % 5 + 1)))
+            assert response.status_code == 200, response.status_code
+
+    runs = iter(range(repeat))
+    with contextlib.redirect_stdout(io.StringIO()):
+        results.append(record('backend.select_gift', params,
+                              timed(lambda: post_selections(f'NEW{next(runs)}_'), repeat, ops=requests)))
+        for name, url in (('get_selections', '/api/selections'),
+                          ('get_selections.page', '/api/selections?limit=100'),
+                          ('get_selections.ndjson', '/api/selections?stream=ndjson'),
+                          ('get_selection', f'/api/selections/EMP{selections // 2:06d}'),
+                          ('get_aggregate', f'/api/aggregate?fields={ADMIN_AGGREGATE_FIELDS}'),
+                          ('get_aggregate.all', '/api/aggregate')):
+            results.append(record(f'backend.{name}', params, timed(lambda: get(url).get_data(), repeat),
+                                  bytes=len(get(url).get_data())))
+    return results
+
+
+def concurrency_worker(workdir, selections, threads, requests):
+    backend, _ = load_backend(workdir, selections)
+    client = backend.app.test_client()
+
+    def vote(employee):
+        started = time.perf_counter()
+        response = client.post('/api/select-gift', json=selection_payload(employee, employee[-1]))
+        return response.status_code, (time.perf_counter() - started) * 1000
+
+    results = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for thread_count in threads:
+            before = backend.store.count()
+            employees = [f'T{thread_count}_{n:06d}' for n in range(requests)]
+            started = time.perf_counter()
+            with ThreadPoolExecutor(thread_count) as pool:
+                outcomes = list(pool.map(vote, employees))
+            elapsed = time.perf_counter() - started
+            latencies = sorted(ms for _, ms in outcomes)
+            failed = sum(status != 200 for status, _ in outcomes)
+            lost = before + len(employees) - backend.store.count() - failed
+            results.append(record('concurrency.select_gift', {'selections': selections, 'threads': thread_count}, {
+                'unit': 'ms',
+                'ops': requests,
+                'runs': 1,
+                'min': round(latencies[0], 4),
+                'median': round(percentile(latencies, 0.5), 4),
+                'mean': round(statistics.mean(latencies), 4),
+            }, p99=round(percentile(latencies, 0.99), 4), throughput_per_s=round(requests / elapsed, 1),
+                failed=failed, lost=lost))
+    return results
+
+
+def in_subprocess(target, *args):
+    """Run target(workdir, *args) in a fresh process with its own working directory"""
+    ctx = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory(prefix='gift-bench-') as workdir:
+        with ctx.Pool(1) as pool:
+            return pool.apply(target, (workdir,) + args)
+
+
+# ----------------------------------------------------------------------
+# Reporting
+# ----------------------------------------------------------------------
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=PROJECT_ROOT,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        commit, dirty = None, None
+    return {
+        'commit': commit,
+        'dirty': dirty,
+        'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def record_key(result):
+    return result['name'] + ' ' + ' '.join(f'{key}={value}' for key, value in sorted(result['params'].items()))
+
+
+def print_results(results):
+    print(f"{'benchmark':<58} {'median ms':>11} {'min ms':>11}  notes")
+    for result in results:
+        notes = ', '.join(f'{key} {result[key]}' for key in ('bytes', 'p99', 'throughput_per_s', 'lost')
+                          if key in result)
+        print(f"{record_key(result):<58} {result['median']:>11.3f} {result['min']:>11.3f}  {notes}")
+
+
+def compare(results, baseline, threshold, metric='min'):
+    """Print changes of a metric against a baseline run, returns the number of regressions"""
+    previous = {record_key(result): result for result in baseline['results']}
+    regressions = 0
+    print(f"\n📊 {metric} compared with {baseline['environment'].get('commit')} (threshold {threshold:.0%})")
+    for result in results:
+        before = previous.get(record_key(result))
+        if not before or not before[metric]:
+            continue
+        change = result[metric] / before[metric] - 1
+        flag = ''
+        if change > threshold:
+            flag = '❌ slower'
+            regressions += 1
+        elif change < -threshold:
+            flag = '✅ faster'
+        print(f"{record_key(result):<58} {before[metric]:>11.3f} → {result[metric]:>11.3f} {change:>+8.1%} {flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the generator and backend hot paths')
+    parser.add_argument('--suite', choices=SUITES, action='append', help='Suites to run (default: all)')
+    parser.add_argument('--sizes', type=int, nargs='+', help='Catalog sizes for the generator suite')
+    parser.add_argument('--selections', type=int, nargs='+', help='Existing selections for the backend suite')
+    parser.add_argument('--threads', type=int, nargs='+', help='Concurrent voters for the concurrency suite')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs of each benchmark')
+    parser.add_argument('--requests', type=int, default=200, help='select_gift requests per timed run')
+    parser.add_argument('--votes', type=int, default=2000, help='Selections posted per concurrency run')
+    parser.add_argument('--quick', action='store_true', help='Small sizes and 3 runs, for a fast check')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    parser.add_argument('--compare', metavar='BASELINE', help='Compare medians with an earlier --output file')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Relative change reported as a regression (exit status 1)')
+    parser.add_argument('--metric', choices=['min', 'median', 'mean'], default='min',
+                        help='Statistic compared with --compare (min is the least noisy)')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    suites = args.suite or SUITES
+    repeat = 3 if args.quick and args.repeat == parser.get_default('repeat') else args.repeat
+    sizes = args.sizes or (QUICK_SIZES if args.quick else DEFAULT_SIZES)
+    selections = args.selections or (QUICK_SELECTIONS if args.quick else DEFAULT_SELECTIONS)
+    threads = args.threads or (QUICK_THREADS if args.quick else DEFAULT_THREADS)
+
+    results = []
+    started = time.perf_counter()
+    if 'generator' in suites:
+        with tempfile.TemporaryDirectory(prefix='gift-bench-') as workdir:
+            results += generator_benchmarks(sizes, repeat, workdir)
+    if 'backend' in suites:
+        for count in selections:
+            results += in_subprocess(backend_worker, count, repeat, args.requests)
+            print(f"  backend: {count} selections done", file=sys.stderr)
+    if 'concurrency' in suites:
+        results += in_subprocess(concurrency_worker, min(selections), threads, args.votes)
+        print("  concurrency done", file=sys.stderr)
+
+    report = {'environment': environment(), 'seconds': round(time.perf_counter() - started, 1), 'results': results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=1)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_results(results)
+
+    regressions = 0
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.threshold, args.metric)
+    if any(result.get('lost') for result in results):
+        print("❌ Selections were lost under concurrent voting")
+        sys.exit(1)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark for /api/aggregate/stream fan-out
+Opens hundreds of concurrent dashboard streams, fires selections and measures how long each
+delta takes to reach every dashboard.
+
+Usage:
+    python3 benchmarks/sse_dashboards.py                               # in-process threaded server
+    python3 benchmarks/sse_dashboards.py --url http://localhost:5000   # against gunicorn (gthread)
+"""
+
+import argparse
+import contextlib
+import http.client
+import io
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start_local_server():
+    """Run backend.py in a threaded WSGI server on a free port, storing data in a temp dir"""
+    os.chdir(tempfile.mkdtemp(prefix='gift-sse-'))
+    sys.path.insert(0, PROJECT_ROOT)
+    from werkzeug.serving import make_server
+    with contextlib.redirect_stdout(io.StringIO()):
+        import backend
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, backend.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def dashboard(url, sent_at, received, ready, expected):
+    """One admin dashboard: read events until every expected selection has arrived"""
+    parsed = urllib.parse.urlparse(url)
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=120)
+    conn.request('GET', '/api/aggregate/stream')
+    response = conn.getresponse()
+    latencies = []
+    event = None
+    while len(latencies) < expected:
+        line = response.fp.readline().decode('utf-8').rstrip('\n')
+        if not line and response.fp.closed:
+            break
+        if line.startswith('event: '):
+            event = line[7:]
+        elif line.startswith('data: '):
+            data = json.loads(line[6:])
+            if event == 'snapshot':
+                ready.release()
+            elif event == 'selection' and data['employeeId'] in sent_at:
+                latencies.append(time.perf_counter() - sent_at[data['employeeId']])
+    conn.close()
+    received.append(latencies)
+
+
+def post_selection(url, employee_id):
+    request = urllib.request.Request(
+        f"{url}/api/select-gift",
+        data=json.dumps({'giftId': '1', 'giftName': 'מתנה', 'giftPrice': '₪100.00', 'employeeId': employee_id}).encode('utf-8'),
+        headers={'Content-Type': 'application/json'},
+        method='POST'
+    )
+    urllib.request.urlopen(request, timeout=30).read()
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dashboards', type=int, default=300, help='concurrent stream connections')
+    parser.add_argument('--selections', type=int, default=20, help='selections posted while streaming')
+    parser.add_argument('--interval', type=float, default=0.05, help='seconds between selections')
+    parser.add_argument('--url', help='backend base URL; omit to start an in-process server')
+    args = parser.parse_args()
+
+    url = args.url or start_local_server()
+    run_id = f"sse_{int(time.time())}"
+    employee_ids = [f"{run_id}_{n}" for n in range(args.selections)]
+    sent_at = {}
+    received = []
+    ready = threading.Semaphore(0)
+
+    print(f"📡 Opening {args.dashboards} dashboard streams on {url}")
+    threads = [
+        threading.Thread(target=dashboard, args=(url, sent_at, received, ready, args.selections), daemon=True)
+        for _ in range(args.dashboards)
+    ]
+    for thread in threads:
+        thread.start()
+    for _ in threads:
+        ready.acquire()
+
+    print(f"🗳️  Posting {args.selections} selections")
+    for employee_id in employee_ids:
+        sent_at[employee_id] = time.perf_counter()
+        post_selection(url, employee_id)
+        time.sleep(args.interval)
+
+    for thread in threads:
+        thread.join(timeout=60)
+
+    latencies = [latency for dashboard_latencies in received for latency in dashboard_latencies]
+    complete = sum(1 for dashboard_latencies in received if len(dashboard_latencies) == args.selections)
+    print(f"✅ {complete}/{args.dashboards} dashboards received all {args.selections} deltas")
+    if latencies:
+        print(f"⏱️  delivery latency p50 {statistics.median(latencies) * 1000:.1f} ms, "
+              f"p99 {percentile(latencies, 0.99) * 1000:.1f} ms, max {max(latencies) * 1000:.1f} ms")
+    sys.exit(0 if complete == args.dashboards else 1)
+
+
+if __name__ == '__main__':
+    main()
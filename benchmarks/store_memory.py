@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for the selection store
+Writes a log of realistic selections (Hebrew gift names from the catalog, JS timestamps,
+server ids, and a share of bulk imports without selectionTime), loads it into LogSelectionStore
+and reports the memory held per selection and the time store.all() and the full store.aggregate()
+take: the first call, which builds every row, and calls after a new vote, which reuse what was
+built. Also checks that the store returns exactly the selections that were written.
+
+Usage:
+    python3 benchmarks/store_memory.py                  # 100k selections
+    python3 benchmarks/store_memory.py --selections 500000
+"""
+
+import argparse
+import csv
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from selection_store import LogSelectionStore  # noqa: E402
+
+
+def catalog_gifts():
+    with open(os.path.join(PROJECT_ROOT, 'gifts-catalog.csv'), encoding='utf-8') as f:
+        return [(row['gift_id'], row['gift_name'], row['price']) for row in csv.DictReader(f)]
+
+
+def generate_selections(count, update_ratio=0.1, untimed_ratio=0.25):
+    """Selections as backend.build_selection creates them; a share of employees vote twice and a
+    share come from bulk imports (no selectionTime, row number in the id)"""
+    gifts = catalog_gifts()
+    started = datetime(2024, 12, 15, 10, 0, 0)
+    votes = count + int(count * update_ratio)
+    for n in range(votes):
+        employee = n if n < count else (n - count) * 7 % count
+        gift_id, gift_name, price = gifts[(n * 31 + employee) % len(gifts)]
+        received_at = started + timedelta(microseconds=n * 3217)
+        selection = {'giftId': gift_id, 'giftName': gift_name, 'giftPrice': price, 'employeeId': f'EMP{employee:06d}'}
+        bulk = n % 100 < untimed_ratio * 100
+        if not bulk:
+            selection['selectionTime'] = (received_at - timedelta(milliseconds=250)).strftime(
+                '%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+        selection['receivedAt'] = received_at.isoformat()
+        selection['id'] = f"selection_{received_at.strftime('%Y%m%d_%H%M%S_%f')}" + (f"_{n % 500}" if bulk else '')
+        yield selection
+
+
+def write_log(log_file, selections):
+    with open(log_file, 'w', encoding='utf-8') as f:
+        for version, selection in enumerate(selections, 1):
+            entry = {'op': 'put', 'selection': selection, 'version': version, 'ts': time.time()}
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure selection store memory per selection')
+    parser.add_argument('--selections', type=int, default=100000, help='Number of employees with a selection')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        log_file = os.path.join(workdir, 'selections.log')
+        write_log(log_file, generate_selections(args.selections))
+        expected = {}
+        for selection in generate_selections(args.selections):
+            expected.setdefault(selection['employeeId'], {}).clear()
+            expected[selection['employeeId']].update(selection)
+
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        store = LogSelectionStore(log_file, compact_min_records=10 ** 9)
+        load_seconds = time.perf_counter() - started
+        gc.collect()
+        index_bytes = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+
+        started = time.perf_counter()
+        selections = store.all()
+        first_all_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        store.aggregate()
+        first_aggregate_ms = (time.perf_counter() - started) * 1000
+        assert json.dumps(selections, ensure_ascii=False) == json.dumps(list(expected.values()), ensure_ascii=False), \
+            'store output differs from the selections written'
+
+        vote = next(generate_selections(1))
+        store.upsert(vote)
+        gc.collect()
+        started = time.perf_counter()
+        selections = store.all()
+        next_all_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        aggregate = store.aggregate()
+        next_aggregate_ms = (time.perf_counter() - started) * 1000
+        assert aggregate['employeeSelections'][vote['employeeId']]['giftId'] == vote['giftId'] and \
+            vote['employeeId'] in aggregate['giftCounts'][vote['giftId']]['employees'], 'aggregate misses the vote'
+        assert selections[0] == vote and selections[1:] == list(expected.values())[1:], \
+            'store output differs after a vote'
+        store.close()
+
+    print(f"🧮 {args.selections} selections loaded in {load_seconds:.2f}s")
+    print(f"💾 {index_bytes / 1024 / 1024:.1f} MiB held, {index_bytes / args.selections:.0f} bytes per selection "
+          f"({index_bytes / args.selections * 100000 / 1024 / 1024:.1f} MiB per 100k)")
+    print(f"📋 store.all(): {first_all_ms:.1f} ms the first time, {next_all_ms:.1f} ms after a new vote")
+    print(f"📊 store.aggregate(): {first_aggregate_ms:.1f} ms the first time, {next_aggregate_ms:.1f} ms after a new vote")
+    print("✅ Output identical to the written selections")
+
+
+if __name__ == '__main__':
+    main()
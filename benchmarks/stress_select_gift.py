@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Stress test for concurrent gift selections across several worker processes
+Fires thousands of parallel POSTs to /api/select-gift and checks that no selection is lost.
+
+Usage:
+    python3 benchmarks/stress_select_gift.py                      # in-process workers sharing one log
+    python3 benchmarks/stress_select_gift.py --url http://localhost:5000   # against gunicorn
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GIFT_IDS = ['1', '2', '3', '4', '5']
+
+
+def selection_payload(worker, n):
+    """Build a selection; every employee votes twice, from two different workers"""
+    employee = n // 2
+    return {
+        'giftId': GIFT_IDS[(worker + n) % len(GIFT_IDS)],
+        'giftName': f'מתנה {worker}',
+        'giftPrice': '₪100.00',
+        'employeeId': f'emp_{employee:06d}',
+        'selectionTime': '2024-01-01T00:00:00.000Z'
+    }
+
+
+def worker_requests(worker, workers, total):
+    """Requests handled by one worker: interleaved so every employee is hit by two workers"""
+    return [selection_payload(worker, n) for n in range(worker, total, workers)]
+
+
+def post_http(url, payload):
+    request = urllib.request.Request(
+        f"{url}/api/select-gift",
+        data=json.dumps(payload).encode('utf-8'),
+        headers={'Content-Type': 'application/json'},
+        method='POST'
+    )
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return response.status
+
+
+def run_worker(worker, workers, total, threads, workdir, url):
+    """Worker process: post this worker's share of selections from a thread pool"""
+    payloads = worker_requests(worker, workers, total)
+
+    if url:
+        post = lambda payload: post_http(url, payload)
+    else:
+        os.chdir(workdir)
+        sys.path.insert(0, PROJECT_ROOT)
+        with contextlib.redirect_stdout(io.StringIO()):
+            import backend
+        client = backend.app.test_client()
+        post = lambda payload: client.post('/api/select-gift', json=payload).status_code
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            statuses = list(pool.map(post, payloads))
+    return sum(1 for status in statuses if status != 200)
+
+
+def fetch_selections(url, workdir):
+    if url:
+        with urllib.request.urlopen(f"{url}/api/selections", timeout=60) as response:
+            return json.load(response)['selections']
+    sys.path.insert(0, PROJECT_ROOT)
+    from selection_store import LogSelectionStore
+    store = LogSelectionStore(os.path.join(workdir, 'gift_selections_backend.log'))
+    try:
+        return store.all()
+    finally:
+        store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--processes', type=int, default=4, help='worker processes firing requests')
+    parser.add_argument('--threads', type=int, default=8, help='concurrent requests per process')
+    parser.add_argument('--requests', type=int, default=4000, help='total POSTs (two per employee)')
+    parser.add_argument('--url', help='backend base URL; omit to run the Flask app inside each process')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='gift-stress-')
+    if args.url:
+        urllib.request.urlopen(urllib.request.Request(f"{args.url}/api/reset-selections", method='POST'))
+
+    print(f"🔥 {args.requests} selections from {args.processes} processes x {args.threads} threads")
+    started = time.perf_counter()
+    ctx = multiprocessing.get_context('spawn')
+    with ctx.Pool(args.processes) as pool:
+        failures = sum(pool.starmap(run_worker, [
+            (worker, args.processes, args.requests, args.threads, workdir, args.url)
+            for worker in range(args.processes)
+        ]))
+    elapsed = time.perf_counter() - started
+
+    selections = fetch_selections(args.url, workdir)
+    expected = {payload['employeeId'] for payload in worker_requests(0, 1, args.requests)}
+    stored = {selection['employeeId'] for selection in selections}
+    duplicates = len(selections) - len(stored)
+    missing = expected - stored
+
+    print(f"⏱️  {elapsed:.2f}s, {args.requests / elapsed:.0f} selections/s, {failures} failed requests")
+    print(f"📊 expected {len(expected)} employees, stored {len(stored)}, duplicates {duplicates}")
+    if failures or missing or duplicates:
+        print(f"❌ Lost selections: {sorted(missing)[:10]}{'...' if len(missing) > 10 else ''}")
+        sys.exit(1)
+    print("✅ No selection lost")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Synthetic gift catalog for generator benchmarks
+Writes a gifts-catalog.csv-shaped file with any number of rows, cycling through the real
+catalog's Hebrew names, descriptions and photos.
+
+Usage:
+    python3 benchmarks/synthetic_catalog.py --gifts 10000 --output /tmp/catalog.csv
+"""
+
+import argparse
+import csv
+import os
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COLUMNS = ['gift_id', 'gift_name', 'gift_subtitle', 'description', 'price', 'availability',
+           'seller_link', 'photo1', 'photo2', 'photo3', 'photo4']
+
+
+def template_rows():
+    with open(os.path.join(PROJECT_ROOT, 'gifts-catalog.csv'), encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def catalog_rows(count, templates=None):
+    """Yield count catalog rows with unique ids, names and prices"""
+    templates = templates or template_rows()
+    for n in range(count):
+        row = dict(templates[n % len(templates)])
+        row['gift_id'] = str(n + 1)
+        row['gift_name'] = f"{row['gift_name']} {n + 1}"
+        row['price'] = f"₪{100 + (n * 37) % 900}.00"
+        if n % 11 == 0:
+            row['availability'] = 'לא במלאי'
+        yield row
+
+
+def write_catalog(path, count):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(catalog_rows(count))
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write a synthetic gift catalog CSV')
+    parser.add_argument('--gifts', type=int, default=10000, help='Number of catalog rows')
+    parser.add_argument('--output', default='synthetic-catalog.csv', help='CSV file to write')
+    args = parser.parse_args()
+    write_catalog(args.output, args.gifts)
+    print(f"📝 Wrote {args.gifts} gifts to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
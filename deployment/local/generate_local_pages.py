@@ -1,58 +1,35 @@
 #!/usr/bin/env python3
 """
-Generate local versions of gift pages with correct backend URL
+Generate the local development website with the backend URL built in
+Every page in gift_website/ calls the API on http://localhost:5000; the API base is a build option
+of the generator, so this is the same as
+    python3 generate_gift_website.py --output-dir gift_website --api-base http://localhost:5000
 """
 
+import argparse
 import os
-import re
-import json
+import sys
 
-def update_gift_page_for_local(file_path):
-    """Update a gift page to use localhost:5000 for API calls"""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # Replace relative API URLs with localhost:5000
-    content = re.sub(
-        r"fetch\('/api/",
-        "fetch('http://localhost:5000/api/",
-        content
-    )
-    
-    # Fix giftName strings that might have escaping issues
-    # Look for patterns like giftName: 'string with apostrophes'
-    content = re.sub(
-        r"giftName:\s*'([^']*(?:'[^']*)*)'",
-        lambda m: f"giftName: {json.dumps(m.group(1))}",
-        content
-    )
-    
-    # Write back to file
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(content)
-    
-    print(f"✅ Updated {file_path} for local development")
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, PROJECT_ROOT)
+
+from generate_gift_website import GiftWebsiteGenerator  # noqa: E402
+
+LOCAL_OUTPUT_DIR = 'gift_website'
+LOCAL_API_BASE = 'http://localhost:5000'
 
 def main():
-    """Generate local versions of all gift pages"""
-    print("🔧 Generating local versions of gift pages...")
-    
-    gift_files = [
-        'gift_website/gift_1.html',
-        'gift_website/gift_2.html', 
-        'gift_website/gift_3.html',
-        'gift_website/gift_4.html',
-        'gift_website/gift_5.html',
-        'gift_website/admin.html'
-    ]
-    
-    for file_path in gift_files:
-        if os.path.exists(file_path):
-            update_gift_page_for_local(file_path)
-        else:
-            print(f"⚠️  File not found: {file_path}")
-    
+    """Generate the local versions of all pages"""
+    parser = argparse.ArgumentParser(description='Generate the website for local development')
+    parser.add_argument('--csv', default='gifts-catalog.csv', help='Catalog CSV file')
+    parser.add_argument('--output-dir', default=LOCAL_OUTPUT_DIR, help='Directory to write the website to')
+    parser.add_argument('--api-base', default=LOCAL_API_BASE, help='Backend URL the pages call the API on')
+    args = parser.parse_args()
+
+    print("🔧 Generating local development pages...")
+    generator = GiftWebsiteGenerator(args.csv, api_base=args.api_base)
+    generator.generate_website(args.output_dir)
     print("🎉 Local development pages ready!")
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    main()
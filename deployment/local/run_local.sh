@@ -21,24 +21,28 @@ source venv/bin/activate
 echo "📥 Installing dependencies..."
 pip install -r requirements.txt
 
-# Generate website
+# Generate the website and its local development copy (API on localhost:5000) in one pass
 echo "🌐 Generating website..."
-python3 generate_gift_website.py
-
-# Generate local development pages
-echo "🔧 Generating local development pages..."
-python3 deployment/local/generate_local_pages.py
+python3 generate_gift_website.py --target gift_website=http://localhost:5000
 
 # Start backend server
 echo "🚀 Starting backend server on http://localhost:5000"
 echo "📊 Admin dashboard: http://localhost:8000/admin.html"
+echo "📈 Metrics: http://localhost:5000/api/metrics"
 echo "🌍 Main website: http://localhost:8000"
 echo ""
 echo "Press Ctrl+C to stop both servers"
 echo ""
 
-# Start backend in background
-python3 backend.py &
+# Start backend in background (BACKEND_SERVER=asgi runs the async variant under uvicorn),
+# with metrics counted from zero
+rm -rf backend-metrics
+if [ "${BACKEND_SERVER:-flask}" = "asgi" ]; then
+    echo "⚡ Using ASGI backend (uvicorn asgi_backend:app)"
+    uvicorn asgi_backend:app --host 0.0.0.0 --port 5000 &
+else
+    python3 backend.py &
+fi
 BACKEND_PID=$!
 
 # Wait a moment for backend to start
@@ -108,7 +108,17 @@ ssh -i ssh/gift-website-key -o StrictHostKeyChecking=no ubuntu@$PUBLIC_IP "sudo
 # Upload necessary files
 scp -i ssh/gift-website-key -o StrictHostKeyChecking=no \
     ../../backend.py \
+    ../../asgi_backend.py \
+    ../../group_commit.py \
+    ../../idempotency.py \
+    ../../gift_catalog.py \
+    ../../metrics.py \
+    ../../profiling.py \
+    ../../selection_store.py \
+    ../../selection_table.py \
     ../../generate_gift_website.py \
+    ../../image_pipeline.py \
+    ../../search_index.py \
     ../../gifts-catalog.csv \
     ../../requirements.txt \
     ../../cover.html \
@@ -123,7 +133,7 @@ ssh -i ssh/gift-website-key -o StrictHostKeyChecking=no ubuntu@$PUBLIC_IP << 'EO
 cd /var/www/gift-website
 source venv/bin/activate
 pip install -r requirements.txt
-python3 generate_gift_website.py
+python3 generate_gift_website.py --shared-assets --precompress
 sudo systemctl start gift-website.service
 sudo systemctl restart nginx
 EOF
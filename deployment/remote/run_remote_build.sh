@@ -34,7 +34,7 @@ python3 generate_gift_website.py
 
 # Verify no localhost references in generated files
 echo "🔍 Verifying no localhost references in generated files..."
-if grep -r -E "localhost:|127\.0\.0\.1" gift_website/*.html; then
+if grep -E "localhost:|127\.0\.0\.1" ./*.html; then
     echo "❌ ERROR: Localhost references found in HTML files! Aborting deployment."
     echo "   This indicates the files were generated for local development, not production."
     exit 1
@@ -17,7 +17,7 @@ python3 -m venv venv
 source venv/bin/activate
 
 # Install Python dependencies
-pip install flask gunicorn
+pip install flask gunicorn uvicorn brotli
 
 # Create nginx configuration
 cat > /etc/nginx/sites-available/gift-website << 'EOF'
@@ -27,9 +27,34 @@ server {
     root /var/www/gift-website;
     index cover.html;
 
-    # Handle static files
+    # Serve the generator's precompressed .gz siblings instead of compressing on every request
+    # (.br siblings are used too where nginx has the ngx_brotli module: brotli_static on;)
+    gzip_static on;
+    gzip on;
+    gzip_vary on;
+    gzip_types text/css application/javascript application/json;
+
+    # Handle static files; pages are revalidated so a rebuild shows up immediately
     location / {
         try_files $uri $uri/ =404;
+        add_header Cache-Control "no-cache";
+        add_header X-Frame-Options "SAMEORIGIN" always;
+        add_header X-XSS-Protection "1; mode=block" always;
+        add_header X-Content-Type-Options "nosniff" always;
+    }
+
+    # Content-hashed CSS/JS and image variants never change under the same name
+    location ~ ^/(assets|images)/ {
+        try_files $uri =404;
+        add_header Cache-Control "public, max-age=31536000, immutable";
+        add_header X-Content-Type-Options "nosniff" always;
+    }
+
+    # Prometheus metrics are for scrapers on the instance only (or scrape 127.0.0.1:5000 directly)
+    location = /api/metrics {
+        allow 127.0.0.1;
+        deny all;
+        proxy_pass http://127.0.0.1:5000;
     }
 
     # Proxy API requests to backend
@@ -69,7 +94,14 @@ After=network.target
 User=www-data
 WorkingDirectory=/var/www/gift-website
 Environment=PATH=/var/www/gift-website/venv/bin
-ExecStart=/var/www/gift-website/venv/bin/gunicorn --workers 3 --bind 127.0.0.1:5000 backend:app
+# gthread workers keep long-lived /api/aggregate/stream connections from pinning a whole worker.
+# For the async variant set WORKER_CLASS=uvicorn.workers.UvicornWorker and BACKEND_APP=asgi_backend:app
+Environment=WORKER_CLASS=gthread
+Environment=BACKEND_APP=backend:app
+# Workers share metrics through snapshot files; start every run of the service from zero
+Environment=METRICS_DIR=/var/www/gift-website/backend-metrics
+ExecStartPre=/bin/rm -rf /var/www/gift-website/backend-metrics
+ExecStart=/var/www/gift-website/venv/bin/gunicorn --workers 3 --worker-class ${WORKER_CLASS} --threads 100 --bind 127.0.0.1:5000 ${BACKEND_APP}
 Restart=always
 RestartSec=5
 
@@ -109,7 +141,7 @@ source venv/bin/activate
 pip install -r requirements.txt
 
 # Regenerate website
-python3 generate_gift_website.py
+python3 generate_gift_website.py --shared-assets --precompress
 
 # Restart services
 systemctl restart gift-website.service
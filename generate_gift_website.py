@@ -4,119 +4,103 @@ Gift Catalog Website Generator with User Authentication and Selection Tracking
 Creates a complete HTML website from a CSV catalog file with login system
 """
 
+import argparse
+import copy
 import csv
+import gzip
+import hashlib
+import inspect
 import os
 import json
+import re
+import shutil
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
+from functools import partial
 
-class GiftWebsiteGenerator:
-    def __init__(self, csv_file):
-        self.csv_file = csv_file
-        self.gifts = []
-        self.load_gifts()
-    
-    def load_gifts(self):
-        """Load gifts from CSV file"""
-        try:
-            with open(self.csv_file, 'r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    # Clean up empty photo fields
-                    photos = []
-                    for i in range(1, 5):  # photo1 to photo4
-                        photo_key = f'photo{i}'
-                        if photo_key in row and row[photo_key] and row[photo_key].strip():
-                            photos.append(row[photo_key].strip())
-                    
-                    gift = {
-                        'id': row['gift_id'],
-                        'name': row['gift_name'],
-                        'subtitle': row['gift_subtitle'],
-                        'description': row['description'],
-                        'price': row['price'],
-                        'availability': row['availability'],
-                        'seller_link': row['seller_link'],
-                        'photos': photos
-                    }
-                    self.gifts.append(gift)
-            print(f"Loaded {len(self.gifts)} gifts from {self.csv_file}")
-        except Exception as e:
-            print(f"Error loading CSV file: {e}")
-            raise
+from image_pipeline import IMAGES_DIR, DirectoryFetcher, ImagePipeline
+from search_index import SearchIndexBuilder
 
-    def generate_website(self, output_dir="."):
-        """Generate the complete website"""
-        os.makedirs(output_dir, exist_ok=True)
-        
-        # Copy cover page to output directory
-        self.copy_cover_page(output_dir)
-        # Copy admin page to output directory
-        self.copy_admin_page(output_dir)
-        
-        # Generate catalog page
-        catalog_html = self.generate_catalog_page()
-        with open(os.path.join(output_dir, "index.html"), 'w', encoding='utf-8') as f:
-            f.write(catalog_html)
-        
-        # Generate individual gift pages
-        for gift in self.gifts:
-            gift_html = self.generate_gift_page(gift)
-            filename = f"gift_{gift['id']}.html"
-            with open(os.path.join(output_dir, filename), 'w', encoding='utf-8') as f:
-                f.write(gift_html)
-        
-        # Generate selection tracking page
-        selection_html = self.generate_selection_page()
-        with open(os.path.join(output_dir, "selection.html"), 'w', encoding='utf-8') as f:
-            f.write(selection_html)
-        
-        print(f"Website generated successfully in '{output_dir}' directory!")
-        print("Generated files:")
-        print("  - cover.html (employee ID entry)")
-        print("  - admin.html (admin dashboard)")
-        print("  - index.html (catalog page)")
-        for gift in self.gifts:
-            print(f"  - gift_{gift['id']}.html ({gift['name']})")
-        print("  - selection.html (gift selection tracking)")
-        print("\nStart with 'cover.html' to access the website.")
-        print("Admin dashboard available at 'admin.html'")
+try:
+    import brotli
+except ImportError:  # optional: precompressed builds then only write .gz files
+    brotli = None
 
-    def copy_cover_page(self, output_dir):
-        """Copy the cover page to the output directory"""
-        cover_source = "cover.html"
-        cover_dest = os.path.join(output_dir, "cover.html")
-        
-        if os.path.exists(cover_source):
-            with open(cover_source, 'r', encoding='utf-8') as src:
-                content = src.read()
-            with open(cover_dest, 'w', encoding='utf-8') as dst:
-                dst.write(content)
-        else:
-            print(f"Warning: {cover_source} not found. Please create it manually.")
+# Content hashes of the inputs of every generated page, used by incremental builds
+MANIFEST_FILE = ".build-manifest.json"
 
-    def copy_admin_page(self, output_dir):
-        """Copy the admin page to the output directory"""
-        admin_source = "admin.html"
-        admin_dest = os.path.join(output_dir, "admin.html")
-        
-        if os.path.exists(admin_source):
-            with open(admin_source, 'r', encoding='utf-8') as src:
-                content = src.read()
-            with open(admin_dest, 'w', encoding='utf-8') as dst:
-                dst.write(content)
-        else:
-            print(f"Warning: {admin_source} not found. Please create it manually.")
+# Catalog CSV columns every file must have, and the ones no row may leave empty
+REQUIRED_COLUMNS = ['gift_id', 'gift_name', 'gift_subtitle', 'description', 'price', 'availability', 'seller_link']
+REQUIRED_VALUES = ['gift_id', 'gift_name', 'price']
+# Bad rows printed and kept in load_errors; the rest are only counted
+MAX_REPORTED_ERRORS = 50
 
-    def generate_catalog_page(self):
-        """Generate the main catalog page HTML with employee ID check"""
-        html = """<!DOCTYPE html>
+# Stale gift pages handed to the page writers at a time (bounds memory in streaming builds)
+GIFT_PAGE_BATCH = 2000
+
+def parse_price(value):
+    """Amount of a catalog price such as '₪190.00' or '1,299.90 ₪', or None"""
+    try:
+        amount = float(value.replace('₪', '').replace(',', '').strip())
+    except ValueError:
+        return None
+    return amount if math.isfinite(amount) and amount >= 0 else None
+
+def content_hash(*parts):
+    """Short stable hash of strings, bytes or JSON-serializable values"""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode('utf-8')
+        elif not isinstance(part, bytes):
+            part = json.dumps(part, sort_keys=True, ensure_ascii=False).encode('utf-8')
+        digest.update(part)
+        digest.update(b'\0')
+    return digest.hexdigest()[:16]
+
+# Backend URL prefix of the API calls in the pages: '' keeps them same-origin ('/api/...'), local
+# development points them at the backend, e.g. 'http://localhost:5000'
+API_BASE_PATTERN = re.compile(r"(https?://[^\s'\"<>\\]+|/[^\s'\"<>\\]*)?")
+
+def check_api_base(api_base):
+    """Return an API base URL without its trailing slash, raises ValueError if it is not one"""
+    api_base = (api_base or "").rstrip('/')
+    if not API_BASE_PATTERN.fullmatch(api_base):
+        raise ValueError(f"Invalid API base URL: {api_base!r} (expected e.g. http://localhost:5000)")
+    return api_base
+
+# ----------------------------------------------------------------------
+# Page templates: constant chunks, f-string cards and str.format page templates
+# ----------------------------------------------------------------------
+
+DEFAULT_PREVIEW_IMAGE = "https://images.unsplash.com/photo-1513475382585-d06e58bcb0e0?w=400&h=200&fit=crop"
+
+PAGE_END = "</body>\n</html>"
+
+def inline_style(css):
+    return "    <style>\n" + css + "    </style>\n"
+
+def inline_script(js):
+    return "    <script>\n" + js + "    </script>\n"
+
+def linked_style(href):
+    return f'    <link rel="stylesheet" href="{href}">\n'
+
+def linked_script(href):
+    return f'    <script src="{href}"></script>\n'
+
+CATALOG_PAGE_TOP = """<!DOCTYPE html>
 <html lang="he" dir="rtl">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>קטלוג מתנות חג - בחירת מתנות לעובדים</title>
-    <style>
-        * { margin: 0; padding: 0; box-sizing: border-box; }
+"""
+
+CATALOG_PAGE_STYLE = """        * { margin: 0; padding: 0; box-sizing: border-box; }
         body { font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); min-height: 100vh; padding: 20px; }
         .header { text-align: center; color: white; margin-bottom: 40px; padding: 20px; }
         .header h1 { font-size: 2.5rem; margin-bottom: 10px; text-shadow: 0 2px 4px rgba(0, 0, 0, 0.3); }
@@ -152,8 +136,9 @@ class GiftWebsiteGenerator:
         .catalog-item:nth-child(1) { animation-delay: 0.1s; }
         .catalog-item:nth-child(2) { animation-delay: 0.2s; }
         .catalog-item:nth-child(3) { animation-delay: 0.3s; }
-    </style>
-</head>
+"""
+
+CATALOG_PAGE_BODY = """</head>
 <body>
     <div id="authError" class="auth-error" style="display: none;">
         <h2>🔒 נדרש מספר עובד</h2>
@@ -171,43 +156,19 @@ class GiftWebsiteGenerator:
             <h3>ברוכים הבאים!</h3>
             <p id="userDetails"></p>
             <button class="logout-btn" onclick="logout()">התנתק</button>
-        </div>
+        </div>"""
+
+CATALOG_GRID_OPEN = """
 
         <div class="catalog-grid">"""
-        
-        for gift in self.gifts:
-            # Get the first photo for the catalog preview
-            preview_image = gift['photos'][0] if gift['photos'] else "https://images.unsplash.com/photo-1513475382585-d06e58bcb0e0?w=400&h=200&fit=crop"
-            
-            # Truncate description for catalog view
-            description = gift['description'][:150] + "..." if len(gift['description']) > 150 else gift['description']
-            
-            # Determine availability class
-            availability_class = "out-of-stock" if "לא במלאי" in gift['availability'] else ""
-            
-            html += f"""
-        <div class="catalog-item" onclick="window.location.href='/gift_{gift['id']}.html'">
-            <div class="catalog-item-header">
-                <h2 class="catalog-item-title">{gift['name']}</h2>
-                <p class="catalog-item-subtitle">{gift['subtitle']}</p>
-            </div>
-            <div class="catalog-item-content">
-                <img src="{preview_image}" alt="{gift['name']}" class="catalog-item-image">
-                <p class="catalog-item-description">{description}</p>
-                <div class="catalog-item-footer">
-                    <div class="catalog-item-price">{gift['price']}</div>
-                    <div class="catalog-item-availability {availability_class}">{gift['availability']}</div>
-                </div>
-                <a href="/gift_{gift['id']}.html" class="view-details-btn">צפה בפרטים מלאים</a>
-            </div>
-        </div>"""
-        
-        html += """
+
+CATALOG_PAGE_BOTTOM = """
         </div>
     </div>
 
-    <script>
-        // Check employee ID on page load
+"""
+
+CATALOG_PAGE_SCRIPT = """        // Check employee ID on page load
         window.addEventListener('load', function() {
             checkEmployeeId();
         });
@@ -241,53 +202,280 @@ class GiftWebsiteGenerator:
                 }
             });
         });
-    </script>
-</body>
-</html>"""
-        
-        return html
+"""
 
-    def generate_gift_page(self, gift):
-        """Generate individual gift page HTML with selection tracking"""
-        
-        # Generate photo gallery HTML
-        photo_gallery_html = ""
-        if gift['photos']:
-            # Main image
-            main_image = gift['photos'][0]
-            photo_gallery_html += f"""
-                <img src="{main_image}" 
-                     alt="{gift['name']}" 
+CATALOG_PAGE_HEAD = CATALOG_PAGE_TOP + inline_style(CATALOG_PAGE_STYLE) + CATALOG_PAGE_BODY + CATALOG_GRID_OPEN
+CATALOG_PAGE_TAIL = CATALOG_PAGE_BOTTOM + inline_script(CATALOG_PAGE_SCRIPT) + PAGE_END
+
+# Paginated catalog (page_size set): index.html holds the first page, later pages are card-only
+# fragments appended by the pager when it scrolls into view
+CATALOG_PAGER_STYLE = """        .catalog-pager { grid-column: 1 / -1; text-align: center; }
+        .load-more-btn { background: rgba(255, 255, 255, 0.2); color: white; border: none; padding: 12px 30px; border-radius: 25px; cursor: pointer; font-size: 1rem; font-weight: 600; }
+        .load-more-btn:hover { background: rgba(255, 255, 255, 0.3); }
+"""
+
+CATALOG_PAGER_TEMPLATE = """
+        <div class="catalog-pager" id="catalogPager" data-pages="{page_count}">
+            <button class="load-more-btn" onclick="loadNextCatalogPage()">טען עוד מתנות</button>
+        </div>
+        <script>
+            let nextCatalogPage = 2;
+            let catalogPageLoading = false;
+            const catalogPager = document.getElementById('catalogPager');
+            const catalogPageCount = Number(catalogPager.dataset.pages);
+            const catalogPagerObserver = 'IntersectionObserver' in window ? new IntersectionObserver(entries => {{
+                if (entries[0].isIntersecting) {{
+                    loadNextCatalogPage();
+                }}
+            }}, {{ rootMargin: '600px' }}) : null;
+
+            async function loadNextCatalogPage() {{
+                if (catalogPageLoading || nextCatalogPage > catalogPageCount) {{
+                    return;
+                }}
+                catalogPageLoading = true;
+                try {{
+                    const response = await fetch(`/catalog_page_${{nextCatalogPage}}.html`);
+                    if (!response.ok) {{
+                        throw new Error(`HTTP ${{response.status}}`);
+                    }}
+                    catalogPager.insertAdjacentHTML('beforebegin', await response.text());
+                    nextCatalogPage++;
+                }} catch (error) {{
+                    console.error('Error loading catalog page:', error);
+                }} finally {{
+                    catalogPageLoading = false;
+                }}
+                if (nextCatalogPage > catalogPageCount) {{
+                    catalogPager.remove();
+                }} else if (catalogPagerObserver) {{
+                    // Re-observing reports the pager again if it is still in view after a short page
+                    catalogPagerObserver.unobserve(catalogPager);
+                    catalogPagerObserver.observe(catalogPager);
+                }}
+            }}
+
+            if (catalogPagerObserver) {{
+                catalogPagerObserver.observe(catalogPager);
+            }}
+        </script>"""
+
+# Catalog search (search_index=True): a search box and price/stock filters querying the prebuilt
+# search-index.json in the browser (see search_index.py for the index format and tokenizer)
+SEARCH_INDEX_FILE = "search-index.json"
+
+CATALOG_SEARCH_STYLE = """        .catalog-search { display: flex; flex-wrap: wrap; gap: 10px; max-width: 1200px; margin: 0 auto 10px auto; padding: 0 20px; }
+        .catalog-search input, .catalog-search select { padding: 10px 15px; border: none; border-radius: 20px; font-size: 1rem; background: rgba(255, 255, 255, 0.95); }
+        .catalog-search input[type="search"] { flex: 1 1 250px; }
+        .catalog-search input[type="number"] { width: 110px; }
+        .catalog-search label { color: white; display: flex; align-items: center; gap: 5px; }
+        .search-results { max-width: 1200px; margin: 0 auto; padding: 20px; }
+        .search-summary { color: white; margin-bottom: 10px; }
+        .search-result { display: flex; justify-content: space-between; align-items: center; gap: 10px; background: white; border-radius: 15px; padding: 12px 20px; margin-bottom: 8px; color: #333; text-decoration: none; box-shadow: 0 5px 15px rgba(0, 0, 0, 0.1); }
+        .search-result:hover { box-shadow: 0 8px 25px rgba(0, 0, 0, 0.15); }
+        .search-result-name { font-weight: 600; flex: 1; }
+"""
+
+CATALOG_SEARCH_PANEL = """
+
+        <div class="catalog-search" id="catalogSearch">
+            <input type="search" id="searchQuery" placeholder="חיפוש מתנה..." autocomplete="off">
+            <input type="number" id="searchMinPrice" placeholder="ממחיר" min="0" inputmode="numeric">
+            <input type="number" id="searchMaxPrice" placeholder="עד מחיר" min="0" inputmode="numeric">
+            <label><input type="checkbox" id="searchInStock"> במלאי בלבד</label>
+            <select id="searchSort">
+                <option value="">סדר הקטלוג</option>
+                <option value="price-asc">מחיר: מהנמוך לגבוה</option>
+                <option value="price-desc">מחיר: מהגבוה לנמוך</option>
+            </select>
+        </div>
+        <div class="search-results" id="searchResults" style="display: none;"></div>"""
+
+CATALOG_SEARCH_SCRIPT = """        // Catalog search: the index is fetched on first use and queried locally
+        const SEARCH_MARKS = /[\\u0591-\\u05BD\\u05BF\\u05C1\\u05C2\\u05C4\\u05C5\\u05C7]/g;
+        const SEARCH_SEPARATORS = /[^\\p{L}\\p{N}]+/u;
+        const SEARCH_RESULT_LIMIT = 100;
+        let searchIndexRequest = null;
+
+        function searchTokens(text) {
+            return text.toLowerCase().replace(SEARCH_MARKS, '').split(SEARCH_SEPARATORS).filter(token => token.length >= 2);
+        }
+
+        function firstPosition(length, isBefore) {
+            let lo = 0, hi = length;
+            while (lo < hi) {
+                const mid = (lo + hi) >> 1;
+                if (isBefore(mid)) { lo = mid + 1; } else { hi = mid; }
+            }
+            return lo;
+        }
+
+        function loadSearchIndex() {
+            if (!searchIndexRequest) {
+                searchIndexRequest = fetch('/search-index.json')
+                    .then(response => {
+                        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+                        return response.json();
+                    })
+                    .catch(error => {
+                        searchIndexRequest = null;
+                        throw error;
+                    });
+            }
+            return searchIndexRequest;
+        }
+
+        function termMatches(index, term) {
+            // Gifts with a token starting with term, as a 0/1 mark per gift
+            const marks = new Uint8Array(index.ids.length);
+            for (let i = firstPosition(index.tokens.length, i => index.tokens[i] < term);
+                 i < index.tokens.length && index.tokens[i].startsWith(term); i++) {
+                let ordinal = 0;
+                for (const delta of index.postings[i]) {
+                    ordinal += delta;
+                    marks[ordinal] = 1;
+                }
+            }
+            return marks;
+        }
+
+        function searchGifts(index, query, minPrice, maxPrice, inStock, sort) {
+            let matched = null;
+            for (const term of new Set(searchTokens(query))) {
+                const marks = termMatches(index, term);
+                if (matched) {
+                    for (let i = 0; i < marks.length; i++) matched[i] &= marks[i];
+                } else {
+                    matched = marks;
+                }
+            }
+            const accept = ordinal => (!matched || matched[ordinal]) && (!inStock || index.available[ordinal]);
+            if (!sort && minPrice === null && maxPrice === null) {
+                const results = [];
+                for (let ordinal = 0; ordinal < index.ids.length; ordinal++) {
+                    if (accept(ordinal)) results.push(ordinal);
+                }
+                return results;
+            }
+            // Price range by binary search over the gifts sorted by price
+            const byPrice = index.byPrice, prices = index.prices;
+            const start = minPrice === null ? 0 : firstPosition(byPrice.length, i => prices[byPrice[i]] < minPrice);
+            const stop = maxPrice === null ? byPrice.length : firstPosition(byPrice.length, i => prices[byPrice[i]] <= maxPrice);
+            const results = byPrice.slice(start, stop).filter(accept);
+            if (sort === 'price-desc') {
+                results.reverse();
+            } else if (!sort) {
+                results.sort((a, b) => a - b);
+            }
+            return results;
+        }
+
+        function priceFilter(id) {
+            const value = document.getElementById(id).value;
+            return value === '' ? null : Number(value);
+        }
+
+        function renderSearchResults(index, results) {
+            const container = document.getElementById('searchResults');
+            container.replaceChildren();
+            const summary = document.createElement('p');
+            summary.className = 'search-summary';
+            summary.textContent = results.length ? `נמצאו ${results.length} מתנות` : 'לא נמצאו מתנות מתאימות';
+            container.appendChild(summary);
+            for (const ordinal of results.slice(0, SEARCH_RESULT_LIMIT)) {
+                const link = document.createElement('a');
+                link.className = 'search-result';
+                link.href = `/gift_${index.ids[ordinal]}.html`;
+                const name = document.createElement('span');
+                name.className = 'search-result-name';
+                name.textContent = index.names[ordinal];
+                const price = document.createElement('span');
+                price.className = 'catalog-item-price';
+                price.textContent = index.priceLabels[ordinal];
+                const availability = document.createElement('span');
+                availability.className = 'catalog-item-availability' + (index.available[ordinal] ? '' : ' out-of-stock');
+                availability.textContent = index.available[ordinal] ? 'במלאי' : 'לא במלאי';
+                link.append(name, price, availability);
+                container.appendChild(link);
+            }
+        }
+
+        function updateSearch() {
+            const query = document.getElementById('searchQuery').value;
+            const minPrice = priceFilter('searchMinPrice');
+            const maxPrice = priceFilter('searchMaxPrice');
+            const inStock = document.getElementById('searchInStock').checked;
+            const sort = document.getElementById('searchSort').value;
+            const active = searchTokens(query).length || minPrice !== null || maxPrice !== null || inStock || sort;
+            const grid = document.querySelector('.catalog-grid');
+            const results = document.getElementById('searchResults');
+            if (!active) {
+                grid.style.display = '';
+                results.style.display = 'none';
+                return;
+            }
+            loadSearchIndex().then(index => {
+                renderSearchResults(index, searchGifts(index, query, minPrice, maxPrice, inStock, sort));
+                grid.style.display = 'none';
+                results.style.display = 'block';
+            }).catch(error => console.error('Error loading search index:', error));
+        }
+
+        document.getElementById('searchQuery').addEventListener('focus', () => loadSearchIndex().catch(() => {}), { once: true });
+        document.querySelectorAll('#catalogSearch input, #catalogSearch select').forEach(control => {
+            control.addEventListener(control.tagName === 'SELECT' || control.type === 'checkbox' ? 'change' : 'input', updateSearch);
+        });
+"""
+
+GALLERY_MAIN_IMAGE_TEMPLATE = """
+                <img src="{src}" 
+                     alt="{name}" 
                      class="main-image" 
                      id="mainImage"
                      onclick="openModal(this.src)">"""
-            
-            # Thumbnail gallery
-            photo_gallery_html += """
+
+# Gallery images served from the image pipeline's local variants: the page shows the preview,
+# thumbnails swap it in and the modal opens the full-size variant
+LOCAL_GALLERY_MAIN_IMAGE_TEMPLATE = """
+                <img src="{src}" 
+                     width="{width}" height="{height}" 
+                     alt="{name}" 
+                     class="main-image" 
+                     id="mainImage" 
+                     data-full="{full}" 
+                     onclick="openModal(this.dataset.full)">"""
+
+GALLERY_OPEN = """
                 <div class="image-gallery" id="imageGallery">"""
-            
-            for i, photo in enumerate(gift['photos']):
-                active_class = "active" if i == 0 else ""
-                photo_gallery_html += f"""
-                    <img src="{photo}" 
-                         alt="תצוגת {gift['name']} {i+1}" 
+
+GALLERY_THUMBNAIL_TEMPLATE = """
+                    <img src="{src}" 
+                         alt="תצוגת {name} {number}" 
                          class="gallery-image {active_class}" 
                          onclick="replaceMainImage(this.src, this.alt, this)">"""
-            
-            photo_gallery_html += """
+
+LOCAL_GALLERY_THUMBNAIL_TEMPLATE = """
+                    <img src="{src}" 
+                         width="{width}" height="{height}" 
+                         alt="תצוגת {name} {number}" 
+                         class="gallery-image {active_class}" 
+                         loading="lazy" 
+                         data-preview="{preview}" data-full="{full}" 
+                         onclick="document.getElementById('mainImage').dataset.full = this.dataset.full; replaceMainImage(this.dataset.preview, this.alt, this)">"""
+
+GALLERY_CLOSE = """
                 </div>"""
-        
-        # Determine availability class
-        availability_class = "out-of-stock" if "לא במלאי" in gift['availability'] else ""
-        
-        html = f"""<!DOCTYPE html>
+
+# Gift page template for str.format: literal braces in the CSS and JS are doubled
+GIFT_PAGE_TOP = """<!DOCTYPE html>
 <html lang="he" dir="rtl">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{gift['name']} - קטלוג מתנות חג</title>
-    <style>
-        * {{ margin: 0; padding: 0; box-sizing: border-box; }}
+    <title>{name} - קטלוג מתנות חג</title>
+"""
+
+GIFT_PAGE_STYLE = """        * {{ margin: 0; padding: 0; box-sizing: border-box; }}
         body {{ font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); min-height: 100vh; padding: 20px; display: flex; justify-content: center; align-items: center; }}
         .gift-card {{ background: white; border-radius: 20px; box-shadow: 0 20px 40px rgba(0, 0, 0, 0.1); overflow: hidden; max-width: 400px; width: 100%; transition: transform 0.3s ease, box-shadow 0.3s ease; position: relative; }}
         .gift-card:hover {{ transform: translateY(-10px); box-shadow: 0 30px 60px rgba(0, 0, 0, 0.15); }}
@@ -326,23 +514,24 @@ class GiftWebsiteGenerator:
         @media (max-width: 480px) {{ body {{ padding: 10px; }} .gift-card {{ max-width: 100%; border-radius: 15px; }} .gift-header {{ padding: 15px; }} .gift-title {{ font-size: 1.2rem; }} .gift-content {{ padding: 15px; }} .image-gallery {{ grid-template-columns: repeat(auto-fit, minmax(60px, 1fr)); gap: 5px; }} .image-gallery.one-image, .image-gallery.two-images {{ max-width: 160px; }} .gallery-image {{ height: 60px; }} .main-image {{ height: 160px; }} .seller-link {{ padding: 10px 20px; font-size: 0.9rem; }} }}
         @keyframes slideInUp {{ from {{ opacity: 0; transform: translateY(30px); }} to {{ opacity: 1; transform: translateY(0); }} }}
         .gift-card {{ animation: slideInUp 0.6s ease-out; }}
-    </style>
-</head>
+"""
+
+GIFT_PAGE_BODY = """</head>
 <body>
     <a href="/index.html" class="back-button">← חזרה לקטלוג</a>
     <div class="gift-card">
-        <div class="price-tag">{gift['price']}</div>
-        <div class="availability {availability_class}">{gift['availability']}</div>
+        <div class="price-tag">{price}</div>
+        <div class="availability {availability_class}">{availability}</div>
         <div class="gift-header">
-            <h2 class="gift-title">{gift['name']}</h2>
-            <p class="gift-subtitle">{gift['subtitle']}</p>
+            <h2 class="gift-title">{name}</h2>
+            <p class="gift-subtitle">{subtitle}</p>
         </div>
         <div class="gift-content">
-            <p class="gift-description">{gift['description']}</p>
+            <p class="gift-description">{description}</p>
             <div class="gift-images">
                 {photo_gallery_html}
             </div>
-            <a href="{gift['seller_link']}" class="seller-link" target="_blank" rel="noopener noreferrer">צפה באתר החנות</a>
+            <a href="{seller_link}" class="seller-link" target="_blank" rel="noopener noreferrer">צפה באתר החנות</a>
             <button class="select-gift-btn" onclick="selectGift()" id="selectBtn">בחר מתנה זו</button>
             <div class="success-message" id="successMessage">המתנה נבחרה בהצלחה! תוכלו לראות את הבחירה שלכם בדף הבחירות.</div>
         </div>
@@ -351,8 +540,9 @@ class GiftWebsiteGenerator:
         <span class="close" onclick="closeModal()">&times;</span>
         <img class="modal-content" id="modalImage">
     </div>
-    <script>
-        // Check authentication
+"""
+
+GIFT_PAGE_SCRIPT = """        // Check authentication
         window.addEventListener('load', function() {{
             const employeeId = localStorage.getItem('employeeId');
             if (!employeeId) {{
@@ -376,13 +566,24 @@ class GiftWebsiteGenerator:
                 return;
             }}
 
-            const giftData = {{
-                giftId: '{gift['id']}',
-                giftName: {json.dumps(gift['name'])},
-                giftPrice: '{gift['price']}',
-                employeeId: employeeId,
-                selectionTime: new Date().toISOString()
-            }};
+            // A retry of the same choice (double click, network error) resends it with the same
+            // Idempotency-Key, so the server stores it once and answers with its first response
+            let pending = JSON.parse(localStorage.getItem('pendingSelection') || 'null');
+            if (!pending || pending.giftData.giftId !== {id_js} || pending.giftData.employeeId !== employeeId) {{
+                pending = {{
+                    key: window.crypto && crypto.randomUUID ? crypto.randomUUID() :
+                        Date.now().toString(36) + '-' + Math.random().toString(36).slice(2),
+                    giftData: {{
+                        giftId: {id_js},
+                        giftName: {name_json},
+                        giftPrice: {price_js},
+                        employeeId: employeeId,
+                        selectionTime: new Date().toISOString()
+                    }}
+                }};
+                localStorage.setItem('pendingSelection', JSON.stringify(pending));
+            }}
+            const giftData = pending.giftData;
 
             // Show loading state
             const selectBtn = document.getElementById('selectBtn');
@@ -390,10 +591,11 @@ class GiftWebsiteGenerator:
             selectBtn.textContent = 'שולח...';
 
             // Send to backend service
-            fetch('/api/select-gift', {{
+            fetch('{api_base}/api/select-gift', {{
                 method: 'POST',
                 headers: {{
                     'Content-Type': 'application/json',
+                    'Idempotency-Key': pending.key
                 }},
                 body: JSON.stringify(giftData)
             }})
@@ -402,6 +604,7 @@ class GiftWebsiteGenerator:
                 if (data.success) {{
                     // Store selection in localStorage as backup
                     localStorage.setItem('selectedGift', JSON.stringify(giftData));
+                    localStorage.removeItem('pendingSelection');
                     
                     // Show success message based on action
                     const message = data.action === 'updated' ? 
@@ -435,11 +638,693 @@ class GiftWebsiteGenerator:
                 }}, 2000);
             }});
         }}
-    </script>
-</body>
-</html>"""
+"""
+
+GIFT_PAGE_TEMPLATE = (GIFT_PAGE_TOP + inline_style(GIFT_PAGE_STYLE) + GIFT_PAGE_BODY
+                      + inline_script(GIFT_PAGE_SCRIPT) + PAGE_END)
+
+# Shared assets (shared_assets=True): the catalog and gift page CSS/JS are written once as
+# content-hashed files the browser caches for good, instead of being repeated inline in every page
+ASSETS_DIR = "assets"
+
+def asset_url(name, content):
+    """Content-hashed URL of a shared asset, e.g. /assets/gift-page.<hash>.css"""
+    stem, ext = os.path.splitext(name)
+    return f"/{ASSETS_DIR}/{stem}.{content_hash(content)}{ext}"
+
+SHARED_ASSET_CONTENT = {
+    'catalog.css': CATALOG_PAGE_STYLE + CATALOG_PAGER_STYLE + CATALOG_SEARCH_STYLE,
+    'catalog.js': CATALOG_PAGE_SCRIPT,
+    'catalog-search.js': CATALOG_SEARCH_SCRIPT,
+    'gift-page.css': GIFT_PAGE_STYLE.format(),
+    'gift-page.js': GIFT_PAGE_SCRIPT.format(id_js="GIFT.id", name_json="GIFT.name", price_js="GIFT.price",
+                                            api_base="' + API_BASE + '"),
+}
+SHARED_ASSETS = {name: asset_url(name, content) for name, content in SHARED_ASSET_CONTENT.items()}
+
+# The gift's own values are the only script left in the page
+SHARED_GIFT_PAGE_TEMPLATE = (GIFT_PAGE_TOP + linked_style(SHARED_ASSETS['gift-page.css']) + GIFT_PAGE_BODY
+                             + "    <script>const GIFT = {gift_json}, API_BASE = '{api_base}';</script>\n"
+                             + linked_script(SHARED_ASSETS['gift-page.js']) + PAGE_END)
+
+# Page templates cut at {api_base}: a page is rendered once, and each build target writes its own
+# API base between the parts
+API_BASE_FIELD = "{api_base}"
+GIFT_PAGE_PARTS = GIFT_PAGE_TEMPLATE.split(API_BASE_FIELD)
+SHARED_GIFT_PAGE_PARTS = SHARED_GIFT_PAGE_TEMPLATE.split(API_BASE_FIELD)
+
+# Copied pages (admin.html) and the selection page declare their API base as this constant, set per build target
+API_BASE_DECLARATION = "const API_BASE = '"
+
+def static_page_parts(content):
+    """A copied page cut around the value of its API_BASE declaration, if it has one"""
+    head, declaration, tail = content.partition(API_BASE_DECLARATION)
+    if not declaration:
+        return [content]
+    return [head + declaration, tail[tail.index("'"):]]
+
+# Output files precompress=True writes .gz/.br siblings of (nginx gzip_static / brotli_static)
+COMPRESSIBLE_EXTENSIONS = ('.html', '.css', '.js', '.json')
+# Brotli quality of pages (5 is within 1% of 11 on a gift page at 1/60 of the time) and of the
+# shared assets, which are compressed once per content hash
+BROTLI_PAGE_QUALITY = 5
+BROTLI_ASSET_QUALITY = 11
+
+def catalog_page_filename(page):
+    """Output file of a catalog page, numbered from 1 (the first page is index.html)"""
+    return "index.html" if page == 1 else f"catalog_page_{page}.html"
+
+def precompress_files(paths, brotli_quality=BROTLI_PAGE_QUALITY):
+    """Write path.gz, and path.br when brotli is installed, next to output files
+
+    paths are copies of one page in several build targets: identical copies are compressed once.
+    """
+    compressed = {}
+    for path in paths:
+        with open(path, 'rb') as f:
+            data = f.read()
+        if data not in compressed:
+            compressed[data] = (gzip.compress(data, 9, mtime=0),
+                                brotli.compress(data, quality=brotli_quality) if brotli is not None else None)
+        gz, br = compressed[data]
+        with open(path + '.gz', 'wb') as f:
+            f.write(gz)
+        if br is not None:
+            with open(path + '.br', 'wb') as f:
+                f.write(br)
+
+def remove_precompressed(path):
+    """Remove the .gz/.br siblings of an output file, which would otherwise serve stale content"""
+    for sibling in (path + '.gz', path + '.br'):
+        if os.path.exists(sibling):
+            os.remove(sibling)
+
+class PageBuffer(list):
+    """File-like list of page chunks, joined once instead of concatenated repeatedly"""
+    write = list.append
+
+class TargetFiles:
+    """File-like writing one page to the same file in every build target
+
+    Targets are (output_dir, api_base) pairs: the page is rendered once and only the API base
+    written between its parts (write_parts) differs from one target to the next.
+    """
+
+    def __init__(self, filename, targets):
+        self.files = []
+        try:
+            for output_dir, api_base in targets:
+                self.files.append((open(os.path.join(output_dir, filename), 'w', encoding='utf-8'), api_base))
+        except OSError:
+            self.close()
+            raise
+
+    def write(self, chunk):
+        for f, _ in self.files:
+            f.write(chunk)
+
+    def write_api_base(self):
+        for f, api_base in self.files:
+            f.write(api_base)
+
+    def close(self):
+        for f, _ in self.files:
+            f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def write_parts(out, parts, api_base=""):
+    """Write page parts with the API base between them (each target's own for TargetFiles)"""
+    for i, part in enumerate(parts):
+        if i:
+            if isinstance(out, TargetFiles):
+                out.write_api_base()
+            else:
+                out.write(api_base)
+        out.write(part)
+
+def availability_class(gift):
+    """CSS class of the availability badge"""
+    return "out-of-stock" if "לא במלאי" in gift['availability'] else ""
+
+def catalog_card_html(gift, preview_image, description, image_attrs=""):
+    """One catalog grid card (an f-string, compiled once with the module)"""
+    return f"""
+        <div class="catalog-item" onclick="window.location.href='/gift_{gift['id']}.html'">
+            <div class="catalog-item-header">
+                <h2 class="catalog-item-title">{gift['name']}</h2>
+                <p class="catalog-item-subtitle">{gift['subtitle']}</p>
+            </div>
+            <div class="catalog-item-content">
+                <img src="{preview_image}" alt="{gift['name']}" class="catalog-item-image"{image_attrs}>
+                <p class="catalog-item-description">{description}</p>
+                <div class="catalog-item-footer">
+                    <div class="catalog-item-price">{gift['price']}</div>
+                    <div class="catalog-item-availability {availability_class(gift)}">{gift['availability']}</div>
+                </div>
+                <a href="/gift_{gift['id']}.html" class="view-details-btn">צפה בפרטים מלאים</a>
+            </div>
+        </div>"""
+
+class GiftWebsiteGenerator:
+    def __init__(self, csv_file, streaming=False, page_size=None, images=None, shared_assets=False,
+                 search_index=False, api_base=""):
+        self.csv_file = csv_file
+        self.streaming = streaming
+        self.page_size = page_size  # gifts per catalog page; None puts the whole catalog in index.html
+        self.images = images        # ImagePipeline serving photos from local variants, or None
+        self.shared_assets = shared_assets  # link SHARED_ASSETS instead of inlining the CSS/JS
+        self.search_index = search_index    # write search-index.json and a search panel on the catalog
+        self.api_base = check_api_base(api_base)  # prefix of the pages' /api/ calls ('' = same origin)
+        self.gifts = []
+        self.load_errors = []   # first MAX_REPORTED_ERRORS bad rows: {'line', 'gift_id', 'error'}
+        self.bad_rows = 0
+        if not streaming:
+            self.load_gifts()
+    
+    def load_gifts(self):
+        """Load gifts from CSV file"""
+        try:
+            self.gifts = list(self.iter_gifts())
+            print(f"Loaded {len(self.gifts)} gifts from {self.csv_file}")
+            self.print_load_errors()
+        except Exception as e:
+            print(f"Error loading CSV file: {e}")
+            raise
+
+    def iter_gifts(self, report=True):
+        """Yield normalized gifts one CSV row at a time, skipping bad rows
+
+        Checks required columns up front, then every row for missing values, an unparsable price
+        and a duplicate gift_id. With report=True bad rows are printed and kept in load_errors.
+        """
+        if report:
+            self.load_errors = []
+            self.bad_rows = 0
+        first_seen = {}  # gift_id -> line number
+        with open(self.csv_file, 'r', encoding='utf-8', newline='') as file:
+            reader = csv.DictReader(file)
+            missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or [])]
+            if missing:
+                raise ValueError(f"{self.csv_file} is missing required columns: {', '.join(missing)}")
+            for row in reader:
+                error = self.validate_row(row, first_seen)
+                if error:
+                    if report:
+                        self.report_bad_row(reader.line_num, row.get('gift_id'), error)
+                    continue
+                first_seen[row['gift_id']] = reader.line_num
+                yield self.normalize_gift(row)
+
+    def validate_row(self, row, first_seen):
+        """Return why a CSV row cannot be used, or None"""
+        if None in row:
+            return "too many fields"
+        if None in row.values():
+            return "too few fields"
+        empty = [column for column in REQUIRED_VALUES if not row[column].strip()]
+        if empty:
+            return f"empty {', '.join(empty)}"
+        if parse_price(row['price']) is None:
+            return f"unparsable price {row['price']!r}"
+        if row['gift_id'] in first_seen:
+            return f"duplicate gift_id {row['gift_id']!r} (first on line {first_seen[row['gift_id']]})"
+        return None
+
+    def normalize_gift(self, row):
+        """Gift record used by every page template"""
+        # Clean up empty photo fields
+        photos = []
+        for i in range(1, 5):  # photo1 to photo4
+            photo_key = f'photo{i}'
+            if photo_key in row and row[photo_key] and row[photo_key].strip():
+                photos.append(row[photo_key].strip())
         
-        return html
+        return {
+            'id': row['gift_id'],
+            'name': row['gift_name'],
+            'subtitle': row['gift_subtitle'],
+            'description': row['description'],
+            'price': row['price'],
+            'price_value': parse_price(row['price']),
+            'availability': row['availability'],
+            'seller_link': row['seller_link'],
+            'photos': photos
+        }
+
+    def report_bad_row(self, line, gift_id, error):
+        self.bad_rows += 1
+        if len(self.load_errors) < MAX_REPORTED_ERRORS:
+            self.load_errors.append({'line': line, 'gift_id': gift_id, 'error': error})
+            print(f"⚠️  Skipping row on line {line} (gift_id {gift_id!r}): {error}")
+
+    def print_load_errors(self):
+        if self.bad_rows:
+            print(f"⚠️  {self.bad_rows} bad row(s) skipped in {self.csv_file}"
+                  + (f" (first {MAX_REPORTED_ERRORS} listed)" if self.bad_rows > MAX_REPORTED_ERRORS else ""))
+
+    def catalog(self):
+        """Gifts in catalog order: the loaded list, or a fresh pass over the CSV when streaming"""
+        return map(self.localize_images, self.iter_gifts(report=False)) if self.streaming else self.gifts
+
+    def localize_images(self, gift):
+        """Attach the image pipeline's local variants of each photo to a gift (None where it failed)"""
+        if self.images is not None and 'images' not in gift:
+            gift['images'] = [self.images.variants(photo) for photo in gift['photos']]
+        return gift
+
+    def publish_images(self, output_dirs, gift, is_current):
+        """Copy the cached variants a gift's pages link to into every output directory"""
+        for image in gift.get('images') or ():
+            for variant in (image or {}).values():
+                filename = variant['src'].lstrip('/')
+                # Variant files are content-addressed: the name is the hash
+                if not is_current(filename, filename):
+                    for output_dir in output_dirs:
+                        os.makedirs(os.path.dirname(os.path.join(output_dir, filename)), exist_ok=True)
+                        shutil.copyfile(self.images.variant_path(variant['src']), os.path.join(output_dir, filename))
+
+    def generate_website(self, output_dir=".", incremental=False, workers=1, pool="process", precompress=False,
+                         extra_targets=()):
+        """Generate the complete website, returns a build report with wall time and per-page timings
+
+        With incremental=True only pages whose inputs changed since the last build (according to
+        the manifest in output_dir) are rendered and written, and pages of removed gifts are deleted.
+        With workers > 1 gift pages are rendered and written by a pool of worker processes, or of
+        threads with pool="thread" (cheaper to start; enough when writing the files dominates).
+        With page_size set the catalog is split into index.html plus catalog_page_N.html fragments.
+        With an image pipeline, photos are served from local WebP variants copied to output_dir/images.
+        With precompress=True every page and asset gets .gz (and .br) siblings for nginx to serve as-is.
+        With search_index set, search-index.json is written for the catalog page's search panel.
+        extra_targets are more (output_dir, api_base) pairs built in the same pass, e.g. a local
+        development copy calling the backend on localhost: every page is rendered once and written
+        to each target with its own API base.
+        """
+        started = time.perf_counter()
+        targets = [(output_dir, self.api_base)] + [(d, check_api_base(b)) for d, b in extra_targets]
+        output_dirs = [target_dir for target_dir, _ in targets]
+        for target_dir in output_dirs:
+            os.makedirs(target_dir, exist_ok=True)
+        previous = [self.load_manifest(d, api_base) if incremental else {} for d, api_base in targets]
+        template = self.template_hash()
+        pages = {}      # filename -> hash of everything the page is rendered from
+        written = []    # (filename, description) of pages rendered in this build
+        page_ms = {}    # filename -> milliseconds spent rendering and writing it
+
+        def is_current(filename, input_hash):
+            if pages.get(filename) == input_hash:
+                return True
+            pages[filename] = input_hash
+            return all(target_previous.get(filename) == input_hash and os.path.exists(os.path.join(d, filename))
+                       for d, target_previous in zip(output_dirs, previous))
+
+        def write_page(filename, description, write):
+            page_started = time.perf_counter()
+            with TargetFiles(filename, targets) as out:
+                write(out)
+            page_ms[filename] = (time.perf_counter() - page_started) * 1000
+            written.append((filename, description))
+
+        def build(filename, input_hash, description, write):
+            if not is_current(filename, input_hash):
+                write_page(filename, description, write)
+
+        # Copy cover and admin pages to output directory
+        for source, description in (("cover.html", "employee ID entry"), ("admin.html", "admin dashboard")):
+            if not os.path.exists(source):
+                print(f"Warning: {source} not found. Please create it manually.")
+                continue
+            with open(source, 'r', encoding='utf-8') as src:
+                content = src.read()
+            build(source, content_hash(content), description,
+                  lambda out, parts=static_page_parts(content): write_parts(out, parts, self.api_base))
+
+        # Write the shared stylesheets and scripts the pages link to
+        if self.shared_assets:
+            for name, content in SHARED_ASSET_CONTENT.items():
+                if name == 'catalog-search.js' and not self.search_index:
+                    continue
+                filename = SHARED_ASSETS[name].lstrip('/')
+                for target_dir in output_dirs:
+                    os.makedirs(os.path.join(target_dir, ASSETS_DIR), exist_ok=True)
+                build(filename, filename, f"shared {name}", lambda out, content=content: out.write(content))
+
+        # Fetch and resize every photo not in the image cache yet (streaming builds fetch as they go)
+        if self.images is not None and not self.streaming:
+            self.images.prepare(photo for gift in self.gifts for photo in gift['photos'])
+
+        # Generate individual gift pages, a batch at a time so streaming builds stay bounded
+        catalog_hash = hashlib.sha256(template.encode('utf-8'))
+        page_hashes = []        # catalog page -> hash of its gifts, when paginated
+        page_gift_hashes = []
+        gift_count = 0
+        with self.gift_page_writer(targets, workers, pool) as write_pages:
+            stale_gifts = []
+            for gift in self.iter_gifts() if self.streaming else self.gifts:
+                gift_count += 1
+                if self.images is not None:
+                    self.publish_images(output_dirs, self.localize_images(gift), is_current)
+                gift_hash = content_hash(template, gift)
+                catalog_hash.update(gift_hash.encode('ascii'))
+                if self.page_size:
+                    page_gift_hashes.append(gift_hash)
+                    if len(page_gift_hashes) == self.page_size:
+                        page_hashes.append(content_hash(template, page_gift_hashes))
+                        page_gift_hashes = []
+                if not is_current(f"gift_{gift['id']}.html", gift_hash):
+                    stale_gifts.append(gift)
+                    written.append((f"gift_{gift['id']}.html", gift['name']))
+                if len(stale_gifts) >= GIFT_PAGE_BATCH:
+                    page_ms.update(write_pages(stale_gifts))
+                    stale_gifts = []
+            page_ms.update(write_pages(stale_gifts))
+        if self.streaming:
+            print(f"Streamed {gift_count} gifts from {self.csv_file}")
+            self.print_load_errors()
+        if self.images is not None:
+            self.images.save()
+            print(f"🖼️  Images: {self.images.fetched} fetched, {self.images.failed} failed, "
+                  f"{sum(name.startswith(IMAGES_DIR + '/') for name in pages)} variants in {IMAGES_DIR}/")
+
+        # Generate catalog page, or its first page and the fragments loaded on scroll
+        if not self.page_size:
+            build("index.html", catalog_hash.hexdigest()[:16], "catalog page", self.write_catalog_page)
+        else:
+            if page_gift_hashes or not page_hashes:
+                page_hashes.append(content_hash(template, page_gift_hashes))
+            page_count = len(page_hashes)
+            stale_pages = {
+                page for page, page_hash in enumerate(page_hashes, 1)
+                # Only the first page depends on how many pages follow it
+                if not is_current(catalog_page_filename(page), content_hash(page_hash, page_count) if page == 1 else page_hash)
+            }
+            if stale_pages:
+                # One pass over the catalog, rendering only the pages whose gifts changed
+                for page, gifts in enumerate(self.catalog_pages(), 1):
+                    if page not in stale_pages:
+                        continue
+                    if page == 1:
+                        write_page("index.html", f"catalog page 1 of {page_count}",
+                                   lambda out: self.write_catalog_first_page(out, gifts, page_count))
+                    else:
+                        write_page(catalog_page_filename(page), f"catalog page {page} of {page_count}",
+                                   lambda out: self.write_catalog_cards(out, gifts, lazy=True))
+
+        # Generate the catalog search index
+        if self.search_index:
+            build(SEARCH_INDEX_FILE, content_hash(catalog_hash.hexdigest(), SEARCH_INDEX_FILE), "catalog search index",
+                  self.write_search_index)
+
+        # Generate selection tracking page
+        build("selection.html", content_hash(template), "gift selection tracking",
+              lambda out: write_parts(out, static_page_parts(self.generate_selection_page()), self.api_base))
+
+        # Remove pages that are no longer generated (gifts dropped from the catalog)
+        removed = sorted({filename for target_previous in previous for filename in target_previous
+                          if filename not in pages})
+        for target_dir, target_previous in zip(output_dirs, previous):
+            for filename in removed:
+                path = os.path.join(target_dir, filename)
+                if filename in target_previous and os.path.exists(path):
+                    os.remove(path)
+                remove_precompressed(path)
+
+        # Compress what was written (and anything a previous build left uncompressed), or drop
+        # the siblings of rewritten pages so nginx never serves a stale .gz
+        rewritten = {filename for filename, _ in written}
+        for filename in pages:
+            if not filename.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            paths = [os.path.join(target_dir, filename) for target_dir in output_dirs]
+            if not precompress:
+                if filename in rewritten:
+                    for path in paths:
+                        remove_precompressed(path)
+            elif filename in rewritten or not all(os.path.exists(path + '.gz') for path in paths):
+                precompress_files(paths, BROTLI_ASSET_QUALITY if filename.startswith(ASSETS_DIR + '/') else BROTLI_PAGE_QUALITY)
+        if precompress and brotli is None:
+            print("⚠️  brotli is not installed (pip install brotli): wrote .gz files only")
+        for target_dir, api_base in targets:
+            self.save_manifest(target_dir, pages, api_base)
+
+        report = {
+            'wall_ms': (time.perf_counter() - started) * 1000,
+            'targets': len(targets),
+            'workers': workers,
+            'pool': pool,
+            'written': len(written),
+            'unchanged': sum(not name.startswith(IMAGES_DIR + '/') for name in pages) - len(written),
+            'removed': len(removed),
+            'page_ms': page_ms
+        }
+        for target_dir, api_base in targets:
+            print(f"Website generated successfully in '{target_dir}' directory!"
+                  + (f" (API: {api_base}/api/)" if api_base else ""))
+        print("Generated files:")
+        for filename, description in written:
+            print(f"  - {filename} ({description})")
+        for filename in removed:
+            print(f"  - {filename} (removed)")
+        self.print_build_report(report)
+        print("\nStart with 'cover.html' to access the website.")
+        print("Admin dashboard available at 'admin.html'")
+        return report
+
+    @contextmanager
+    def gift_page_writer(self, targets, workers=1, pool="process"):
+        """Yield a function writing a list of gift pages to every (output_dir, api_base) target,
+        on a worker pool when workers > 1
+
+        Each page is rendered by the same write_gift_page() call whether it runs here or in a
+        worker, so parallel builds are byte-identical to serial ones.
+        """
+        if workers <= 1:
+            yield lambda gifts: _write_gift_pages(self, targets, gifts)
+            return
+
+        if pool == "thread":
+            executor = ThreadPoolExecutor(workers)
+            write_chunk = lambda chunk: _write_gift_pages(self, targets, chunk)
+        else:
+            executor = ProcessPoolExecutor(workers, initializer=_init_page_worker, initargs=(self.worker_copy(),))
+            write_chunk = partial(_write_gift_pages_in_worker, targets)
+
+        def write_pages(gifts):
+            if len(gifts) < 2 * workers:
+                return _write_gift_pages(self, targets, gifts)
+            # A few chunks per worker keeps the pool busy without pickling one task per page
+            chunk_size = -(-len(gifts) // (workers * 4))
+            page_ms = {}
+            for chunk_ms in executor.map(write_chunk, [gifts[i:i + chunk_size] for i in range(0, len(gifts), chunk_size)]):
+                page_ms.update(chunk_ms)
+            return page_ms
+
+        with executor:
+            yield write_pages
+
+    def worker_copy(self):
+        """Shallow copy sent to worker processes, without the gift list (workers get their chunk)"""
+        generator = copy.copy(self)
+        generator.gifts = []
+        generator.images = None  # gifts carry their image variants already
+        return generator
+
+    def print_build_report(self, report):
+        timings = sorted(report['page_ms'].values())
+        print(f"⏱️  Build took {report['wall_ms']:.1f} ms with {report['workers']} {report['pool']} worker(s): "
+              f"{report['written']} written, {report['unchanged']} unchanged, {report['removed']} removed")
+        if timings:
+            slowest = max(report['page_ms'], key=report['page_ms'].get)
+            print(f"   per page: p50 {timings[len(timings) // 2]:.2f} ms, "
+                  f"p99 {timings[min(len(timings) - 1, len(timings) * 99 // 100)]:.2f} ms, "
+                  f"total {sum(timings):.1f} ms, slowest {slowest} ({report['page_ms'][slowest]:.2f} ms)")
+
+    def template_hash(self):
+        """Hash of the generator code (with the search index and image modules) and build options
+        every page is rendered with"""
+        sources = []
+        for path in (__file__, inspect.getsourcefile(SearchIndexBuilder), inspect.getsourcefile(ImagePipeline)):
+            with open(path, 'rb') as f:
+                sources.append(f.read())
+        return content_hash(*sources, self.build_options())
+
+    def build_options(self):
+        """Options that change the rendered output of every page"""
+        options = {}
+        if self.shared_assets:
+            options['shared_assets'] = True
+        if self.search_index:
+            options['search_index'] = True
+        return options
+
+    def load_manifest(self, output_dir, api_base=""):
+        """Return {filename: input hash} from the last build in output_dir, {} if it used another API base"""
+        try:
+            with open(os.path.join(output_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            return manifest['pages'] if manifest.get('api_base', "") == api_base else {}
+        except (OSError, ValueError, KeyError):
+            return {}
+
+    def save_manifest(self, output_dir, pages, api_base=""):
+        path = os.path.join(output_dir, MANIFEST_FILE)
+        manifest = {'pages': pages}
+        if api_base:
+            manifest['api_base'] = api_base
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+        os.replace(path + '.tmp', path)
+
+    def generate_catalog_page(self):
+        """Generate the main catalog page HTML with employee ID check"""
+        out = PageBuffer()
+        self.write_catalog_page(out)
+        return "".join(out)
+
+    def write_catalog_page(self, out):
+        """Stream the catalog page to a file-like object, one gift card at a time"""
+        self.write_catalog_head(out)
+        self.write_catalog_cards(out, self.catalog())
+        self.write_catalog_tail(out)
+
+    def write_catalog_first_page(self, out, gifts, page_count):
+        """index.html of a paginated catalog: the first page of cards and the pager loading the rest"""
+        self.write_catalog_head(out, paginated=page_count > 1)
+        self.write_catalog_cards(out, gifts, lazy=True)
+        if page_count > 1:
+            out.write(CATALOG_PAGER_TEMPLATE.format(page_count=page_count))
+        self.write_catalog_tail(out)
+
+    def write_catalog_head(self, out, paginated=False):
+        """Everything before the first card, including the search panel when there is an index"""
+        if self.shared_assets:
+            out.write(CATALOG_PAGE_TOP + linked_style(SHARED_ASSETS['catalog.css']))
+        else:
+            style = CATALOG_PAGE_STYLE
+            if paginated:
+                style += CATALOG_PAGER_STYLE
+            if self.search_index:
+                style += CATALOG_SEARCH_STYLE
+            out.write(CATALOG_PAGE_TOP + inline_style(style))
+        out.write(CATALOG_PAGE_BODY)
+        if self.search_index:
+            out.write(CATALOG_SEARCH_PANEL)
+        out.write(CATALOG_GRID_OPEN)
+
+    def write_catalog_tail(self, out):
+        out.write(CATALOG_PAGE_BOTTOM)
+        if self.shared_assets:
+            out.write(linked_script(SHARED_ASSETS['catalog.js']))
+            if self.search_index:
+                out.write(linked_script(SHARED_ASSETS['catalog-search.js']))
+        else:
+            out.write(inline_script(CATALOG_PAGE_SCRIPT))
+            if self.search_index:
+                out.write(inline_script(CATALOG_SEARCH_SCRIPT))
+        out.write(PAGE_END)
+
+    def write_search_index(self, out):
+        """Write the catalog's search index (see search_index.py) to a file-like object"""
+        builder = SearchIndexBuilder()
+        for gift in self.catalog():
+            builder.add(gift)
+        builder.write(out)
+
+    def write_catalog_cards(self, out, gifts, lazy=False):
+        lazy_attr = ' loading="lazy"' if lazy else ''
+        for gift in gifts:
+            # Get the first photo for the catalog preview, its cached preview variant if there is one
+            image = gift['images'][0] if gift.get('images') else None
+            if image:
+                preview = image['preview']
+                preview_image = preview['src']
+                image_attrs = f' width="{preview["width"]}" height="{preview["height"]}"{lazy_attr}'
+            else:
+                preview_image = gift['photos'][0] if gift['photos'] else DEFAULT_PREVIEW_IMAGE
+                image_attrs = lazy_attr
+            
+            # Truncate description for catalog view
+            description = gift['description'][:150] + "..." if len(gift['description']) > 150 else gift['description']
+            
+            out.write(catalog_card_html(gift, preview_image, description, image_attrs))
+
+    def catalog_pages(self):
+        """Yield the gifts of each catalog page in order, at least one (possibly empty) page"""
+        page = []
+        pages = 0
+        for gift in self.catalog():
+            page.append(gift)
+            if len(page) == self.page_size:
+                pages += 1
+                yield page
+                page = []
+        if page or not pages:
+            yield page
+
+    def generate_gift_page(self, gift):
+        """Generate individual gift page HTML with selection tracking"""
+        out = PageBuffer()
+        self.write_gift_page(out, gift)
+        return "".join(out)
+
+    def write_gift_page(self, out, gift):
+        """Write an individual gift page to a file-like object"""
+        values = dict(
+            id=gift['id'],
+            id_js=f"'{gift['id']}'",
+            name=gift['name'],
+            name_json=json.dumps(gift['name']),
+            subtitle=gift['subtitle'],
+            description=gift['description'],
+            price=gift['price'],
+            price_js=f"'{gift['price']}'",
+            availability=gift['availability'],
+            availability_class=availability_class(gift),
+            seller_link=gift['seller_link'],
+            photo_gallery_html=self.photo_gallery_html(gift),
+            gift_json=self.gift_json(gift) if self.shared_assets else ""
+        )
+        parts = SHARED_GIFT_PAGE_PARTS if self.shared_assets else GIFT_PAGE_PARTS
+        write_parts(out, [part.format(**values) for part in parts], self.api_base)
+
+    def gift_json(self, gift):
+        """The values the shared gift page script needs, safe inside an inline <script>"""
+        values = {'id': gift['id'], 'name': gift['name'], 'price': gift['price']}
+        return json.dumps(values, ensure_ascii=False).replace('</', '<\\/')
+
+    def photo_gallery_html(self, gift):
+        """Main image plus thumbnail gallery of a gift page"""
+        if not gift['photos']:
+            return ""
+        # Local variants from the image pipeline where available, else the vendor URLs
+        images = gift.get('images') or [None] * len(gift['photos'])
+        if images[0]:
+            preview = images[0]['preview']
+            parts = [LOCAL_GALLERY_MAIN_IMAGE_TEMPLATE.format(
+                src=preview['src'], width=preview['width'], height=preview['height'],
+                full=images[0]['full']['src'], name=gift['name']
+            )]
+        else:
+            parts = [GALLERY_MAIN_IMAGE_TEMPLATE.format(src=gift['photos'][0], name=gift['name'])]
+        parts.append(GALLERY_OPEN)
+        for i, (photo, image) in enumerate(zip(gift['photos'], images)):
+            if image:
+                thumb = image['thumb']
+                parts.append(LOCAL_GALLERY_THUMBNAIL_TEMPLATE.format(
+                    src=thumb['src'], width=thumb['width'], height=thumb['height'],
+                    preview=image['preview']['src'], full=image['full']['src'],
+                    name=gift['name'], number=i + 1, active_class="active" if i == 0 else ""
+                ))
+            else:
+                parts.append(GALLERY_THUMBNAIL_TEMPLATE.format(
+                    src=photo, name=gift['name'], number=i + 1, active_class="active" if i == 0 else ""
+                ))
+        parts.append(GALLERY_CLOSE)
+        return "".join(parts)
 
     def generate_selection_page(self):
         """Generate the gift selection tracking page"""
@@ -494,6 +1379,8 @@ class GiftWebsiteGenerator:
     </div>
 
     <script>
+        const API_BASE = '';
+
         window.addEventListener('load', function() {
             checkAuth();
             loadSelection();
@@ -508,22 +1395,52 @@ class GiftWebsiteGenerator:
         }
 
         function loadSelection() {
-            const selectedGift = localStorage.getItem('selectedGift');
             const employeeId = localStorage.getItem('employeeId');
-            
-            if (!selectedGift || !employeeId) {
+            if (!employeeId) {
                 showNoSelection();
                 return;
             }
 
+            // The server's record is the confirmed choice; local state is only shown when the
+            // server cannot be reached, or for a choice it has not received yet
+            fetch(API_BASE + '/api/selections/' + encodeURIComponent(employeeId))
+            .then(response => {
+                if (response.status === 404) return null;
+                if (!response.ok) throw new Error('HTTP ' + response.status);
+                return response.json().then(data => data.selection);
+            })
+            .then(selection => {
+                if (selection) {
+                    localStorage.setItem('selectedGift', JSON.stringify(selection));
+                    showSelection(selection, true);
+                    return;
+                }
+                localStorage.removeItem('selectedGift');
+                const pending = JSON.parse(localStorage.getItem('pendingSelection') || 'null');
+                if (pending && pending.giftData.employeeId === employeeId) {
+                    showSelection(pending.giftData, false);
+                } else {
+                    showNoSelection();
+                }
+            })
+            .catch(error => {
+                console.error('Error confirming selection:', error);
+                try {
+                    const gift = JSON.parse(localStorage.getItem('selectedGift'));
+                    if (gift) showSelection(gift, false); else showNoSelection();
+                } catch (e) {
+                    showNoSelection();
+                }
+            });
+        }
+
+        function showSelection(gift, confirmed) {
             try {
-                const gift = JSON.parse(selectedGift);
-                
-                const selectionDate = new Date(gift.selectionTime).toLocaleString('he-IL');
+                const selectionDate = new Date(gift.selectionTime || gift.receivedAt).toLocaleString('he-IL');
                 
                 document.getElementById('selectionContent').innerHTML = `
                     <div class="selection-card">
-                        <h2>✅ המתנה שלכם נבחרה בהצלחה!</h2>
+                        <h2>${confirmed ? '✅ המתנה שלכם נבחרה בהצלחה!' : '⏳ הבחירה נשמרה במכשיר וטרם אושרה בשרת'}</h2>
                         <div class="selection-details">
                             <div class="detail-item">
                                 <h3>מתנה נבחרת</h3>
@@ -581,17 +1498,81 @@ class GiftWebsiteGenerator:
         
         return html
 
+def _write_gift_pages(generator, targets, gifts):
+    """Render and write gift pages one after another, returns {filename: milliseconds}"""
+    page_ms = {}
+    for gift in gifts:
+        page_started = time.perf_counter()
+        filename = f"gift_{gift['id']}.html"
+        with TargetFiles(filename, targets) as out:
+            generator.write_gift_page(out, gift)
+        page_ms[filename] = (time.perf_counter() - page_started) * 1000
+    return page_ms
+
+# Generator of the current page-rendering worker process (see gift_page_writer)
+_page_worker_generator = None
+
+def _init_page_worker(generator):
+    global _page_worker_generator
+    _page_worker_generator = generator
+
+def _write_gift_pages_in_worker(targets, gifts):
+    return _write_gift_pages(_page_worker_generator, targets, gifts)
+
 def main():
     """Main function"""
-    csv_file = "gifts-catalog.csv"
+    parser = argparse.ArgumentParser(description="Generate the gift catalog website from a CSV file")
+    parser.add_argument("--csv", default="gifts-catalog.csv", help="Catalog CSV file")
+    parser.add_argument("--output-dir", default=".", help="Directory to write the website to")
+    parser.add_argument("--api-base", default="",
+                        help="Backend URL the pages call the API on, e.g. http://localhost:5000 (default: same origin)")
+    parser.add_argument("--target", action="append", default=[], metavar="DIR=API_BASE",
+                        help="Also build the site into DIR calling the API on API_BASE, in the same pass "
+                             "(repeatable), e.g. --target gift_website=http://localhost:5000")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only rewrite pages whose inputs changed since the last build")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Read the CSV lazily instead of loading it, for very large vendor feeds")
+    parser.add_argument("--page-size", type=int, default=0,
+                        help="Gifts on each catalog page, later pages load on scroll (0 = one page)")
+    parser.add_argument("--image-cache", metavar="DIR",
+                        help="Serve photos as local WebP thumbnails/previews, cached in DIR (needs Pillow)")
+    parser.add_argument("--image-source", metavar="DIR",
+                        help="With --image-cache, read photos from DIR by file name instead of downloading them")
+    parser.add_argument("--shared-assets", action="store_true",
+                        help="Link shared content-hashed CSS/JS files instead of inlining them in every page")
+    parser.add_argument("--search-index", action="store_true",
+                        help="Add a search box and price/stock filters backed by a prebuilt search-index.json")
+    parser.add_argument("--precompress", action="store_true",
+                        help="Also write .gz/.br copies of every page and asset for nginx gzip_static")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Workers rendering and writing gift pages in parallel (0 = one per CPU)")
+    parser.add_argument("--pool", choices=["process", "thread"], default="process",
+                        help="Run parallel workers as processes or threads")
+    args = parser.parse_args()
+    csv_file = args.csv
     
     if not os.path.exists(csv_file):
         print(f"Error: CSV file '{csv_file}' not found!")
         return
     
     try:
-        generator = GiftWebsiteGenerator(csv_file)
-        generator.generate_website()
+        extra_targets = []
+        for target in args.target:
+            target_dir, separator, api_base = target.partition('=')
+            if not separator or not target_dir:
+                raise ValueError(f"--target expects DIR=API_BASE, got {target!r}")
+            extra_targets.append((target_dir, api_base))
+        images = None
+        if args.image_cache:
+            images = ImagePipeline(args.image_cache,
+                                   fetcher=DirectoryFetcher(args.image_source) if args.image_source else None)
+        generator = GiftWebsiteGenerator(csv_file, streaming=args.streaming, page_size=args.page_size or None,
+                                         images=images, shared_assets=args.shared_assets,
+                                         search_index=args.search_index, api_base=args.api_base)
+        generator.generate_website(args.output_dir, incremental=args.incremental,
+                                   workers=args.workers or os.cpu_count(), pool=args.pool,
+                                   precompress=args.precompress, extra_targets=extra_targets)
     except Exception as e:
         print(f"Error generating website: {e}")
 
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Gift catalog cache for the backend
+Parses gifts-catalog.csv with the website generator's loader (same validation, same gift records),
+indexes the gifts by id and reloads them when the file's mtime or size changes, so a selection's
+gift is checked with a dictionary lookup and /api/catalog is served from bytes serialized once.
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from generate_gift_website import GiftWebsiteGenerator, content_hash
+
+
+class CatalogSnapshot:
+    """One loaded version of the catalog"""
+
+    def __init__(self, gifts, modified_at):
+        self.gifts = gifts                                # catalog order
+        self.by_id = {gift['id']: gift for gift in gifts}
+        self.body = json.dumps({'success': True, 'gifts': gifts, 'total': len(gifts)},
+                               ensure_ascii=False).encode('utf-8')
+        self.etag = f"c{content_hash(self.body)}"
+        self.last_modified = datetime.fromtimestamp(int(modified_at), timezone.utc)
+
+
+class GiftCatalog:
+    """Gifts of a catalog CSV by id, reloaded at most every `check_interval` seconds if the file changed
+
+    A missing or unreadable file keeps the last catalog that loaded (none at first: `loaded` is False).
+    """
+
+    def __init__(self, csv_file, check_interval=1.0):
+        self.csv_file = csv_file
+        self.check_interval = check_interval
+        self.snapshot = None
+        self._stamp = None        # (mtime_ns, size) of the loaded file
+        self._checked = None      # monotonic time of the last stat
+        self._lock = threading.Lock()
+        self.refresh(force=True)
+
+    @property
+    def loaded(self):
+        return self.current() is not None
+
+    def current(self):
+        """Latest snapshot (None if no catalog ever loaded), reloading it first if the file changed"""
+        if self._checked is None or time.monotonic() - self._checked >= self.check_interval:
+            self.refresh()
+        return self.snapshot
+
+    def get(self, gift_id):
+        """Gift record of an id (str or int), or None"""
+        snapshot = self.current()
+        if snapshot is None or isinstance(gift_id, bool) or not isinstance(gift_id, (str, int)):
+            return None
+        return snapshot.by_id.get(str(gift_id))
+
+    def refresh(self, force=False):
+        """Reload the catalog if the CSV changed since it was loaded"""
+        with self._lock:
+            if not force and self._checked is not None and time.monotonic() - self._checked < self.check_interval:
+                return  # another thread just checked
+            self._checked = time.monotonic()
+            try:
+                stat = os.stat(self.csv_file)
+            except OSError:
+                if force:
+                    print(f"⚠️  Catalog {self.csv_file} not found: gift IDs are not checked")
+                return
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            if stamp == self._stamp:
+                return
+            self._stamp = stamp  # a file that fails to load is retried once it changes again
+            try:
+                generator = GiftWebsiteGenerator(self.csv_file)
+            except Exception as e:
+                print(f"❌ Could not load catalog {self.csv_file}, keeping the previous one: {e}")
+                return
+            self.snapshot = CatalogSnapshot(generator.gifts, stat.st_mtime)
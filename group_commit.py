@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Group commit for gift selections
+Concurrent selection requests are collected for a short window and written to the store with a
+single durable write; every caller is released only after its batch has been fsync-ed. If the batch
+write fails, its selections are retried one by one so only the failing ones report an error.
+"""
+
+import os
+import threading
+import time
+
+# Upper bounds of the batch size and commit time histograms (the last bucket is unbounded)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+COMMIT_MS_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+class _PendingWrite:
+    """Selections submitted by one caller, completed by the commit thread"""
+    __slots__ = ('selections', 'queued_at', 'done', 'results')
+
+    def __init__(self, selections):
+        self.selections = selections
+        self.queued_at = time.monotonic()
+        self.done = threading.Event()
+        self.results = None  # (action, previous) or the exception, per selection
+
+
+def _bucket(buckets, value):
+    for bound in buckets:
+        if value <= bound:
+            return bound
+    return '+Inf'
+
+
+class GroupCommitter:
+    """Coalesce selections arriving within `window` seconds into one store.upsert_many call"""
+
+    def __init__(self, store, window=0.005, max_batch=256, latency_budget=0.05):
+        self.store = store
+        self.window = window
+        self.max_batch = max_batch
+        self.latency_budget = latency_budget
+
+        self._start()
+        if hasattr(os, 'register_at_fork'):
+            # The commit thread does not survive a fork (gunicorn --preload)
+            os.register_at_fork(after_in_child=self._start)
+
+    def _start(self):
+        self._condition = threading.Condition()
+        self._queue = []
+        self._queued = 0
+        self._last_commit = 0.0
+        self._batches = 0
+        self._records = 0
+        self._max_batch_seen = 0
+        self._commit_seconds = 0.0
+        self._max_commit = 0.0
+        self._batch_sizes = dict.fromkeys(BATCH_SIZE_BUCKETS + ('+Inf',), 0)
+        self._commit_times = dict.fromkeys(COMMIT_MS_BUCKETS + ('+Inf',), 0)
+        self._thread = threading.Thread(target=self._commit_loop, name='selection-group-commit', daemon=True)
+        self._thread.start()
+
+    def submit(self, selection):
+        """Store one selection durably, returns (action, previous)"""
+        return self.submit_many([selection])[0]
+
+    def submit_many(self, selections, return_exceptions=False):
+        """Store selections durably as part of the next batch, returns [(action, previous)]
+
+        A selection that could not be stored raises its error, or with return_exceptions=True
+        gets the exception in its place in the results (the others are stored regardless).
+        """
+        pending = _PendingWrite(selections)
+        with self._condition:
+            self._queue.append(pending)
+            self._queued += len(selections)
+            self._condition.notify()
+        pending.done.wait()
+        if not return_exceptions:
+            for result in pending.results:
+                if isinstance(result, Exception):
+                    raise result
+        return pending.results
+
+    def stats(self):
+        """Batch size and commit time counters"""
+        with self._condition:
+            return {
+                'window': self.window,
+                'maxBatch': self.max_batch,
+                'latencyBudget': self.latency_budget,
+                'queued': self._queued,
+                'batches': self._batches,
+                'records': self._records,
+                'avgBatchSize': round(self._records / self._batches, 2) if self._batches else 0,
+                'maxBatchSize': self._max_batch_seen,
+                'commitSeconds': round(self._commit_seconds, 6),
+                'avgCommitMs': round(self._commit_seconds * 1000 / self._batches, 3) if self._batches else 0,
+                'maxCommitMs': round(self._max_commit * 1000, 3),
+                'batchSizes': {str(bound): count for bound, count in self._batch_sizes.items()},
+                'commitTimesMs': {str(bound): count for bound, count in self._commit_times.items()},
+            }
+
+    def _next_batch(self):
+        """Wait for the batch window to close, then take up to max_batch queued selections"""
+        with self._condition:
+            while not self._queue:
+                self._condition.wait()
+            # Give later requests a chance to join, but never hold the oldest one past the
+            # latency budget (allowing for how long the previous commit took)
+            first = self._queue[0].queued_at
+            deadline = min(first + self.window, first + self.latency_budget - self._last_commit)
+            while self._queued < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+
+            batch, size = [], 0
+            while self._queue and (not batch or size + len(self._queue[0].selections) <= self.max_batch):
+                pending = self._queue.pop(0)
+                batch.append(pending)
+                size += len(pending.selections)
+            self._queued -= size
+            return batch, size
+
+    def _commit_loop(self):
+        while True:
+            batch, size = self._next_batch()
+            started = time.perf_counter()
+            selections = [s for pending in batch for s in pending.selections]
+            try:
+                # upsert_many appends the whole batch in one write and fsyncs before returning
+                results = self.store.upsert_many(selections)
+            except Exception as e:
+                print(f"❌ Error committing batch of {size} selections, retrying one by one: {e}")
+                results = self._commit_one_by_one(selections)
+            offset = 0
+            for pending in batch:
+                pending.results = results[offset:offset + len(pending.selections)]
+                offset += len(pending.selections)
+            elapsed = time.perf_counter() - started
+
+            with self._condition:
+                self._last_commit = elapsed
+                self._batches += 1
+                self._records += size
+                self._max_batch_seen = max(self._max_batch_seen, size)
+                self._commit_seconds += elapsed
+                self._max_commit = max(self._max_commit, elapsed)
+                self._batch_sizes[_bucket(BATCH_SIZE_BUCKETS, size)] += 1
+                self._commit_times[_bucket(COMMIT_MS_BUCKETS, elapsed * 1000)] += 1
+            for pending in batch:
+                pending.done.set()
+
+    def _commit_one_by_one(self, selections):
+        """Store each selection on its own, returns (action, previous) or the exception for each"""
+        results = []
+        for selection in selections:
+            try:
+                results.append(self.store.upsert_many([selection])[0])
+            except Exception as e:
+                print(f"❌ Error committing selection: {e}")
+                results.append(e)
+        return results
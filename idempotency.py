@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Idempotency-Key cache for the backend
+The first request with a key is processed and its response stored in a directory shared by every
+worker; a retry with the same key (and the same body) gets that response back without touching the
+selection store. Requests with the same key wait for each other through a striped flock, so
+concurrent duplicates are processed once. Entries expire `ttl` seconds after they were stored and
+the least recently used are evicted beyond `max_keys`.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: duplicates are only serialized within one process
+    fcntl = None
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+ENTRY_SUFFIX = '.json'
+
+
+def valid_key(key):
+    """Keys are 1-255 printable ASCII characters, e.g. a UUID"""
+    return 0 < len(key) <= MAX_KEY_LENGTH and key.isascii() and key.isprintable()
+
+
+def fingerprint(body):
+    """Hash of a request body, to tell a retry from a different request reusing its key"""
+    return hashlib.sha256(body).hexdigest()
+
+
+class Claim:
+    """Exclusive hold on one key: a stored response to replay, or the right to process and save one"""
+
+    def __init__(self, cache, path, stripe, request_fingerprint, entry):
+        self._cache = cache
+        self._path = path
+        self._stripe = stripe
+        self._fingerprint = request_fingerprint
+        self.entry = entry   # {'fingerprint', 'status', 'body', 'storedAt'} or None for a new key
+
+    @property
+    def conflict(self):
+        """The key was used for a request with a different body"""
+        return self.entry is not None and self.entry['fingerprint'] != self._fingerprint
+
+    @property
+    def replay(self):
+        return self.entry is not None and not self.conflict
+
+    def save(self, status, body):
+        """Store the response (a JSON-serializable body) for the retries of this key"""
+        self.entry = {'fingerprint': self._fingerprint, 'status': status, 'body': body, 'storedAt': time.time()}
+        self._cache._store(self._path, self.entry)
+
+    def release(self):
+        if self._stripe is not None:
+            self._cache._unlock(self._stripe)
+            self._stripe = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+class IdempotencyCache:
+    """Responses by Idempotency-Key, one small JSON file per key in `directory`"""
+
+    def __init__(self, directory, ttl=24 * 3600, max_keys=10000, stripes=64):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self.stripes = stripes
+        self.sweep_every = max(1, max_keys // 10)   # saves between evictions, per worker
+        os.makedirs(directory, exist_ok=True)
+        self._start()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._start)
+
+    def _start(self):
+        # Lock files are opened per process; a thread lock per stripe serializes this process's threads
+        self._thread_locks = [threading.Lock() for _ in range(self.stripes)]
+        self._lock_fds = {}
+        self._saves = 0
+        self._saves_lock = threading.Lock()
+
+    def claim(self, key, request_fingerprint, blocking=True):
+        """Wait until no other request holds `key`, then return its Claim (release it when done)
+
+        With blocking=False, return None instead of waiting (event loops poll rather than block).
+        """
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        stripe = int(digest[:8], 16) % self.stripes
+        if not self._lock(stripe, blocking):
+            return None
+        try:
+            path = os.path.join(self.directory, digest + ENTRY_SUFFIX)
+            return Claim(self, path, stripe, request_fingerprint, self._load(path))
+        except BaseException:
+            self._unlock(stripe)
+            raise
+
+    def count(self):
+        return sum(name.endswith(ENTRY_SUFFIX) for name in os.listdir(self.directory))
+
+    def clear(self):
+        """Forget every stored response (after the selections are reset)"""
+        for name in os.listdir(self.directory):
+            if name.endswith(ENTRY_SUFFIX):
+                self._remove(os.path.join(self.directory, name))
+
+    def sweep(self):
+        """Remove expired entries, then the least recently used ones beyond max_keys"""
+        now = time.time()
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(ENTRY_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                used_at = os.stat(path).st_mtime
+            except OSError:
+                continue
+            if now - used_at > self.ttl:  # stored even earlier than last used
+                self._remove(path)
+            else:
+                entries.append((used_at, path))
+        if len(entries) > self.max_keys:
+            entries.sort()
+            for _, path in entries[:len(entries) - self.max_keys]:
+                self._remove(path)
+
+    def _load(self, path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry['storedAt'] > self.ttl:
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)  # recently used: evicted last
+        except OSError:
+            pass
+        return entry
+
+    def _store(self, path, entry):
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp, path)
+        with self._saves_lock:
+            self._saves += 1
+            sweep = self._saves % self.sweep_every == 0
+        if sweep:
+            self.sweep()
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _lock(self, stripe, blocking=True):
+        if not self._thread_locks[stripe].acquire(blocking):
+            return False
+        if fcntl is None:
+            return True
+        try:
+            fd = self._lock_fds.get(stripe)
+            if fd is None:
+                fd = self._lock_fds[stripe] = os.open(os.path.join(self.directory, f"{stripe}.lock"),
+                                                      os.O_RDWR | os.O_CREAT, 0o644)
+            fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            self._thread_locks[stripe].release()
+            return False
+        except BaseException:
+            self._thread_locks[stripe].release()
+            raise
+
+    def _unlock(self, stripe):
+        if fcntl is not None:
+            fcntl.flock(self._lock_fds[stripe], fcntl.LOCK_UN)
+        self._thread_locks[stripe].release()
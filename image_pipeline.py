@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Image cache and thumbnail pipeline for catalog photos
+Every vendor photo is fetched once into a content-addressed on-disk cache and resized into
+WebP variants (gallery thumbnail, catalog/gift page preview, full size for the image modal),
+so generated pages reference small local files instead of hotlinking the originals.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image
+except ImportError:  # optional: only needed when the pipeline is enabled
+    Image = None
+
+# Variant name -> bounding box (width, height); sizes are twice the CSS size for high-DPI screens
+VARIANTS = {
+    'thumb': (240, 160),     # gift page gallery thumbnails (80px tall)
+    'preview': (800, 400),   # catalog cards and the gift page main image (200px tall)
+    'full': (1600, 1600),    # image modal
+}
+
+# URL prefix and output sub-directory of the published variants
+IMAGES_DIR = "images"
+INDEX_FILE = "index.json"
+
+
+def fetch_url(url, timeout=20):
+    """Download a photo, returns its bytes"""
+    request = urllib.request.Request(url, headers={'User-Agent': 'gift-catalog-generator'})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return response.read()
+
+
+class DirectoryFetcher:
+    """Read photos from a local directory by the file name in their URL (fixtures, offline builds)"""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def __call__(self, url):
+        name = os.path.basename(urllib.parse.unquote(urllib.parse.urlparse(url).path))
+        with open(os.path.join(self.directory, name), 'rb') as f:
+            return f.read()
+
+
+class ImagePipeline:
+    """Fetch, cache and resize photos; variants(url) describes the local files to link to"""
+
+    def __init__(self, cache_dir, fetcher=None, quality=80, fetch_workers=8):
+        if Image is None:
+            raise RuntimeError("The image pipeline needs Pillow (pip install Pillow)")
+        self.cache_dir = cache_dir
+        self.fetcher = fetcher or fetch_url
+        self.quality = quality
+        self.fetch_workers = fetch_workers
+        self.fetched = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._failed = set()              # urls that could not be fetched or resized in this run
+        os.makedirs(os.path.join(cache_dir, 'originals'), exist_ok=True)
+        os.makedirs(os.path.join(cache_dir, 'variants'), exist_ok=True)
+        self._urls = self._load_index()   # url -> {variant: {'src', 'width', 'height'}}
+
+    def variants(self, url):
+        """Local variants of a photo, fetching and resizing it on first use; None if that fails"""
+        with self._lock:
+            if url in self._failed:
+                return None
+            entry = self._urls.get(url)
+        if entry is not None and all(os.path.exists(self.variant_path(v['src'])) for v in entry.values()):
+            return entry
+
+        try:
+            data = self.fetcher(url)
+        except Exception as e:
+            print(f"⚠️  Could not fetch {url}: {e}")
+            return self._fail(url)
+        try:
+            entry = self._store(data)
+        except Exception as e:
+            print(f"⚠️  Could not resize {url}: {e}")
+            return self._fail(url)
+        with self._lock:
+            self._urls[url] = entry
+            self.fetched += 1
+        return entry
+
+    def prepare(self, urls):
+        """Fetch and resize photos not in the cache yet, several at a time"""
+        with self._lock:
+            missing = list(dict.fromkeys(url for url in urls if url not in self._urls))
+        if missing:
+            with ThreadPoolExecutor(self.fetch_workers) as executor:
+                list(executor.map(self.variants, missing))
+            self.save()
+
+    def variant_path(self, src):
+        """Cache file of a variant src"""
+        return os.path.join(self.cache_dir, 'variants', os.path.basename(src))
+
+    def save(self):
+        """Persist the url -> variants index so later builds skip fetching"""
+        path = os.path.join(self.cache_dir, INDEX_FILE)
+        with self._lock:
+            with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(self._urls, f, ensure_ascii=False)
+        os.replace(path + '.tmp', path)
+
+    def _fail(self, url):
+        with self._lock:
+            self._failed.add(url)
+            self.failed += 1
+        return None
+
+    def _load_index(self):
+        try:
+            with open(os.path.join(self.cache_dir, INDEX_FILE), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _store(self, data):
+        """Cache an original by content hash and render its variants, returns their descriptions"""
+        digest = hashlib.sha256(data).hexdigest()[:16]
+        original = os.path.join(self.cache_dir, 'originals', digest)
+        if not os.path.exists(original):
+            self._write_atomic(original, data)
+
+        entry = {}
+        image = None
+        for name, box in VARIANTS.items():
+            src = f"/{IMAGES_DIR}/{digest}-{name}.webp"
+            path = self.variant_path(src)
+            if os.path.exists(path):
+                with Image.open(path) as variant:
+                    width, height = variant.size
+            else:
+                if image is None:
+                    image = Image.open(original)
+                    image.load()
+                    if image.mode not in ('RGB', 'RGBA'):
+                        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+                variant = image.copy()
+                variant.thumbnail(box, Image.LANCZOS)
+                width, height = variant.size
+                tmp = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp, 'wb') as f:
+                    variant.save(f, 'WEBP', quality=self.quality, method=4)
+                os.replace(tmp, path)
+            entry[name] = {'src': src, 'width': width, 'height': height}
+        return entry
+
+    def _write_atomic(self, path, data):
+        # Threads may store the same content at once: each writes its own temporary file
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
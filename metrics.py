@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Request and storage metrics for the backend, in the Prometheus text format
+Each worker process counts into plain dicts (one locked update per observation) and writes a
+snapshot of its totals to a shared directory about once a second; render() sums the snapshots of
+every worker, so /api/metrics reports the whole gunicorn deployment whichever worker answers.
+"""
+
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+
+# Histogram upper bounds: request/storage latency in seconds, payload sizes in bytes
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+SNAPSHOT_SUFFIX = '.json'
+
+
+class Counter:
+    """Monotonic count per label values, e.g. requests.inc('/api/aggregate', 'GET', '200')"""
+
+    def __init__(self, metrics, name):
+        self._metrics = metrics
+        self._name = name
+
+    def inc(self, *labels, amount=1):
+        self._metrics._inc(self._name, labels, amount)
+
+
+class Histogram:
+    """Bucketed observations per label values, e.g. latency.observe(0.003, '/api/aggregate', 'GET')"""
+
+    def __init__(self, metrics, name, buckets):
+        self._metrics = metrics
+        self._name = name
+        self._buckets = buckets
+
+    def observe(self, value, *labels):
+        self._metrics._observe(self._name, labels, bisect.bisect_left(self._buckets, value), len(self._buckets), value)
+
+    def time(self, *labels):
+        """Context manager observing the seconds spent in its block"""
+        return _Timer(self, labels)
+
+
+class _Timer:
+    __slots__ = ('histogram', 'labels', 'started')
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+
+
+class Metrics:
+    """Registry of counters and histograms, summed across the processes sharing `directory`
+
+    Without a directory only this process is reported. Snapshots of workers that exited are kept,
+    so totals never go backwards while the service runs; clear the directory when it starts.
+    """
+
+    def __init__(self, directory=None, flush_interval=1.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._families = {}  # name -> (type, help, label names, buckets)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._start()
+        if hasattr(os, 'register_at_fork'):
+            # Workers forked from a preloaded app start from zero, under their own snapshot file
+            os.register_at_fork(after_in_child=self._start)
+        atexit.register(self.flush)
+
+    def _start(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # one writer of the snapshot file at a time
+        self._values = {}      # (name, label values) -> count, or [bucket counts..., +Inf, sum]
+        self._changes = 0
+        self._flushed = 0
+        self._snapshot = None
+        if self.directory:
+            self._snapshot = os.path.join(self.directory, f"{os.getpid()}-{os.urandom(4).hex()}{SNAPSHOT_SUFFIX}")
+            threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True).start()
+
+    def counter(self, name, help, labels=()):
+        self._families[name] = ('counter', help, tuple(labels), None)
+        return Counter(self, name)
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self._families[name] = ('histogram', help, tuple(labels), tuple(buckets))
+        return Histogram(self, name, tuple(buckets))
+
+    def instrument(self, obj, methods, histogram, errors):
+        """Time calls of obj's methods into histogram (by method name), counting the ones that raise"""
+        for method in methods:
+            setattr(obj, method, self._timed(getattr(obj, method), method, histogram, errors))
+
+    @staticmethod
+    def _timed(function, name, histogram, errors):
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            except Exception:
+                errors.inc(name)
+                raise
+            finally:
+                histogram.observe(time.perf_counter() - started, name)
+        timed.__name__ = name
+        timed.__doc__ = function.__doc__
+        return timed
+
+    def _inc(self, name, labels, amount):
+        key = (name, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+            self._changes += 1
+
+    def _observe(self, name, labels, bucket, bucket_count, value):
+        key = (name, labels)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (bucket_count + 2)
+            counts[bucket] += 1
+            counts[-1] += value
+            self._changes += 1
+
+    # ------------------------------------------------------------------
+    # Snapshots shared between workers
+    # ------------------------------------------------------------------
+
+    def flush(self):
+        """Write this process's totals to its snapshot file, if anything changed"""
+        if not self._snapshot:
+            return
+        with self._flush_lock:
+            with self._lock:
+                if self._changes == self._flushed:
+                    return
+                changes = self._changes
+                values = [[name, list(labels), value] for (name, labels), value in self._values.items()]
+            tmp = self._snapshot + '.tmp'
+            try:
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump({'pid': os.getpid(), 'values': values}, f, ensure_ascii=False)
+                os.replace(tmp, self._snapshot)
+            except OSError as e:
+                print(f"⚠️  Could not write metrics snapshot: {e}")
+                return
+            self._flushed = changes
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def collect(self):
+        """(name, label values) -> value summed over every process, this one up to date"""
+        if not self.directory:
+            with self._lock:
+                return {key: list(value) if isinstance(value, list) else value for key, value in self._values.items()}
+        self.flush()
+        totals = {}
+        for filename in os.listdir(self.directory):
+            if not filename.endswith(SNAPSHOT_SUFFIX):
+                continue
+            try:
+                with open(os.path.join(self.directory, filename), 'r', encoding='utf-8') as f:
+                    values = json.load(f)['values']
+            except (OSError, ValueError, KeyError):
+                continue  # removed or being replaced: the next scrape catches up
+            for name, labels, value in values:
+                key = (name, tuple(labels))
+                total = totals.get(key)
+                if total is None:
+                    totals[key] = list(value) if isinstance(value, list) else value
+                elif isinstance(value, list):
+                    totals[key] = [a + b for a, b in zip(total, value)] if len(total) == len(value) else total
+                else:
+                    totals[key] = total + value
+        return totals
+
+    def workers(self):
+        """Number of processes that have reported since the directory was cleared"""
+        if not self.directory:
+            return 1
+        return sum(filename.endswith(SNAPSHOT_SUFFIX) for filename in os.listdir(self.directory))
+
+    def render(self, gauges=()):
+        """Prometheus text exposition of every metric, plus (name, help, value) gauges read at scrape time"""
+        by_family = {}
+        for (name, labels), value in sorted(self.collect().items()):
+            by_family.setdefault(name, []).append((labels, value))
+
+        lines = []
+        for name, (kind, help, label_names, buckets) in self._families.items():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in by_family.get(name, ()):
+                label_text = _labels(label_names, labels)
+                if kind == 'counter':
+                    lines.append(f"{_series(name, label_text)} {_number(value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets + ('+Inf',), value):
+                    cumulative += count
+                    le = f'le="{bound}"'
+                    lines.append(f"{_series(name + '_bucket', label_text + ',' + le if label_text else le)} {cumulative}")
+                lines.append(f"{_series(name + '_sum', label_text)} {_number(value[-1])}")
+                lines.append(f"{_series(name + '_count', label_text)} {cumulative}")
+        for name, help, value in gauges:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {_number(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values):
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+def _series(name, label_text):
+    return f"{name}{{{label_text}}}" if label_text else name
+
+
+def _number(value):
+    return repr(round(value, 6)) if isinstance(value, float) else str(value)
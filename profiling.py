@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Opt-in request profiler for the backend
+Profiles a random fraction of requests (PROFILE_SAMPLE_RATE) and/or the requests that carry
+`X-Profile: <PROFILE_TOKEN>`, and writes per-route results to PROFILE_DIR:
+  collapsed - stacks of the request thread sampled every PROFILE_INTERVAL_MS, appended to
+              <route>.collapsed in the folded format flamegraph.pl and speedscope read
+  pstats    - one cProfile dump per request under <route>/, for pstats or snakeviz
+Files rotate by size (PROFILE_MAX_BYTES per route). When neither option is set nothing is
+installed, so requests run exactly as without this module.
+"""
+
+import cProfile
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: rotation is only safe for a single process
+    fcntl = None
+
+PROFILE_HEADER = 'X-Profile'
+FORMATS = ('collapsed', 'pstats')
+
+
+def route_slug(method, route):
+    """File name of a route's profiles, e.g. POST_api_select-gift"""
+    path = ''.join(c if c.isalnum() or c in '-_' else '_' for c in route.strip('/'))
+    return f"{method}_{path or 'root'}"
+
+
+def frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collapse(frame):
+    """Stack of a frame in the folded format: outermost first, separated by ';'"""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class StackSampler:
+    """One thread sampling the stacks of the threads currently being profiled"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stacks = {}   # thread id -> {collapsed stack: samples}
+        self._pid = None
+
+    def start(self, thread_id):
+        with self._lock:
+            self._stacks[thread_id] = {}
+            if self._pid != os.getpid():
+                # First use in this process (threads do not survive a fork)
+                self._pid = os.getpid()
+                threading.Thread(target=self._run, name='profile-sampler', daemon=True).start()
+
+    def stop(self, thread_id):
+        """Stop sampling a thread, returns {collapsed stack: samples}"""
+        with self._lock:
+            return self._stacks.pop(thread_id, {})
+
+    def _run(self):
+        me = threading.get_ident()
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._stacks:
+                    continue
+                frames = sys._current_frames()
+                for thread_id, stacks in self._stacks.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None and thread_id != me:
+                        stack = collapse(frame)
+                        stacks[stack] = stacks.get(stack, 0) + 1
+
+
+class RequestProfiler:
+    """Decide which requests to profile and write their profiles to a directory, rotating by size"""
+
+    def __init__(self, directory, sample_rate=0.0, token=None, output='collapsed', max_bytes=10 * 1024 * 1024,
+                 backups=3, interval=0.001, routes=None):
+        if output not in FORMATS:
+            raise ValueError(f"Unknown profile format {output!r}, expected one of {', '.join(FORMATS)}")
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.token = token
+        self.output = output
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.routes = set(routes) if routes else None   # None: every route
+        self.sampler = StackSampler(interval) if output == 'collapsed' else None
+        self._random = random.Random()
+        os.makedirs(directory, exist_ok=True)
+        self._lock_path = os.path.join(directory, '.lock')
+
+    @classmethod
+    def from_environ(cls, environ=os.environ):
+        """Profiler configured by PROFILE_* variables, or None when profiling is off"""
+        sample_rate = float(environ.get('PROFILE_SAMPLE_RATE') or 0)
+        token = environ.get('PROFILE_TOKEN') or None
+        if sample_rate <= 0 and not token:
+            return None
+        routes = environ.get('PROFILE_ROUTES')
+        return cls(
+            environ.get('PROFILE_DIR', 'backend-profiles'),
+            sample_rate=min(sample_rate, 1.0),
+            token=token,
+            output=environ.get('PROFILE_FORMAT', 'collapsed'),
+            max_bytes=int(environ.get('PROFILE_MAX_BYTES', 10 * 1024 * 1024)),
+            backups=int(environ.get('PROFILE_BACKUPS', 3)),
+            interval=float(environ.get('PROFILE_INTERVAL_MS', 1)) / 1000,
+            routes=routes.split(',') if routes else None,
+        )
+
+    def wants(self, route, header_value):
+        """Whether to profile a request to route, given its X-Profile header (or None)"""
+        if self.routes is not None and route not in self.routes:
+            return False
+        if self.token and header_value and hmac.compare_digest(header_value, self.token):
+            return True
+        return self.sample_rate > 0 and self._random.random() < self.sample_rate
+
+    def start(self):
+        """Start profiling the current thread, returns the handle to pass to finish()"""
+        if self.sampler is not None:
+            thread_id = threading.get_ident()
+            self.sampler.start(thread_id)
+            return thread_id
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+
+    def finish(self, handle, method, route):
+        """Stop profiling and write the result under the route's name"""
+        slug = route_slug(method, route)
+        if self.sampler is not None:
+            stacks = self.sampler.stop(handle)
+            if stacks:
+                lines = ''.join(f"{stack} {samples}\n" for stack, samples in stacks.items())
+                self._append(f"{slug}.collapsed", lines.encode('utf-8'))
+            return
+        handle.disable()
+        route_dir = os.path.join(self.directory, slug)
+        os.makedirs(route_dir, exist_ok=True)
+        handle.dump_stats(os.path.join(route_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-"
+                                                  f"{threading.get_ident()}-{time.monotonic_ns()}.prof"))
+        self._prune(route_dir)
+
+    def install(self, app):
+        """Profile the chosen requests of a Flask app"""
+        from flask import g, request
+
+        @app.before_request
+        def start_profile():
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            if self.wants(route, request.headers.get(PROFILE_HEADER)):
+                g.profile = (self.start(), request.method, route)
+
+        @app.teardown_request
+        def finish_profile(exc):
+            profile = g.pop('profile', None)
+            if profile is not None:
+                try:
+                    self.finish(*profile)
+                except OSError as e:
+                    print(f"⚠️  Could not write profile: {e}")
+
+    # ------------------------------------------------------------------
+    # Size-based rotation, shared by every worker writing to the directory
+    # ------------------------------------------------------------------
+
+    def _locked(self):
+        lock = open(self._lock_path, 'a')
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        return lock
+
+    def _append(self, name, data):
+        """Append to a file, first rotating it to name.1 .. name.<backups> if it would outgrow max_bytes"""
+        path = os.path.join(self.directory, name)
+        with self._locked():
+            if os.path.exists(path) and os.path.getsize(path) + len(data) > self.max_bytes:
+                for n in range(self.backups - 1, 0, -1):
+                    if os.path.exists(f"{path}.{n}"):
+                        os.replace(f"{path}.{n}", f"{path}.{n + 1}")
+                if self.backups:
+                    os.replace(path, f"{path}.1")
+                else:
+                    os.remove(path)
+            with open(path, 'ab') as f:
+                f.write(data)
+
+    def _prune(self, route_dir):
+        """Delete the oldest dumps of a route until they fit in max_bytes"""
+        with self._locked():
+            dumps = []
+            for name in os.listdir(route_dir):
+                path = os.path.join(route_dir, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                dumps.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for _, size, _ in dumps)
+            for _, size, path in sorted(dumps):
+                if total <= self.max_bytes:
+                    break
+                os.remove(path)
+                total -= size
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Prebuilt client-side search index for the gift catalog
+The generator writes search-index.json next to the catalog: an inverted index from tokens of each
+gift's Hebrew name, subtitle and description to the gifts containing them, plus price and
+availability columns (and the gifts sorted by price) for filtering. The catalog page queries it in
+the browser; search() is the same algorithm in Python.
+"""
+
+import json
+import re
+
+# Hebrew points and cantillation marks, removed before splitting (the page script uses the same class)
+HEBREW_MARKS = re.compile('[\u0591-\u05BD\u05BF\u05C1\u05C2\u05C4\u05C5\u05C7]')
+SEPARATORS = re.compile(r'[\W_]+')
+MIN_TOKEN_LENGTH = 2
+OUT_OF_STOCK = "לא במלאי"
+
+
+def tokenize(text):
+    """Lower-cased words of at least MIN_TOKEN_LENGTH letters or digits, without niqqud"""
+    return [token for token in SEPARATORS.split(HEBREW_MARKS.sub('', text.lower()))
+            if len(token) >= MIN_TOKEN_LENGTH]
+
+
+class SearchIndexBuilder:
+    """Collect gifts in catalog order, then serialize them as the search-index.json document"""
+
+    def __init__(self):
+        self.ids = []
+        self.names = []
+        self.prices = []          # numeric price, for filtering and sorting
+        self.price_labels = []    # price as shown in the catalog
+        self.available = []       # 1 unless the gift is out of stock
+        self._postings = {}       # token -> ordinals of the gifts containing it, ascending
+
+    def add(self, gift):
+        ordinal = len(self.ids)
+        self.ids.append(gift['id'])
+        self.names.append(gift['name'])
+        self.prices.append(gift['price_value'])
+        self.price_labels.append(gift['price'])
+        self.available.append(0 if OUT_OF_STOCK in gift['availability'] else 1)
+        for token in set(tokenize(f"{gift['name']} {gift['subtitle']} {gift['description']}")):
+            self._postings.setdefault(token, []).append(ordinal)
+
+    def to_dict(self):
+        tokens = sorted(self._postings)
+        return {
+            'version': 1,
+            'ids': self.ids,
+            'names': self.names,
+            'prices': self.prices,
+            'priceLabels': self.price_labels,
+            'available': self.available,
+            'byPrice': sorted(range(len(self.ids)), key=self.prices.__getitem__),
+            'tokens': tokens,
+            # Ordinals are delta-encoded: most gaps are small numbers
+            'postings': [_deltas(self._postings[token]) for token in tokens],
+        }
+
+    def write(self, out):
+        json.dump(self.to_dict(), out, ensure_ascii=False, separators=(',', ':'))
+
+
+def _deltas(ordinals):
+    previous = 0
+    deltas = []
+    for ordinal in ordinals:
+        deltas.append(ordinal - previous)
+        previous = ordinal
+    return deltas
+
+
+def _first(length, is_before):
+    """First position in 0..length for which is_before() is false (binary search)"""
+    lo, hi = 0, length
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if is_before(mid):
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def term_matches(index, term):
+    """Ordinals of the gifts with a token starting with term"""
+    tokens, postings = index['tokens'], index['postings']
+    matches = set()
+    position = _first(len(tokens), lambda i: tokens[i] < term)
+    while position < len(tokens) and tokens[position].startswith(term):
+        ordinal = 0
+        for delta in postings[position]:
+            ordinal += delta
+            matches.add(ordinal)
+        position += 1
+    return matches
+
+
+def search(index, query, min_price=None, max_price=None, in_stock=False, sort=None):
+    """Ordinals of the gifts matching every query word (as a prefix) and the filters
+
+    Results are in catalog order, or by price with sort='price-asc'/'price-desc'.
+    """
+    matched = None
+    for term in set(tokenize(query)):
+        matches = term_matches(index, term)
+        matched = matches if matched is None else matched & matches
+
+    def accept(ordinal):
+        return (matched is None or ordinal in matched) and (not in_stock or index['available'][ordinal])
+
+    if sort is None and min_price is None and max_price is None:
+        if matched is None:
+            return [ordinal for ordinal in range(len(index['ids'])) if accept(ordinal)]
+        return sorted(ordinal for ordinal in matched if accept(ordinal))
+
+    # Price range by binary search over the gifts sorted by price
+    by_price, prices = index['byPrice'], index['prices']
+    start = 0 if min_price is None else _first(len(by_price), lambda i: prices[by_price[i]] < min_price)
+    stop = len(by_price) if max_price is None else _first(len(by_price), lambda i: prices[by_price[i]] <= max_price)
+    results = [ordinal for ordinal in by_price[start:stop] if accept(ordinal)]
+    if sort == 'price-desc':
+        results.reverse()
+    elif sort is None:
+        results.sort()
+    return results
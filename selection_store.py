@@ -0,0 +1,489 @@
+#!/usr/bin/env python3
+"""
+Append-only storage engine for gift selections
+Each selection is appended to a log file as one JSON line and indexed in memory by employeeId.
+The log is shared between worker processes: writers hold an exclusive file lock while appending
+and every process tails the log to keep its index current.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from selection_table import SelectionTable, check_selection
+
+# Fields of aggregate(), in response order
+AGGREGATE_FIELDS = ('totalSelections', 'uniqueEmployees', 'giftCounts', 'employeeSelections')
+
+try:
+    import fcntl
+except ImportError:  # Windows: only safe for a single process
+    fcntl = None
+
+
+def _write_all(fd, data):
+    """os.write until every byte is written"""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+class LogSelectionStore:
+    """Selection store backed by an append-only log with an in-memory employeeId index"""
+
+    def __init__(self, log_file, fsync_every=64, fsync_interval=0.05,
+                 compact_ratio=2.0, compact_min_records=1000,
+                 change_history=10000, watch_interval=0.2):
+        self.log_file = log_file
+        self.lock_file = log_file + '.lock'
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.compact_ratio = compact_ratio
+        self.compact_min_records = compact_min_records
+        self.change_history = change_history
+        self.watch_interval = watch_interval
+
+        self._closed = False
+        self._open()
+        if hasattr(os, 'register_at_fork'):
+            # gunicorn --preload forks after the store is created; each worker needs
+            # its own file descriptors, lock and background threads
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _open(self):
+        self._lock = threading.RLock()
+        self._clear()
+        self._pending_sync = 0    # records written by this process but not yet fsync-ed
+        self._fd = None
+        self._lock_fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+
+        # Recent change events for live subscribers; history replayed at startup is not published
+        self._changes = deque(maxlen=self.change_history)
+        self._changed = threading.Condition()
+        self._subscribers = 0
+        self._skipped_version = 0
+        self._published_version = float('inf')
+        with self._locked(exclusive=True):
+            self._catch_up()
+        self._published_version = self._version
+
+        self._stopped = threading.Event()
+        self._compact_requested = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name='selection-log-flusher', daemon=True)
+        self._compactor = threading.Thread(target=self._compact_loop, name='selection-log-compactor', daemon=True)
+        self._watcher = threading.Thread(target=self._watch_loop, name='selection-log-watcher', daemon=True)
+        self._flusher.start()
+        self._compactor.start()
+        self._watcher.start()
+
+    def _after_fork(self):
+        if self._closed:
+            return
+        os.close(self._lock_fd)
+        if self._fd is not None:
+            os.close(self._fd)
+        self._open()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def upsert(self, selection):
+        """Create or replace the selection for selection['employeeId'], returns (action, previous)
+
+        Raises ValueError, without writing anything, for a selection check_selection rejects.
+        """
+        check_selection(selection)
+        employee_id = selection['employeeId']
+        with self._locked(exclusive=True):
+            self._catch_up()
+            previous = self._table.get(employee_id)
+            self._append([{'op': 'put', 'selection': selection}])
+        self._maybe_request_compaction()
+        return ('updated' if previous is not None else 'created'), previous
+
+    def upsert_many(self, selections):
+        """Create or replace many selections with one log write and fsync, returns [(action, previous)]
+
+        Raises ValueError, without writing any of them, if check_selection rejects one.
+        """
+        for selection in selections:
+            check_selection(selection)
+        results = []
+        with self._locked(exclusive=True):
+            self._catch_up()
+            batch = {}
+            for selection in selections:
+                employee_id = selection['employeeId']
+                previous = batch[employee_id] if employee_id in batch else self._table.get(employee_id)
+                results.append(('updated' if previous is not None else 'created', previous))
+                batch[employee_id] = selection
+            if selections:
+                self._append([{'op': 'put', 'selection': selection} for selection in selections])
+                self._sync()
+        self._maybe_request_compaction()
+        return results
+
+    def get(self, employee_id):
+        """Return the selection for an employee or None"""
+        with self._locked():
+            self._catch_up()
+            return self._table.get(employee_id)
+
+    def find(self, key):
+        """Return the selection of the employee whose str(employeeId) is key (e.g. from a URL) or None"""
+        with self._locked():
+            self._catch_up()
+            return self._table.find(key)
+
+    def all(self):
+        """Return all selections in first-selection order
+
+        The first call materializes every selection dict; later writes update that list in place, so
+        further calls cost a list copy instead of rebuilding every row.
+        """
+        with self._locked():
+            self._catch_up()
+            return self._table.all()
+
+    def page(self, after=None, limit=100):
+        """Return (selections, next_cursor) for up to limit selections following the employeeId cursor"""
+        with self._locked():
+            self._catch_up()
+            start = 0
+            if after is not None:
+                start = self._table.position(str(after)) + 1
+            employee_ids = self._table.employee_ids(start, start + limit)
+            selections = self._table.selections(start, start + limit)
+            has_more = employee_ids and start + len(employee_ids) < len(self._table)
+            return selections, (str(employee_ids[-1]) if has_more else None)
+
+    def aggregate(self, fields=AGGREGATE_FIELDS):
+        """Return the requested AGGREGATE_FIELDS
+
+        The totals are counters kept up to date on every write. The per-employee fields (giftCounts
+        with its employee lists, employeeSelections) are built by the table on their first request and
+        updated by every write from then on; after a change they are copied once (O(N) dict/list
+        copies, no row is rebuilt) and reused until the next change.
+        """
+        with self._locked():
+            self._catch_up()
+            result = {}
+            for field in fields:
+                if field in ('totalSelections', 'uniqueEmployees'):
+                    result[field] = len(self._table)
+                elif field == 'giftCounts':
+                    if field not in self._aggregate:
+                        self._aggregate[field] = self._table.gift_counts()
+                    result[field] = self._aggregate[field]
+                elif field == 'employeeSelections':
+                    if field not in self._aggregate:
+                        self._aggregate[field] = self._table.employee_selections()
+                    result[field] = self._aggregate[field]
+                else:
+                    raise ValueError(f'Unknown aggregate field: {field}')
+            return result
+
+    def gift_totals(self):
+        """giftId -> {'giftName', 'giftPrice', 'count'} without any per-employee data"""
+        with self._locked():
+            self._catch_up()
+            return self._table.gift_totals()
+
+    def version(self):
+        """Return (version, modified_at) without touching any selection data"""
+        with self._locked():
+            self._catch_up()
+            return self._version, self._modified_at
+
+    def changes_since(self, version):
+        """Return change events newer than version, or None if some are no longer retained"""
+        with self._locked():
+            self._catch_up()
+            if version >= self._version:
+                return []
+            if version < self._skipped_version or not self._changes or self._changes[0]['version'] > version + 1:
+                return None
+            return [change for change in self._changes if change['version'] > version]
+
+    def wait_for_change(self, version, timeout):
+        """Block until the store moves past version (written by any process) or timeout expires"""
+        with self._changed:
+            self._subscribers += 1
+            try:
+                return self._changed.wait_for(lambda: self._version > version, timeout)
+            finally:
+                self._subscribers -= 1
+
+    def count(self):
+        """Return the number of employees with a selection"""
+        with self._locked():
+            self._catch_up()
+            return len(self._table)
+
+    def reset(self):
+        """Remove all selections and truncate the log"""
+        with self._locked(exclusive=True):
+            self._catch_up()
+            self._replace_log(self._checkpoint(self._version + 1, time.time(), reset=True))
+
+    def import_json(self, json_file):
+        """Import selections from a legacy JSON array file into an empty store"""
+        with self._locked(exclusive=True):
+            self._catch_up()
+            if len(self._table) or not os.path.exists(json_file):
+                return 0
+            try:
+                with open(json_file, 'r', encoding='utf-8') as f:
+                    rows = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Could not import {json_file}: {e}")
+                return 0
+            selections = []
+            for row in rows:
+                try:
+                    check_selection(row)
+                except ValueError as e:
+                    print(f"⚠️  Skipping selection in {json_file}: {e}")
+                    continue
+                selections.append(row)
+            self._append([{'op': 'put', 'selection': s} for s in selections])
+            self._sync()
+            os.replace(json_file, json_file + '.migrated')
+        print(f"📦 Imported {len(selections)} selections from {json_file}")
+        return len(selections)
+
+    def sync(self):
+        """Force all written records to disk"""
+        with self._lock:
+            self._sync()
+
+    def close(self):
+        """Flush pending records and stop background threads"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._sync()
+            os.close(self._fd)
+            os.close(self._lock_fd)
+        self._stopped.set()
+        self._compact_requested.set()
+
+    # ------------------------------------------------------------------
+    # Locking and log tailing
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def _locked(self, exclusive=False):
+        """Hold the in-process lock and the cross-process file lock"""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _catch_up(self):
+        """Apply records appended by any process since the last call (lock must be held)"""
+        try:
+            current_inode = os.stat(self.log_file).st_ino
+        except FileNotFoundError:
+            current_inode = None
+
+        if self._fd is None or current_inode != os.fstat(self._fd).st_ino:
+            # First open, or the log was compacted/reset by another process: reload from scratch
+            if self._fd is not None:
+                os.close(self._fd)
+            self._fd = os.open(self.log_file, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+            self._clear()
+
+        size = os.fstat(self._fd).st_size
+        if size <= self._offset:
+            return
+
+        data = os.pread(self._fd, size - self._offset, self._offset)
+        # Only complete lines are applied; a trailing partial line is a torn write from a crash
+        end = data.rfind(b'\n') + 1
+        for raw_line in data[:end].split(b'\n')[:-1]:
+            try:
+                entry = json.loads(raw_line)
+            except ValueError:
+                print(f"⚠️  Skipping corrupt record in {self.log_file}")
+                continue
+            try:
+                self._apply(entry)
+            except (ValueError, TypeError, KeyError, AttributeError) as e:
+                # Written by an older version without validation: the index stays consistent without it
+                print(f"⚠️  Skipping unusable record in {self.log_file}: {e}")
+            self._log_records += 1
+        self._offset += end
+        self._notify()
+
+    def _clear(self):
+        """Drop the in-memory index and aggregates before replaying the log"""
+        self._table = SelectionTable()  # compact selections and per-gift counts, by employeeId
+        self._aggregate = {}      # per-employee aggregate fields, built on request after a change
+        self._log_records = 0     # records currently in the log, live or superseded
+        self._offset = 0          # bytes of the log applied to the index
+        self._version = 0         # monotonically increasing change number, survives compaction
+        self._modified_at = None  # epoch seconds of the last change
+
+    def _apply(self, entry):
+        """Apply one log entry to the in-memory index and aggregate counters"""
+        # Entries written before versioning count as one change each
+        self._version = entry.get('version', self._version + 1)
+        self._modified_at = entry.get('ts', self._modified_at)
+        # Compacted snapshot entries carry no version and are never published again
+        publish = 'version' in entry and self._version > self._published_version
+        if entry.get('op') == 'put':
+            selection = entry['selection']
+            employee_id = selection['employeeId']
+            previous_gift_id = self._table.gift_id(employee_id)
+            self._table.put(selection)
+            self._aggregate = {}
+            if publish:
+                self._publish({
+                    'type': 'selection',
+                    'employeeId': employee_id,
+                    'giftId': selection['giftId'],
+                    'giftName': selection.get('giftName'),
+                    'giftPrice': selection.get('giftPrice'),
+                    'count': self._table.gift_count(selection['giftId']),
+                    'previousGiftId': previous_gift_id,
+                    'previousCount': self._table.gift_count(previous_gift_id) if previous_gift_id is not None else None,
+                    'selectedAt': selection.get('selectionTime', selection.get('receivedAt')),
+                    'totalSelections': len(self._table)
+                })
+        elif entry.get('op') == 'checkpoint' and entry.get('reset') and publish:
+            self._publish({'type': 'reset'})
+        elif self._version > self._published_version:
+            # Changes folded into a compacted log by another worker cannot be replayed as deltas
+            self._skipped_version = self._published_version = self._version
+
+    def _publish(self, change):
+        change['version'] = self._version
+        self._changes.append(change)
+        self._published_version = self._version
+
+    def _notify(self):
+        with self._changed:
+            self._changed.notify_all()
+
+    def _append(self, entries):
+        """Append entries to the log, fsync-ing in batches (exclusive lock held, caught up)"""
+        if os.fstat(self._fd).st_size != self._offset:
+            # Drop a torn write left by a crashed writer so our records start on a clean line
+            os.ftruncate(self._fd, self._offset)
+        now = time.time()
+        for version, entry in enumerate(entries, self._version + 1):
+            entry['version'] = version
+            entry['ts'] = now
+        data = ''.join(json.dumps(entry, ensure_ascii=False) + '\n' for entry in entries).encode('utf-8')
+        _write_all(self._fd, data)
+        for entry in entries:
+            self._apply(entry)
+        self._offset += len(data)
+        self._log_records += len(entries)
+        self._pending_sync += len(entries)
+        self._notify()
+        if self._pending_sync >= self.fsync_every:
+            self._sync()
+
+    def _sync(self):
+        if self._pending_sync and not self._closed:
+            os.fsync(self._fd)
+            self._pending_sync = 0
+
+    def _flush_loop(self):
+        """Background fsync so that records never stay volatile longer than fsync_interval"""
+        while not self._closed:
+            self._stopped.wait(self.fsync_interval)
+            with self._lock:
+                if not self._closed:
+                    self._sync()
+
+    def _watch_loop(self):
+        """Tail the log for writes from other workers while anyone is waiting for changes"""
+        while not self._closed:
+            self._stopped.wait(self.watch_interval)
+            if self._subscribers and not self._closed:
+                with self._locked():
+                    self._catch_up()
+
+    # ------------------------------------------------------------------
+    # Compaction
+    # ------------------------------------------------------------------
+
+    def _needs_compaction(self):
+        live = len(self._table)
+        return self._log_records >= self.compact_min_records and self._log_records > self.compact_ratio * max(live, 1)
+
+    def _maybe_request_compaction(self):
+        if self._needs_compaction():
+            self._compact_requested.set()
+
+    def _compact_loop(self):
+        while True:
+            self._compact_requested.wait()
+            self._compact_requested.clear()
+            if self._closed:
+                return
+            try:
+                self.compact()
+            except Exception as e:
+                print(f"❌ Error compacting selection log: {e}")
+
+    def compact(self):
+        """Rewrite the log so it only holds the live selection of each employee"""
+        with self._locked():
+            self._catch_up()
+            if not self._needs_compaction():
+                return
+            inode = os.fstat(self._fd).st_ino
+            offset = self._offset
+            snapshot = self._table.selections()
+            checkpoint = self._checkpoint()
+
+        # Serialize the snapshot without blocking writers; the checkpoint restores the version
+        data = ''.join(json.dumps({'op': 'put', 'selection': s}, ensure_ascii=False) + '\n'
+                       for s in snapshot).encode('utf-8') + checkpoint
+
+        with self._locked(exclusive=True):
+            self._catch_up()
+            if self._closed or os.fstat(self._fd).st_ino != inode:
+                return  # reset or compacted by someone else meanwhile
+            # Carry over records appended by any process while the snapshot was serialized
+            tail = os.pread(self._fd, self._offset - offset, offset)
+            self._replace_log(data + tail)
+
+    def _checkpoint(self, version=None, modified_at=None, reset=False):
+        """Serialized checkpoint entry carrying the version across log rewrites"""
+        entry = {
+            'op': 'checkpoint',
+            'version': self._version if version is None else version,
+            'ts': self._modified_at if modified_at is None else modified_at
+        }
+        if reset:
+            entry['reset'] = True
+        return (json.dumps(entry) + '\n').encode('utf-8')
+
+    def _replace_log(self, data):
+        """Atomically replace the log contents (exclusive lock must be held)"""
+        tmp_file = f"{self.log_file}.{os.getpid()}.tmp"
+        fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            _write_all(fd, data)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_file, self.log_file)
+        self._pending_sync = 0
+        # Reload from the new file; other processes notice the inode change on their next access
+        self._catch_up()
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Compact in-memory table of gift selections
+Selections are kept as array-backed columns instead of one dict per employee: gift fields are an
+interned reference to a shared (giftId, giftName, giftPrice) entry and timestamps are integers.
+Dicts identical to the stored JSON are rebuilt on read; the full list and the per-employee
+aggregates, once requested, are kept and updated row by row on every write, so repeated reads
+only copy them.
+"""
+
+from array import array
+from datetime import datetime, timedelta
+
+# Key order of selections built by backend.build_selection, which leaves out selectionTime when the
+# client sent none (bulk imports); other shapes are stored as-is
+SELECTION_KEYS = ('giftId', 'giftName', 'giftPrice', 'employeeId', 'selectionTime', 'receivedAt', 'id')
+UNTIMED_SELECTION_KEYS = tuple(key for key in SELECTION_KEYS if key != 'selectionTime')
+NO_SELECTION_TIME = -2 ** 63  # selectionTime column value of a selection without one
+
+EPOCH = datetime(1970, 1, 1)
+MILLISECOND = timedelta(milliseconds=1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def check_selection(selection):
+    """Raise ValueError unless selection can be stored: an object whose employeeId and giftId are
+    strings or integers (they key the index and the per-gift counters)"""
+    if not isinstance(selection, dict):
+        raise ValueError('selection must be an object')
+    for field in ('employeeId', 'giftId'):
+        value = selection.get(field)
+        if isinstance(value, bool) or not isinstance(value, (str, int)):
+            raise ValueError(f'{field} must be a string or an integer')
+
+
+def _format_selection_time(ms):
+    """Milliseconds since the epoch as a JavaScript toISOString() value"""
+    return (EPOCH + ms * MILLISECOND).isoformat(timespec='milliseconds') + 'Z'
+
+
+def _selection_id(received_at):
+    """The id build_selection derives from the same timestamp as receivedAt"""
+    return (f"selection_{received_at[0:4]}{received_at[5:7]}{received_at[8:10]}_"
+            f"{received_at[11:13]}{received_at[14:16]}{received_at[17:19]}_{received_at[20:26] or '000000'}")
+
+
+def _format_received(us, suffix):
+    """Microseconds since the epoch as (receivedAt, id) the way build_selection writes them"""
+    received_at = (EPOCH + us * MICROSECOND).isoformat()
+    return received_at, _selection_id(received_at) + suffix
+
+
+def _parse(value):
+    """Naive datetime from an ISO string, or None"""
+    try:
+        clock = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    return clock if clock.tzinfo is None and clock.year >= 1000 else None
+
+
+def _encode_selection_time(value):
+    """Milliseconds since the epoch, or None unless value round-trips exactly"""
+    if not isinstance(value, str) or not value.endswith('Z'):
+        return None
+    clock = _parse(value[:-1])
+    if clock is None or clock.isoformat(timespec='milliseconds') + 'Z' != value:
+        return None
+    return (clock - EPOCH) // MILLISECOND
+
+
+def _encode_received(received_at, selection_id):
+    """(microseconds since the epoch, id suffix), or None unless both values round-trip exactly"""
+    clock = _parse(received_at)
+    if clock is None or clock.isoformat() != received_at or not isinstance(selection_id, str):
+        return None
+    prefix = _selection_id(received_at)
+    if not selection_id.startswith(prefix):
+        return None
+    return (clock - EPOCH) // MICROSECOND, selection_id[len(prefix):]
+
+
+class SelectionTable:
+    """Selections indexed by employeeId, one row per employee in first-selection order"""
+
+    def __init__(self):
+        self._rows = {}               # employeeId -> row
+        self._order = []              # row -> employeeId
+        self._aliases = {}            # str(employeeId) -> employeeId, for non-string ids only
+        self._gifts = []              # gift ref -> (giftId, giftName, giftPrice)
+        self._gift_refs = {}          # (giftId, giftName, giftPrice) -> gift ref
+        self._gift = array('i')       # row -> gift ref
+        self._gift_pos = array('i')   # row -> index in its gift's 'rows' column
+        self._selected = array('q')   # row -> selectionTime, ms since the epoch, or NO_SELECTION_TIME
+        self._received = array('q')   # row -> receivedAt, us since the epoch
+        self._suffixes = {}           # row -> id suffix (bulk imports)
+        self._irregular = {}          # row -> selection dict that has no compact form
+        # giftId -> {'giftName', 'giftPrice', 'count', 'rows': rows in selection order, with stale entries}
+        self._gift_counts = {}
+        self._materialized = None     # row -> selection dict, from the first all() on
+        self._summaries = None        # employeeId -> employee_selections() entry, from its first call on
+        self._gift_employees = None   # giftId -> {employeeId: None} in selection order, from gift_counts() on
+
+    def __len__(self):
+        return len(self._order)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def get(self, employee_id):
+        """Return the selection dict of an employee or None"""
+        row = self._rows.get(employee_id)
+        return None if row is None else self._selection(row)
+
+    def find(self, key):
+        """Return the selection dict of the employee whose str(employeeId) is key, or None"""
+        row = self._rows.get(key)
+        if row is None and key in self._aliases:
+            row = self._rows[self._aliases[key]]
+        return None if row is None else self._selection(row)
+
+    def gift_id(self, employee_id):
+        """Return the giftId selected by an employee or None"""
+        row = self._rows.get(employee_id)
+        return None if row is None else self._gifts[self._gift[row]][0]
+
+    def position(self, cursor):
+        """Row of the employee whose str(employeeId) is cursor, raises KeyError if unknown"""
+        row = self._rows.get(cursor)
+        if row is None:
+            row = self._rows[self._aliases[cursor]]
+        return row
+
+    def employee_ids(self, start=0, stop=None):
+        return self._order[start:stop]
+
+    def selections(self, start=0, stop=None):
+        """Selection dicts for rows start..stop in first-selection order"""
+        if self._materialized is not None:
+            return self._materialized[start:stop]
+        return [self._selection(row) for row in range(*slice(start, stop).indices(len(self._order)))]
+
+    def all(self):
+        """Every selection dict, as a new list; the dicts are kept and updated on writes from now on"""
+        if self._materialized is None:
+            self._materialized = self.selections()
+        return self._materialized[:]
+
+    def gift_count(self, gift_id):
+        gift = self._gift_counts.get(gift_id)
+        return gift['count'] if gift else 0
+
+    def gift_totals(self):
+        """giftId -> {'giftName', 'giftPrice', 'count'}, read from the per-gift counters"""
+        return {
+            gift_id: {'giftName': gift['giftName'], 'giftPrice': gift['giftPrice'], 'count': gift['count']}
+            for gift_id, gift in self._gift_counts.items()
+        }
+
+    def gift_counts(self):
+        """giftId -> {'giftName', 'giftPrice', 'count', 'employees'} with employees in selection order
+
+        The employee lists are built from the rows columns on the first call, then kept up to date
+        by every write.
+        """
+        if self._gift_employees is None:
+            self._gift_employees = {
+                gift_id: dict.fromkeys(self._order[row] for row in self._live_rows(gift_id, gift['rows']))
+                for gift_id, gift in self._gift_counts.items()
+            }
+        return {
+            gift_id: {
+                'giftName': gift['giftName'],
+                'giftPrice': gift['giftPrice'],
+                'count': gift['count'],
+                'employees': list(self._gift_employees[gift_id])
+            }
+            for gift_id, gift in self._gift_counts.items()
+        }
+
+    def employee_selections(self):
+        """employeeId -> {'giftId', 'giftName', 'giftPrice', 'selectedAt'}
+
+        Built on the first call, then kept up to date by every write.
+        """
+        if self._summaries is None:
+            self._summaries = {employee_id: self._summary(row) for row, employee_id in enumerate(self._order)}
+        return dict(self._summaries)
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def put(self, selection):
+        """Create or replace the selection of selection['employeeId']
+
+        Raises ValueError, before anything changes, for a selection check_selection rejects.
+        """
+        check_selection(selection)
+        employee_id = selection['employeeId']
+        row = self._rows.get(employee_id)
+        if row is None:
+            row = len(self._order)
+            self._rows[employee_id] = row
+            self._order.append(employee_id)
+            if not isinstance(employee_id, str):
+                self._aliases[str(employee_id)] = employee_id
+            self._gift.append(0)
+            self._gift_pos.append(0)
+            self._selected.append(0)
+            self._received.append(0)
+        else:
+            self._uncount(row)
+            self._suffixes.pop(row, None)
+            self._irregular.pop(row, None)
+
+        selected = received = None
+        keys = tuple(selection)
+        if keys == SELECTION_KEYS or keys == UNTIMED_SELECTION_KEYS:
+            if 'selectionTime' in selection:
+                selected = _encode_selection_time(selection['selectionTime'])
+            else:
+                selected = NO_SELECTION_TIME
+            received = _encode_received(selection['receivedAt'], selection['id'])
+        gift = (selection['giftId'], selection.get('giftName'), selection.get('giftPrice'))
+        try:
+            ref = self._intern(gift)
+        except TypeError:  # unhashable gift fields
+            ref, selected = self._intern((gift[0], None, None)), None
+
+        self._gift[row] = ref
+        if selected is None or received is None:
+            self._irregular[row] = selection
+        else:
+            self._selected[row] = selected
+            self._received[row], suffix = received
+            if suffix:
+                self._suffixes[row] = suffix
+        self._count(row, selection)
+        if self._summaries is not None:
+            self._summaries[employee_id] = self._summary(row)
+        if self._materialized is not None:
+            if row == len(self._materialized):
+                self._materialized.append(self._selection(row))
+            else:
+                self._materialized[row] = self._selection(row)
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _intern(self, gift):
+        ref = self._gift_refs.get(gift)
+        if ref is None:
+            ref = self._gift_refs[gift] = len(self._gifts)
+            self._gifts.append(gift)
+        return ref
+
+    def _selection(self, row):
+        selection = self._irregular.get(row)
+        if selection is not None:
+            return selection
+        gift_id, gift_name, gift_price = self._gifts[self._gift[row]]
+        received_at, selection_id = _format_received(self._received[row], self._suffixes.get(row, ''))
+        selection = {
+            'giftId': gift_id,
+            'giftName': gift_name,
+            'giftPrice': gift_price,
+            'employeeId': self._order[row]
+        }
+        if self._selected[row] != NO_SELECTION_TIME:
+            selection['selectionTime'] = _format_selection_time(self._selected[row])
+        selection['receivedAt'] = received_at
+        selection['id'] = selection_id
+        return selection
+
+    def _summary(self, row):
+        selection = self._irregular.get(row)
+        if selection is None:
+            gift_id, gift_name, gift_price = self._gifts[self._gift[row]]
+            if self._selected[row] == NO_SELECTION_TIME:
+                selected_at = _format_received(self._received[row], '')[0]
+            else:
+                selected_at = _format_selection_time(self._selected[row])
+        else:
+            gift_id, gift_name, gift_price = selection['giftId'], selection.get('giftName'), selection.get('giftPrice')
+            selected_at = selection.get('selectionTime', selection.get('receivedAt'))
+        return {'giftId': gift_id, 'giftName': gift_name, 'giftPrice': gift_price, 'selectedAt': selected_at}
+
+    def _live_rows(self, gift_id, rows):
+        """Entries of a gift's rows column that still select that gift"""
+        gifts, gift_column, gift_pos = self._gifts, self._gift, self._gift_pos
+        return [row for i, row in enumerate(rows) if gift_pos[row] == i and gifts[gift_column[row]][0] == gift_id]
+
+    def _count(self, row, selection):
+        gift_id = selection['giftId']
+        gift = self._gift_counts.get(gift_id)
+        if gift is None:
+            gift = self._gift_counts[gift_id] = {
+                'giftName': selection.get('giftName'),
+                'giftPrice': selection.get('giftPrice'),
+                'count': 0,
+                'rows': array('i')
+            }
+        gift['count'] += 1
+        self._gift_pos[row] = len(gift['rows'])
+        gift['rows'].append(row)
+        if self._gift_employees is not None:
+            self._gift_employees.setdefault(gift_id, {})[self._order[row]] = None
+
+    def _uncount(self, row):
+        gift_id = self._gifts[self._gift[row]][0]
+        gift = self._gift_counts[gift_id]
+        gift['count'] -= 1
+        if self._gift_employees is not None:
+            employees = self._gift_employees[gift_id]
+            del employees[self._order[row]]
+            if not employees:
+                del self._gift_employees[gift_id]
+        # Mark the entry stale; rebuild the column once stale entries outnumber live ones
+        self._gift_pos[row] = -1
+        if not gift['count']:
+            del self._gift_counts[gift_id]
+        elif len(gift['rows']) > 2 * gift['count'] + 16:
+            gift['rows'] = array('i', self._live_rows(gift_id, gift['rows']))
+            for i, live_row in enumerate(gift['rows']):
+                self._gift_pos[live_row] = i